@@ -1 +1,4 @@
+import time
 
+# First thing the package does, so the startup report can time the imports that follow.
+IMPORT_STARTED = time.perf_counter()
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from .errors import ApiError
+from .metrics import ServiceMetrics
+
+# Rough characters per token for the cost estimate; exactness doesn't matter for fairness.
+CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class AdmissionConfig:
+    # Requests handed to the translator at once; matches the translator's own parallelism so
+    # its internal semaphore never becomes a second, unbounded queue.
+    capacity: int
+    # Requests allowed to wait for a slot (0 = unbounded).
+    max_queue: int = 64
+    # Default per-request deadline in ms (0 = none); X-Deadline-Ms overrides it per request.
+    default_deadline_ms: int = 0
+
+
+@dataclass(frozen=True)
+class RequestContext:
+    client_id: str
+    # time.monotonic() value by which the response must be complete, or None.
+    deadline: float | None = None
+
+
+def estimate_cost(text: str, max_tokens: int) -> float:
+    """Estimated tokens of work: the prompt plus the expected (bounded) output."""
+    input_tokens = len(text) / CHARS_PER_TOKEN
+    # Translations come out roughly as long as the input; max_tokens caps the decode.
+    return input_tokens + min(float(max_tokens), input_tokens * 1.2 + 8)
+
+
+@dataclass(order=True)
+class _Waiter:
+    finish_tag: float
+    seq: int
+    cost: float = field(compare=False)
+    client_id: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AdmissionController:
+    """
+    Bounded, cost-aware fair queue in front of the translator.
+
+    Each client pays for its requests out of its own virtual-time account: a request's
+    finish tag is the client's previous tag (or the current virtual time, if the client has
+    been idle) plus its estimated cost, and free slots go to the lowest tag. A client sending
+    10k-character texts thus drains its account quickly and waits behind clients sending
+    short strings, while an idle client never banks credit.
+
+    Requests are rejected up front when the queue is full (429) or when the measured
+    throughput says the deadline cannot be met (503), both with Retry-After.
+    """
+
+    def __init__(self, config: AdmissionConfig, *, metrics: ServiceMetrics | None = None) -> None:
+        self._config = config
+        self._metrics = metrics
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._in_flight_cost = 0.0
+        self._queued_cost = 0.0
+        self._virtual_time = 0.0
+        self._client_tags: dict[str, float] = {}
+        # EWMA of tokens of work completed per second by one slot; None until measured.
+        self._slot_rate: float | None = None
+        self._admitted = 0
+        self._rejected = {"queue_full": 0, "deadline_unreachable": 0, "deadline_exceeded": 0}
+        self._wait_ms_total = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for w in self._waiters if not w.future.done())
+
+    def context(self, *, client_id: str, deadline_ms: int | None) -> RequestContext:
+        if deadline_ms is None:
+            deadline_ms = self._config.default_deadline_ms
+        deadline = None
+        if deadline_ms and deadline_ms > 0:
+            deadline = time.monotonic() + deadline_ms / 1000
+        return RequestContext(client_id=client_id, deadline=deadline)
+
+    def _predicted_wait_s(self, extra_cost: float = 0.0) -> float | None:
+        if not self._slot_rate:
+            return None
+        work = self._queued_cost + self._in_flight_cost + extra_cost
+        return work / (self._slot_rate * self._config.capacity)
+
+    def _reject(self, reason: str, code: str, message: str, status: int) -> ApiError:
+        self._rejected[reason] += 1
+        if self._metrics is not None:
+            self._metrics.admission_rejections.inc(reason=reason)
+        retry_after = self._predicted_wait_s()
+        retry_s = max(1, math.ceil(retry_after)) if retry_after is not None else 1
+        return ApiError(code, message, status, headers={"Retry-After": str(retry_s)})
+
+    def check(self, ctx: RequestContext, cost: float, *, count: int = 1) -> None:
+        """Raise the rejection `count` requests would get right now, without enqueueing them."""
+        room = self._config.max_queue + max(0, self._config.capacity - self._in_flight)
+        if self._config.max_queue and self.queued + count > room:
+            raise self._reject(
+                "queue_full",
+                "QUEUE_FULL",
+                "The translation queue is full. Retry later.",
+                429,
+            )
+        if ctx.deadline is not None:
+            wait = self._predicted_wait_s(cost * count)
+            if wait is not None and time.monotonic() + wait > ctx.deadline:
+                raise self._reject(
+                    "deadline_unreachable",
+                    "DEADLINE_UNREACHABLE",
+                    "The request cannot complete within its deadline at the current load.",
+                    503,
+                )
+
+    @asynccontextmanager
+    async def slot(self, ctx: RequestContext, cost: float) -> AsyncIterator[None]:
+        """Wait for a translator slot in fair order; release it (and learn throughput) on exit."""
+        self.check(ctx, cost)
+        enqueued_at = time.monotonic()
+        if self._in_flight < self._config.capacity and not self.queued:
+            self._start(ctx.client_id, cost)
+        else:
+            await self._wait(ctx, cost)
+        self._admitted += 1
+        wait_s = time.monotonic() - enqueued_at
+        self._wait_ms_total += wait_s * 1000
+        if self._metrics is not None:
+            self._metrics.admission_wait_seconds.observe(wait_s)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._finish(cost, time.monotonic() - started)
+
+    async def _wait(self, ctx: RequestContext, cost: float) -> None:
+        start_tag = max(self._virtual_time, self._client_tags.get(ctx.client_id, 0.0))
+        waiter = _Waiter(
+            finish_tag=start_tag + cost,
+            seq=next(self._seq),
+            cost=cost,
+            client_id=ctx.client_id,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._client_tags[ctx.client_id] = waiter.finish_tag
+        self._queued_cost += cost
+        heapq.heappush(self._waiters, waiter)
+
+        timeout = None if ctx.deadline is None else max(0.0, ctx.deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except TimeoutError:
+            if waiter.future.done():
+                # Granted in the same tick the deadline fired; hand the slot back.
+                self._finish(cost, None)
+            else:
+                waiter.future.cancel()
+                self._queued_cost -= cost
+            raise self._reject(
+                "deadline_exceeded",
+                "DEADLINE_EXCEEDED",
+                "The request waited in the queue past its deadline.",
+                503,
+            ) from None
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._finish(cost, None)
+            else:
+                waiter.future.cancel()
+                self._queued_cost -= cost
+            raise
+
+    def _start(self, client_id: str, cost: float) -> None:
+        self._in_flight += 1
+        self._in_flight_cost += cost
+        start_tag = max(self._virtual_time, self._client_tags.get(client_id, 0.0))
+        self._virtual_time = start_tag
+        self._client_tags[client_id] = start_tag + cost
+        self._prune_clients()
+
+    def _finish(self, cost: float, elapsed_s: float | None) -> None:
+        self._in_flight -= 1
+        self._in_flight_cost -= cost
+        if elapsed_s:
+            rate = cost / elapsed_s
+            previous = self._slot_rate
+            self._slot_rate = rate if previous is None else 0.8 * previous + 0.2 * rate
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._in_flight < self._config.capacity:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done():
+                continue
+            self._queued_cost -= waiter.cost
+            self._virtual_time = max(self._virtual_time, waiter.finish_tag - waiter.cost)
+            self._in_flight += 1
+            self._in_flight_cost += waiter.cost
+            waiter.future.set_result(None)
+
+    def _prune_clients(self) -> None:
+        # Clients whose account is behind the virtual clock have no credit left to remember.
+        if len(self._client_tags) > 1024:
+            self._client_tags = {
+                client: tag for client, tag in self._client_tags.items() if tag > self._virtual_time
+            }
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self._config.capacity,
+            "max_queue": self._config.max_queue,
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "admitted": self._admitted,
+            "rejected": dict(self._rejected),
+            "mean_wait_ms": (self._wait_ms_total / self._admitted) if self._admitted else 0.0,
+            "tokens_per_second_per_slot": self._slot_rate,
+        }
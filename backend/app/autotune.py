@@ -0,0 +1,364 @@
+"""
+Measure llama.cpp runtime parameters on this host and save the fastest as a tuning profile.
+
+    uv run python -m app.autotune --model /path/to/model.gguf --out tuning.json
+    uv run python -m app.autotune --model ... --params n_threads,n_batch --threads 8,16,32
+
+Parameters are tuned one at a time (coordinate descent) in the order threads, batch threads,
+n_batch, context size, mmap, mlock and KV cache type, each against representative translation
+prompts; a candidate has to beat the current best by --min-gain to be kept. Point
+LOCALLINGUA_TUNING_PROFILE at the output file to use the profile at startup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, replace
+
+from .config import load_settings
+from .models import TranslateOptions
+from .translator.llama_cpp import (
+    KV_CACHE_TYPES,
+    LlamaCppConfig,
+    LlamaCppTranslator,
+    _read_perf,
+    _reset_perf,
+    default_n_threads,
+    llama_params,
+)
+from .translator.prompt import build_translation_prompt
+from .tuning import TuningProfile, host_info, profile_to_dict
+
+# A UI string, a sentence and a paragraph: the mix the service sees.
+SAMPLE_TEXTS = [
+    "Save changes?",
+    "Your order has shipped and should arrive within three to five business days.",
+    (
+        "We are updating our privacy policy to explain more clearly how we collect, use and "
+        "share your information. The changes take effect next month. If you keep using the "
+        "service after that date, you agree to the updated policy. You can download a copy "
+        "of your data or delete your account at any time from the settings page, and our "
+        "support team is happy to answer any questions you may have about these changes."
+    ),
+]
+
+TUNABLE = ["n_threads", "n_threads_batch", "n_batch", "n_ctx", "use_mmap", "use_mlock", "kv"]
+
+
+@dataclass(frozen=True)
+class Measurement:
+    load_ms: float = 0.0
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    prompt_eval_ms: float = 0.0
+    generation_ms: float = 0.0
+    error: str | None = None
+
+    @property
+    def mean_request_ms(self) -> float:
+        if self.error is not None or not self.requests:
+            return float("inf")
+        return (self.prompt_eval_ms + self.generation_ms) / self.requests
+
+    def to_dict(self) -> dict:
+        def _rate(tokens: int, ms: float) -> float | None:
+            return round(tokens / ms * 1000, 2) if ms > 0 else None
+
+        return {
+            **asdict(self),
+            "prompt_tokens_per_s": _rate(self.prompt_tokens, self.prompt_eval_ms),
+            "generation_tokens_per_s": _rate(self.completion_tokens, self.generation_ms),
+            "mean_request_ms": None if self.error else round(self.mean_request_ms, 2),
+        }
+
+
+def sample_prompts(target_lang: str = "es") -> list[str]:
+    return [
+        build_translation_prompt(text=text, source_lang="en", target_lang=target_lang)
+        for text in SAMPLE_TEXTS
+    ]
+
+
+def service_min_ctx(*, segment_max_chars: int, max_tokens: int, parallel: int = 1) -> int:
+    """
+    Smallest context the service can run in: the prompt around the longest segment (at ~3
+    characters per token) plus the output budget, for every sequence decoding at once.
+    """
+    overhead = max(
+        len(build_translation_prompt(text="", source_lang="en", target_lang="es", mode=mode))
+        for mode in ("literal", "natural")
+    )
+    per_sequence = (overhead + (segment_max_chars or 1000)) // 3 + max_tokens
+    return per_sequence * max(1, parallel)
+
+
+def measure(
+    config: LlamaCppConfig,
+    prompts: list[str],
+    *,
+    max_tokens: int = 64,
+    repeats: int = 2,
+) -> Measurement:
+    """Load the model with `config` and time `repeats` cold completions of every prompt."""
+    from llama_cpp import Llama  # type: ignore
+
+    llm = None
+    try:
+        start = time.perf_counter()
+        llm = Llama(**llama_params(config), verbose=False)
+        load_ms = (time.perf_counter() - start) * 1000
+        llm.create_completion(prompt=prompts[0], max_tokens=4, temperature=0.0)
+
+        totals = {"prompt_tokens": 0, "completion_tokens": 0, "prompt_eval_ms": 0.0}
+        generation_ms = 0.0
+        for _ in range(repeats):
+            for prompt in prompts:
+                # Forget the previous prompt so every run evaluates its prompt from scratch.
+                llm.reset()
+                _reset_perf(llm)
+                start = time.perf_counter()
+                completion = llm.create_completion(
+                    prompt=prompt, max_tokens=max_tokens, temperature=0.0, seed=42
+                )
+                wall_ms = (time.perf_counter() - start) * 1000
+                prompt_eval_ms, eval_ms = _read_perf(llm)
+                usage = completion.get("usage") or {}
+                totals["prompt_tokens"] += int(usage.get("prompt_tokens") or 0)
+                totals["completion_tokens"] += int(usage.get("completion_tokens") or 0)
+                if prompt_eval_ms is None or eval_ms is None:
+                    # No perf counters in this llama-cpp-python: charge it all to generation.
+                    generation_ms += wall_ms
+                else:
+                    totals["prompt_eval_ms"] += prompt_eval_ms
+                    generation_ms += eval_ms
+        return Measurement(
+            load_ms=load_ms,
+            requests=repeats * len(prompts),
+            generation_ms=generation_ms,
+            **totals,
+        )
+    except Exception as exc:  # a config the host can't run (e.g. mlock limits) is a result too
+        return Measurement(error=f"{type(exc).__name__}: {exc}")
+    finally:
+        del llm
+        gc.collect()
+
+
+def _thread_counts(cpus: int) -> list[int]:
+    counts = {cpus, max(1, cpus // 2), max(1, cpus * 3 // 4)}
+    n = 1
+    while n < cpus:
+        counts.add(n)
+        n *= 2
+    return sorted(counts)
+
+
+def search_space(
+    params: list[str],
+    *,
+    cpus: int,
+    min_ctx: int,
+    threads: list[int] | None = None,
+    n_batch: list[int] | None = None,
+    n_ctx: list[int] | None = None,
+    kv_types: list[str] | None = None,
+) -> dict[str, list]:
+    """Candidate values per LlamaCppConfig field, in tuning order."""
+    threads = threads or _thread_counts(cpus)
+    space = {
+        "n_threads": threads,
+        "n_threads_batch": threads,
+        "n_batch": n_batch or [64, 128, 256, 512, 1024],
+        "n_ctx": [c for c in (n_ctx or [1024, 2048, 4096, 8192]) if c >= min_ctx],
+        "use_mmap": [True, False],
+        "use_mlock": [False, True],
+        "kv_cache_type": kv_types or ["f16", "q8_0", "q4_0"],
+    }
+    wanted = {"kv_cache_type" if p == "kv" else p for p in params}
+    return {name: values for name, values in space.items() if name in wanted and values}
+
+
+def tune(
+    base: LlamaCppConfig,
+    space: dict[str, list],
+    measure_fn: Callable[[LlamaCppConfig], Measurement],
+    *,
+    min_gain: float = 0.03,
+    log: Callable[[str], None] = lambda _: None,
+) -> tuple[LlamaCppConfig, list[dict]]:
+    """Coordinate descent over `space`; returns the best config and every measurement."""
+    measured: dict[LlamaCppConfig, Measurement] = {}
+    results: list[dict] = []
+
+    def _measure(config: LlamaCppConfig) -> Measurement:
+        if config not in measured:
+            measured[config] = measure_fn(config)
+            result = {"config": _describe(config), **measured[config].to_dict()}
+            results.append(result)
+            log(_format(result))
+        return measured[config]
+
+    best = base
+    for name, values in space.items():
+        current = _measure(best)
+        winner, winner_ms = best, current.mean_request_ms
+        for value in values:
+            candidate = replace(best, **{name: value})
+            ms = _measure(candidate).mean_request_ms
+            if ms < winner_ms * (1 - min_gain) or (winner_ms == float("inf") and ms < winner_ms):
+                winner, winner_ms = candidate, ms
+        best = winner
+    return best, results
+
+
+def _describe(config: LlamaCppConfig) -> dict:
+    return {
+        "n_threads": config.n_threads,
+        "n_threads_batch": config.n_threads_batch,
+        "n_batch": config.n_batch,
+        "n_ctx": config.n_ctx,
+        "use_mmap": config.use_mmap,
+        "use_mlock": config.use_mlock,
+        "kv_cache_type": config.kv_cache_type or "f16",
+    }
+
+
+def _format(result: dict) -> str:
+    config = " ".join(f"{k}={v}" for k, v in result["config"].items())
+    if result["error"]:
+        return f"{config}  error: {result['error']}"
+    return (
+        f"{config}  prompt {result['prompt_tokens_per_s']} tok/s"
+        f"  gen {result['generation_tokens_per_s']} tok/s"
+        f"  {result['mean_request_ms']} ms/request"
+    )
+
+
+def profile_from_config(config: LlamaCppConfig) -> TuningProfile:
+    return TuningProfile(
+        n_threads=config.n_threads,
+        n_threads_batch=config.n_threads_batch,
+        n_batch=config.n_batch,
+        n_ctx=config.n_ctx,
+        use_mmap=config.use_mmap,
+        use_mlock=config.use_mlock,
+        kv_cache_type=config.kv_cache_type or "f16",
+        n_gpu_layers=config.n_gpu_layers,
+    )
+
+
+def build_report(
+    config: LlamaCppConfig,
+    best: LlamaCppConfig,
+    results: list[dict],
+    args: argparse.Namespace,
+) -> dict:
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": host_info(),
+        "model": {
+            "path": config.model_path,
+            "fingerprint": LlamaCppTranslator(config).fingerprint(),
+        },
+        "workload": {
+            "prompts": len(SAMPLE_TEXTS),
+            "max_tokens": args.max_tokens,
+            "repeats": args.repeats,
+        },
+        "profile": profile_to_dict(profile_from_config(best)),
+        "baseline": results[0] if results else None,
+        "best": next((r for r in results if r["config"] == _describe(best)), None),
+        "results": results,
+    }
+
+
+def _int_list(raw: str) -> list[int]:
+    return [int(part) for part in raw.split(",") if part.strip()]
+
+
+def _str_list(raw: str) -> list[str]:
+    return [part.strip() for part in raw.split(",") if part.strip()]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--model", required=True, help="path to the GGUF model to tune for")
+    parser.add_argument("--out", default="tuning.json", help="profile/report file to write")
+    parser.add_argument("--params", type=_str_list, default=TUNABLE, help=",".join(TUNABLE))
+    parser.add_argument("--threads", type=_int_list, help="thread counts to try")
+    parser.add_argument("--n-batch", type=_int_list, help="n_batch values to try")
+    parser.add_argument("--n-ctx", type=_int_list, help="context sizes to try")
+    parser.add_argument("--kv-types", type=_str_list, help=",".join(KV_CACHE_TYPES))
+    parser.add_argument("--gpu-layers", type=int, default=-1)
+    parser.add_argument("--target", default="es", help="target language of the sample prompts")
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument(
+        "--service-max-tokens",
+        type=int,
+        default=TranslateOptions.model_fields["max_tokens"].default,
+        help="output budget the context has to fit (default: the API's max_tokens default)",
+    )
+    parser.add_argument(
+        "--parallel", type=int, help="sequences sharing the context (default: the settings)"
+    )
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--min-gain", type=float, default=0.03, help="required improvement")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    if not os.path.exists(args.model):
+        raise SystemExit(f"Model not found: {args.model}")
+    unknown = set(args.kv_types or []) - set(KV_CACHE_TYPES)
+    if unknown:
+        raise SystemExit(f"Unknown KV cache types: {', '.join(sorted(unknown))}")
+
+    prompts = sample_prompts(args.target)
+    settings = load_settings()
+    min_ctx = service_min_ctx(
+        segment_max_chars=settings.segment_max_chars,
+        max_tokens=args.service_max_tokens,
+        parallel=args.parallel or settings.max_concurrency,
+    )
+    base = LlamaCppConfig(
+        model_path=args.model,
+        max_concurrency=1,
+        n_threads=default_n_threads(),
+        n_gpu_layers=args.gpu_layers,
+        kv_cache_type="f16",
+    )
+    space = search_space(
+        args.params,
+        cpus=os.cpu_count() or 4,
+        # The service's longest segment and the sample prompts must both fit.
+        min_ctx=max(min_ctx, max(len(p) for p in prompts) // 3 + args.max_tokens),
+        threads=args.threads,
+        n_batch=args.n_batch,
+        n_ctx=args.n_ctx,
+        kv_types=args.kv_types,
+    )
+    best, results = tune(
+        base,
+        space,
+        lambda config: measure(config, prompts, max_tokens=args.max_tokens, repeats=args.repeats),
+        min_gain=args.min_gain,
+        log=lambda line: print(line, file=sys.stderr),
+    )
+    report = build_report(base, best, results, args)
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+        fh.write("\n")
+    print(json.dumps(report["profile"], indent=2))
+    print(f"Wrote {args.out}; set LOCALLINGUA_TUNING_PROFILE={args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import replace
+from pathlib import Path
+
+from .translator.base import TranslationResult
+
+# Bump when the key layout or stored payload changes so stale rows are never reused.
+_KEY_VERSION = 1
+
+
+def normalize_cache_text(text: str) -> str:
+    # Surrounding whitespace never survives sanitize_translation, so it must not split keys.
+    # Inner whitespace and line breaks are preserved by the prompt and stay significant.
+    return unicodedata.normalize("NFC", (text or "").replace("\r\n", "\n")).strip()
+
+
+def translation_cache_key(
+    *,
+    fingerprint: str,
+    text: str,
+    source_lang: str,
+    target_lang: str,
+    options: dict,
+) -> str | None:
+    """
+    Build a stable key for a translation request, or None if the result must not be cached
+    (sampling without a fixed seed is intentionally non-deterministic).
+    """
+    temperature = float(options.get("temperature", 0.0))
+    seed = options.get("seed")
+    if temperature > 0.0 and seed is None:
+        return None
+
+    payload = [
+        _KEY_VERSION,
+        fingerprint,
+        normalize_cache_text(text),
+        source_lang,
+        target_lang,
+        options.get("mode"),
+        temperature,
+        float(options.get("top_p", 1.0)),
+        int(options.get("max_tokens", 512)),
+        seed,
+    ]
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _MemoryLRU:
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._items: OrderedDict[str, TranslationResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> TranslationResult | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key: str, value: TranslationResult) -> None:
+        if self._max_entries <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self._max_entries:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class _SqliteStore:
+    """
+    Disk tier shared by every worker process pointing at the same file.
+    WAL mode lets readers proceed while another process writes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = str(Path(path).expanduser())
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        # sqlite3 connections are bound to the thread that created them.
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT PRIMARY KEY,"
+            " translated_text TEXT NOT NULL,"
+            " detected_source_lang TEXT,"
+            " created_at REAL NOT NULL"
+            ")"
+        )
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> TranslationResult | None:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT translated_text, detected_source_lang FROM translations WHERE key = ?",
+                (key,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return TranslationResult(translated_text=row[0], detected_source_lang=row[1])
+
+    def put(self, key: str, value: TranslationResult) -> None:
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO translations"
+            " (key, translated_text, detected_source_lang, created_at) VALUES (?, ?, ?, ?)",
+            (key, value.translated_text, value.detected_source_lang, time.time()),
+        )
+        conn.commit()
+
+    def count(self) -> int:
+        return int(self._connect().execute("SELECT COUNT(*) FROM translations").fetchone()[0])
+
+
+class TranslationCache:
+    """
+    Two-tier result cache: a bounded in-process LRU backed by an optional SQLite file.
+    Disk hits are promoted into memory; writes go to both tiers.
+    """
+
+    def __init__(self, *, max_entries: int, path: str | None = None) -> None:
+        self._memory = _MemoryLRU(max_entries)
+        self._disk = _SqliteStore(path) if path else None
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    async def get(self, key: str) -> TranslationResult | None:
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory_hits += 1
+            return replace(result, cached=True)
+
+        if self._disk is not None:
+            try:
+                result = await asyncio.to_thread(self._disk.get, key)
+            except sqlite3.Error:
+                result = None
+            if result is not None:
+                self._disk_hits += 1
+                self._memory.put(key, result)
+                return replace(result, cached=True)
+
+        self._misses += 1
+        return None
+
+    async def put(self, key: str, result: TranslationResult) -> None:
+        stored = replace(result, cached=False)
+        self._memory.put(key, stored)
+        if self._disk is not None:
+            try:
+                await asyncio.to_thread(self._disk.put, key, stored)
+            except sqlite3.Error:
+                # The disk tier is best-effort; a locked or full database must not fail requests.
+                pass
+
+    def stats(self) -> dict:
+        hits = self._memory_hits + self._disk_hits
+        total = hits + self._misses
+        return {
+            "hits": hits,
+            "memory_hits": self._memory_hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "hit_rate": (hits / total) if total else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_enabled": self._disk is not None,
+        }
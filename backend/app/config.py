@@ -2,6 +2,9 @@ import os
 from dataclasses import dataclass
 from pathlib import Path
 
+from .translator.router import ModelSpec, load_model_specs
+from .tuning import TuningProfile, load_profile
+
 _DOTENV_LOADED = False
 
 
@@ -11,6 +14,44 @@ class Settings:
     model_name: str | None
     max_concurrency: int
     allow_fake_translator: bool
+    cache_size: int
+    cache_path: str | None
+    batch_size: int
+    batch_ctx: int
+    n_ctx: int
+    n_gpu_layers: int
+    segment_max_chars: int
+    workers: int
+    threads_per_worker: int
+    prefix_cache_size: int
+    prefix_cache_scope: str
+    prefix_state_path: str | None
+    eager_load: bool
+    warmup_prompts: int
+    smart_precheck: bool
+    smart_min_samples: int
+    smart_natural_rate: float
+    queue_size: int
+    request_timeout_ms: int
+    memory_path: str | None
+    memory_hint_similarity: float
+    tuning_profile: TuningProfile | None
+    model_specs: tuple[ModelSpec, ...]
+    model_memory_mb: int
+    speculative: str
+    draft_model_path: str | None
+    speculative_tokens: int
+    speculative_baseline_every: int
+    early_stop: bool
+    coalesce: bool
+    jobs_dir: str
+    document_max_mb: int
+    document_concurrency: int
+    jobs_batch: int
+    detector_cache_dir: str | None
+    live_debounce_ms: int
+    slow_log_size: int
+    slow_log_window_s: int
 
 
 def load_settings() -> Settings:
@@ -19,20 +60,150 @@ def load_settings() -> Settings:
     model_name = os.environ.get("LOCALLINGUA_MODEL_NAME") or None
     max_concurrency_raw = os.environ.get("LOCALLINGUA_MAX_CONCURRENCY", "1")
     allow_fake = os.environ.get("LOCALLINGUA_ALLOW_FAKE_TRANSLATOR", "0") == "1"
+    cache_path = os.environ.get("LOCALLINGUA_CACHE_PATH") or None
 
     try:
         max_concurrency = max(1, int(max_concurrency_raw))
     except ValueError:
         max_concurrency = 1
 
+    cache_size = _env_int("LOCALLINGUA_CACHE_SIZE", 1024, minimum=0)
+    batch_size = _env_int("LOCALLINGUA_BATCH_SIZE", 1, minimum=1)
+    batch_ctx = _env_int("LOCALLINGUA_BATCH_CTX", 2048, minimum=256)
+    tuning_path = os.environ.get("LOCALLINGUA_TUNING_PROFILE") or None
+    tuning_profile = load_profile(tuning_path) if tuning_path else None
+    # An explicit LOCALLINGUA_N_CTX still wins over the tuned context size.
+    n_ctx = _env_int(
+        "LOCALLINGUA_N_CTX",
+        (tuning_profile.n_ctx if tuning_profile else None) or 4096,
+        minimum=512,
+    )
+    # Layers offloaded to the GPU (-1 = all, 0 = CPU only), for the main and draft model alike.
+    profile_gpu_layers = tuning_profile.n_gpu_layers if tuning_profile else None
+    n_gpu_layers = _env_int(
+        "LOCALLINGUA_N_GPU_LAYERS",
+        -1 if profile_gpu_layers is None else profile_gpu_layers,
+        minimum=-1,
+    )
+    segment_max_chars = _env_int("LOCALLINGUA_SEGMENT_MAX_CHARS", 1000, minimum=0)
+    workers = _env_int("LOCALLINGUA_WORKERS", 0, minimum=0)
+    # 0 = split the visible cores evenly between workers.
+    threads_per_worker = _env_int("LOCALLINGUA_THREADS_PER_WORKER", 0, minimum=0)
+    if workers and not threads_per_worker:
+        threads_per_worker = max(1, (os.cpu_count() or 4) // workers)
+    prefix_cache_size = _env_int("LOCALLINGUA_PREFIX_CACHE_SIZE", 8, minimum=0)
+    prefix_cache_scope = os.environ.get("LOCALLINGUA_PREFIX_CACHE_SCOPE", "pair")
+    if prefix_cache_scope not in ("mode", "pair"):
+        prefix_cache_scope = "pair"
+    prefix_state_path = os.environ.get("LOCALLINGUA_PREFIX_STATE_PATH") or None
+    eager_load = os.environ.get("LOCALLINGUA_EAGER_LOAD", "0") == "1"
+    warmup_prompts = _env_int("LOCALLINGUA_WARMUP_PROMPTS", 2, minimum=0)
+    smart_precheck = os.environ.get("LOCALLINGUA_SMART_PRECHECK", "1") == "1"
+    smart_min_samples = _env_int("LOCALLINGUA_SMART_MIN_SAMPLES", 8, minimum=1)
+    # Percent of echoed literal passes above which smart mode starts with natural.
+    smart_natural_rate = min(100, _env_int("LOCALLINGUA_SMART_NATURAL_RATE", 50, minimum=1)) / 100
+    queue_size = _env_int("LOCALLINGUA_QUEUE_SIZE", 64, minimum=0)
+    request_timeout_ms = _env_int("LOCALLINGUA_REQUEST_TIMEOUT_MS", 120000, minimum=0)
+    memory_path = os.environ.get("LOCALLINGUA_MEMORY_PATH") or None
+    # Percent 3-gram similarity at which a stored segment is offered as a reference (0 = never).
+    memory_hint_similarity = (
+        min(100, _env_int("LOCALLINGUA_MEMORY_HINT_SIMILARITY", 60, minimum=0)) / 100
+    )
+    models_file = os.environ.get("LOCALLINGUA_MODELS_FILE") or None
+    model_specs = load_model_specs(models_file) if models_file else ()
+    # RAM the registered models may take together (0 = unlimited).
+    model_memory_mb = _env_int("LOCALLINGUA_MODEL_MEMORY_MB", 0, minimum=0)
+    speculative = os.environ.get("LOCALLINGUA_SPECULATIVE", "off")
+    draft_model_path = os.environ.get("LOCALLINGUA_DRAFT_MODEL_PATH") or None
+    if speculative not in ("off", "lookup", "draft") or (
+        speculative == "draft" and not draft_model_path
+    ):
+        speculative = "off"
+    speculative_tokens = _env_int("LOCALLINGUA_SPECULATIVE_TOKENS", 10, minimum=1)
+    # Every Nth generation decodes plainly to measure the speculative speedup (0 = never).
+    speculative_baseline_every = _env_int("LOCALLINGUA_SPECULATIVE_BASELINE_EVERY", 20, minimum=0)
+    early_stop = os.environ.get("LOCALLINGUA_EARLY_STOP", "1") == "1"
+    # Identical requests in flight at the same time share one generation.
+    coalesce = os.environ.get("LOCALLINGUA_COALESCE", "1") == "1"
+    # Job store and uploads; kept in the user's data dir so jobs survive a reboot.
+    jobs_dir = os.environ.get("LOCALLINGUA_JOBS_DIR") or os.path.join(
+        os.environ.get("XDG_DATA_HOME") or os.path.join(Path.home(), ".local", "share"),
+        "locallingua",
+        "jobs",
+    )
+    document_max_mb = _env_int("LOCALLINGUA_DOCUMENT_MAX_MB", 50, minimum=1)
+    # Segments of one document in flight at once.
+    document_concurrency = _env_int("LOCALLINGUA_DOCUMENT_CONCURRENCY", 4, minimum=1)
+    # Untranslated segments the job worker pulls from its store per refill.
+    jobs_batch = _env_int("LOCALLINGUA_JOBS_BATCH", 64, minimum=1)
+    # Where the language detector keeps its built n-gram tables ("off" rebuilds every start).
+    detector_cache_dir = os.environ.get("LOCALLINGUA_DETECTOR_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache"), "locallingua"
+    )
+    if detector_cache_dir == "off":
+        detector_cache_dir = None
+    # Pause in typing after which the live endpoint translates the changed sentences.
+    live_debounce_ms = _env_int("LOCALLINGUA_LIVE_DEBOUNCE_MS", 300, minimum=0)
+    # Slowest requests kept for /api/admin/slow-requests, and for how long (0 = off).
+    slow_log_size = _env_int("LOCALLINGUA_SLOW_LOG_SIZE", 20, minimum=0)
+    slow_log_window_s = _env_int("LOCALLINGUA_SLOW_LOG_WINDOW_S", 3600, minimum=1)
+
     return Settings(
         model_path=model_path,
         model_name=model_name,
         max_concurrency=max_concurrency,
         allow_fake_translator=allow_fake,
+        cache_size=cache_size,
+        cache_path=cache_path,
+        batch_size=batch_size,
+        batch_ctx=batch_ctx,
+        n_ctx=n_ctx,
+        n_gpu_layers=n_gpu_layers,
+        segment_max_chars=segment_max_chars,
+        workers=workers,
+        threads_per_worker=threads_per_worker,
+        prefix_cache_size=prefix_cache_size,
+        prefix_cache_scope=prefix_cache_scope,
+        prefix_state_path=prefix_state_path,
+        eager_load=eager_load,
+        warmup_prompts=warmup_prompts,
+        smart_precheck=smart_precheck,
+        smart_min_samples=smart_min_samples,
+        smart_natural_rate=smart_natural_rate,
+        queue_size=queue_size,
+        request_timeout_ms=request_timeout_ms,
+        memory_path=memory_path,
+        memory_hint_similarity=memory_hint_similarity,
+        tuning_profile=tuning_profile,
+        model_specs=model_specs,
+        model_memory_mb=model_memory_mb,
+        speculative=speculative,
+        draft_model_path=draft_model_path,
+        speculative_tokens=speculative_tokens,
+        speculative_baseline_every=speculative_baseline_every,
+        early_stop=early_stop,
+        coalesce=coalesce,
+        jobs_dir=jobs_dir,
+        document_max_mb=document_max_mb,
+        document_concurrency=document_concurrency,
+        jobs_batch=jobs_batch,
+        detector_cache_dir=detector_cache_dir,
+        live_debounce_ms=live_debounce_ms,
+        slow_log_size=slow_log_size,
+        slow_log_window_s=slow_log_window_s,
     )
 
 
+def _env_int(name: str, default: int, *, minimum: int) -> int:
+    raw = os.environ.get(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return max(minimum, int(raw))
+    except ValueError:
+        return default
+
+
 def _load_dotenv_once() -> None:
     global _DOTENV_LOADED
     if _DOTENV_LOADED:
@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import PurePath
+
+from .translator.segment import has_any_letter
+
+FORMATS = ("txt", "md", "srt", "json", "po")
+MEDIA_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "md": "text/markdown; charset=utf-8",
+    "srt": "application/x-subrip; charset=utf-8",
+    "json": "application/json",
+    "po": "text/x-gettext-translation; charset=utf-8",
+}
+_EXTENSIONS = {
+    ".txt": "txt",
+    ".text": "txt",
+    ".md": "md",
+    ".markdown": "md",
+    ".srt": "srt",
+    ".json": "json",
+    ".po": "po",
+    ".pot": "po",
+}
+
+# Paragraphs without blank lines are cut at a line boundary past this size, so one piece (and
+# the memory holding it) stays small however the file is laid out.
+MAX_PIECE_CHARS = 4000
+# Verbatim runs (JSON numbers, markup) are flushed in chunks of at most this many characters.
+_VERBATIM_CHUNK = 1 << 16
+_JSON_BRACKETS = {"{": "}", "[": "]"}
+
+_SURROUNDING_WS_RE = re.compile(r"(\s*)(.*?)(\s*)", re.S)
+# Markdown block prefixes kept verbatim in front of a translated line: headings, blockquotes,
+# bullet/numbered/task list items.
+_MD_PREFIX_RE = re.compile(r"^(\s*(?:>\s*)*(?:#{1,6}\s+|[-*+]\s+(?:\[[ xX]\]\s+)?|\d+[.)]\s+)?)")
+_MD_TABLE_RULE_RE = re.compile(r"^\s*\|?[\s:|-]+\|?\s*$")
+# Thematic breaks and setext heading underlines.
+_MD_RULE_RE = re.compile(r"^\s*([-*_=])(?:\s*\1){2,}\s*$")
+_PO_KEYWORD_RE = re.compile(r"^(msgctxt|msgid_plural|msgid|msgstr(?:\[(\d+)\])?)\s+(\".*\")\s*$")
+_PO_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\"}
+
+
+class DocumentError(ValueError):
+    """The uploaded file is not valid for its format."""
+
+
+@dataclass(frozen=True)
+class Piece:
+    text: str
+    # How a translation of `text` is written back: None copies `text` verbatim, "text" writes
+    # it as is, "json" and "po" as a string literal of that format.
+    encoding: str | None = None
+
+
+def detect_format(filename: str | None, requested: str | None = None) -> str | None:
+    if requested:
+        return requested if requested in FORMATS else None
+    if not filename:
+        return None
+    return _EXTENSIONS.get(PurePath(filename).suffix.lower())
+
+
+def split_document(lines: Iterable[str], fmt: str) -> Iterator[Piece]:
+    """
+    Split a document, read line by line (line endings included), into pieces such that
+    rendering every piece with its own text as the translation reproduces the input (PO
+    catalogs get their empty msgstr filled). Markup, keys, timings and other structure come
+    out as verbatim pieces.
+    """
+    splitters = {
+        "txt": _split_text,
+        "md": _split_markdown,
+        "srt": _split_srt,
+        "json": _split_json,
+        "po": _split_po,
+    }
+    try:
+        yield from splitters[fmt](lines)
+    except UnicodeDecodeError as exc:
+        raise DocumentError("The file is not valid UTF-8.") from exc
+
+
+def source_text(piece: Piece) -> str:
+    """What is sent to the translator for a translatable piece."""
+    return piece.text.strip()
+
+
+def render(piece: Piece, translation: str) -> str:
+    """Write a translated piece back, keeping the whitespace around the source text."""
+    if piece.encoding is None:
+        return piece.text
+    lead, _, trail = _SURROUNDING_WS_RE.fullmatch(piece.text).groups()
+    text = lead + translation.strip() + trail
+    if piece.encoding == "json":
+        return json.dumps(text, ensure_ascii=False)
+    if piece.encoding == "po":
+        return _po_quote(text)
+    return text
+
+
+def _translatable(text: str, encoding: str = "text") -> Piece:
+    return Piece(text, encoding if has_any_letter(text) else None)
+
+
+def _split_text(lines: Iterable[str]) -> Iterator[Piece]:
+    paragraph: list[str] = []
+    size = 0
+    for line in lines:
+        if not line.strip():
+            if paragraph:
+                yield _translatable("".join(paragraph))
+                paragraph, size = [], 0
+            yield Piece(line)
+            continue
+        paragraph.append(line)
+        size += len(line)
+        if size >= MAX_PIECE_CHARS:
+            yield _translatable("".join(paragraph))
+            paragraph, size = [], 0
+    if paragraph:
+        yield _translatable("".join(paragraph))
+
+
+def _split_markdown(lines: Iterable[str]) -> Iterator[Piece]:
+    paragraph: list[str] = []
+    size = 0
+    fence: str | None = None
+    front_matter = False
+    for number, line in enumerate(lines):
+        stripped = line.strip()
+        if number == 0 and stripped == "---":
+            front_matter = True
+            yield Piece(line)
+            continue
+        if front_matter:
+            front_matter = stripped not in ("---", "...")
+            yield Piece(line)
+            continue
+        if fence is not None:
+            if stripped.startswith(fence):
+                fence = None
+            yield Piece(line)
+            continue
+
+        prefix = _MD_PREFIX_RE.match(line).group(1)
+        verbatim = (
+            not stripped
+            or stripped.startswith("<")
+            or _MD_RULE_RE.match(line) is not None
+            # Indented code, unless it continues a paragraph or is a nested list item.
+            or (not paragraph and line.startswith(("    ", "\t")) and not prefix.strip())
+        )
+        block = verbatim or stripped.startswith(("```", "~~~", "|")) or prefix.strip() != ""
+        if not block:
+            paragraph.append(line)
+            size += len(line)
+            if size < MAX_PIECE_CHARS:
+                continue
+        if paragraph:
+            yield _translatable("".join(paragraph))
+            paragraph, size = [], 0
+        if not block:
+            continue
+
+        if stripped.startswith(("```", "~~~")):
+            fence = stripped[:3]
+            yield Piece(line)
+        elif verbatim:
+            # Blank lines, raw HTML, rules and indented code.
+            yield Piece(line)
+        elif stripped.startswith("|"):
+            if _MD_TABLE_RULE_RE.match(line):
+                yield Piece(line)
+            else:
+                for cell in re.split(r"(\|)", line):
+                    yield _translatable(cell) if cell != "|" else Piece(cell)
+        else:
+            yield Piece(prefix)
+            yield _translatable(line[len(prefix) :])
+    if paragraph:
+        yield _translatable("".join(paragraph))
+
+
+def _split_srt(lines: Iterable[str]) -> Iterator[Piece]:
+    cue: list[str] = []
+    expect = "index"
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            if cue:
+                yield _translatable("".join(cue))
+                cue = []
+            yield Piece(line)
+            expect = "index"
+        elif expect == "index" and stripped.isdigit():
+            yield Piece(line)
+            expect = "timing"
+        elif expect == "timing" and "-->" in stripped:
+            yield Piece(line)
+            expect = "text"
+        else:
+            cue.append(line)
+            expect = "text"
+    if cue:
+        yield _translatable("".join(cue))
+
+
+class _Chars:
+    """Character stream over lines with one character of push-back."""
+
+    def __init__(self, lines: Iterable[str]) -> None:
+        self._chars = (ch for line in lines for ch in line)
+        self._back: str | None = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self._back is not None:
+            ch, self._back = self._back, None
+            return ch
+        return next(self._chars)
+
+    def push(self, ch: str) -> None:
+        self._back = ch
+
+
+def _split_json(lines: Iterable[str]) -> Iterator[Piece]:
+    """
+    Stream through the document without parsing it as a whole: string values are translated,
+    object keys (strings followed by a colon) and everything else are copied verbatim.
+    Brackets are matched on the way, so a truncated document fails instead of being written
+    back as broken JSON.
+    """
+    chars = _Chars(lines)
+    verbatim: list[str] = []
+    size = 0
+    # Closers expected for the objects and arrays open at this point.
+    open_closers: list[str] = []
+    for ch in chars:
+        if ch != '"':
+            if ch in _JSON_BRACKETS:
+                open_closers.append(_JSON_BRACKETS[ch])
+            elif ch in "}]" and (not open_closers or open_closers.pop() != ch):
+                raise DocumentError(f"Unbalanced JSON: unexpected {ch!r}.")
+            verbatim.append(ch)
+            size += 1
+            if size >= _VERBATIM_CHUNK:
+                yield Piece("".join(verbatim))
+                verbatim, size = [], 0
+            continue
+        raw = _read_json_string(chars)
+        gap = []
+        is_key = False
+        for nxt in chars:
+            if nxt in " \t\r\n":
+                gap.append(nxt)
+                continue
+            is_key = nxt == ":"
+            chars.push(nxt)
+            break
+        try:
+            value = json.loads(raw)
+        except ValueError as exc:
+            raise DocumentError(f"Invalid JSON string literal: {raw[:40]}") from exc
+        if is_key or not has_any_letter(value):
+            verbatim.append(raw)
+        else:
+            if verbatim:
+                yield Piece("".join(verbatim))
+            verbatim, size = [], 0
+            yield Piece(value, "json")
+        verbatim.extend(gap)
+        size += len(raw) + len(gap)
+    if open_closers:
+        raise DocumentError(f"Truncated JSON: missing {''.join(reversed(open_closers))!r}.")
+    if verbatim:
+        yield Piece("".join(verbatim))
+
+
+def _read_json_string(chars: _Chars) -> str:
+    out = ['"']
+    escaped = False
+    for ch in chars:
+        out.append(ch)
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif ch == '"':
+            return "".join(out)
+    raise DocumentError("Unterminated JSON string.")
+
+
+def _split_po(lines: Iterable[str]) -> Iterator[Piece]:
+    entry: list[str] = []
+    for line in lines:
+        if line.strip():
+            entry.append(line)
+            continue
+        yield from _po_entry(entry)
+        entry = []
+        yield Piece(line)
+    yield from _po_entry(entry)
+
+
+def _po_entry(lines: list[str]) -> Iterator[Piece]:
+    """
+    Fill the empty msgstr of one catalog entry with the translated msgid (msgid_plural for
+    plural forms above 0). Headers, obsolete entries and translated entries stay as they are.
+    """
+    if not lines:
+        return
+    blocks: list[tuple[str | None, list[str]]] = []
+    for line in lines:
+        keyword = _PO_KEYWORD_RE.match(line)
+        if keyword:
+            blocks.append((keyword.group(1), [line]))
+        elif line.lstrip().startswith('"') and blocks and blocks[-1][0] is not None:
+            blocks[-1][1].append(line)
+        else:
+            blocks.append((None, [line]))
+
+    def _value(name: str) -> str | None:
+        for keyword, block in blocks:
+            if keyword == name:
+                return "".join(_po_unquote(_po_strings(line)) for line in block)
+        return None
+
+    msgid = _value("msgid")
+    msgstrs = [(k, b) for k, b in blocks if k is not None and k.startswith("msgstr")]
+    translated = any(_po_unquote(_po_strings(line)) for _, b in msgstrs for line in b)
+    if not msgid or translated or not has_any_letter(msgid):
+        yield Piece("".join(lines))
+        return
+
+    plural = _value("msgid_plural")
+    verbatim: list[str] = []
+    for keyword, block in blocks:
+        if keyword is None or not keyword.startswith("msgstr"):
+            verbatim.extend(block)
+            continue
+        index = _PO_KEYWORD_RE.match(block[0]).group(2)
+        source = plural if index not in (None, "0") and plural else msgid
+        ending = block[-1][len(block[-1].rstrip("\r\n")) :]
+        verbatim.append(f"{keyword} ")
+        yield Piece("".join(verbatim))
+        verbatim = [ending]
+        yield Piece(source, "po")
+    yield Piece("".join(verbatim))
+
+
+def _po_strings(line: str) -> str:
+    keyword = _PO_KEYWORD_RE.match(line)
+    return keyword.group(3) if keyword else line.strip()
+
+
+def _po_unquote(literal: str) -> str:
+    body = literal[1:-1] if len(literal) >= 2 else ""
+    return re.sub(r"\\(.)", lambda m: _PO_ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def _po_quote(text: str) -> str:
+    escaped = (
+        text.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+        .replace("\t", "\\t")
+        .replace("\r", "\\r")
+    )
+    return f'"{escaped}"'
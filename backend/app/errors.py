@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass(frozen=True)
@@ -8,6 +8,8 @@ class ApiError(Exception):
     code: str
     message: str
     status_code: int
+    # Extra response headers, e.g. Retry-After on 429/503.
+    headers: dict[str, str] | None = field(default=None, compare=False)
 
 
 def as_error_payload(detail: object) -> dict:
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from .documents import Piece, render
+
+# Jobs the worker still drains; the others are finished or stopped.
+ACTIVE_STATUSES = ("queued", "running")
+# Pieces inserted per transaction while a document is split, so the worker's checkpoints
+# are not blocked behind one long write.
+_INSERT_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class DocumentJob:
+    id: str
+    filename: str | None
+    format: str
+    source_lang: str
+    target_lang: str
+    options: dict
+    status: str = "queued"
+    segments_total: int = 0
+    segments_done: int = 0
+    # Segments the model returned nothing for; their source text is kept in the output.
+    segments_untranslated: int = 0
+    detected_source_lang: str | None = None
+    error: dict | None = None
+    created_at: float = 0.0
+    finished_at: float | None = None
+
+
+@dataclass(frozen=True)
+class PendingSegment:
+    job_id: str
+    index: int
+    piece: Piece
+    source_lang: str
+    target_lang: str
+    options: dict
+
+
+_JOB_COLUMNS = (
+    "id, filename, format, source_lang, target_lang, options, status, segments_total,"
+    " segments_done, segments_untranslated, detected_source_lang, error, created_at, finished_at"
+)
+
+
+class JobStore:
+    """
+    SQLite store of document jobs and their pieces.
+
+    Every piece of a document is a row in document order; a translatable piece gets its
+    translation written as soon as it is done, so a restarted worker only picks up the pieces
+    still missing one. The output is rendered straight from the rows.
+    """
+
+    def __init__(self, path: str) -> None:
+        # A file, not ":memory:": output streams open their own connection to it.
+        self._path = str(Path(path).expanduser())
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        # One connection per process, serialized; output streams read through their own.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " filename TEXT,"
+            " format TEXT NOT NULL,"
+            " source_lang TEXT NOT NULL,"
+            " target_lang TEXT NOT NULL,"
+            " options TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " segments_total INTEGER NOT NULL,"
+            " segments_done INTEGER NOT NULL DEFAULT 0,"
+            " segments_untranslated INTEGER NOT NULL DEFAULT 0,"
+            " detected_source_lang TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " finished_at REAL"
+            ");"
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);"
+            "CREATE TABLE IF NOT EXISTS pieces ("
+            " job_id TEXT NOT NULL,"
+            " idx INTEGER NOT NULL,"
+            " text TEXT NOT NULL,"
+            " encoding TEXT,"
+            " translation TEXT,"
+            " PRIMARY KEY (job_id, idx)"
+            ") WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS pieces_pending ON pieces (job_id, idx)"
+            " WHERE encoding IS NOT NULL AND translation IS NULL;"
+        )
+        # Pieces of an upload that was being split when the process stopped.
+        self._conn.execute("DELETE FROM pieces WHERE job_id NOT IN (SELECT id FROM jobs)")
+        self._conn.commit()
+
+    def add_pieces(self, job_id: str, pieces: Iterable[Piece]) -> int:
+        """Store a document's pieces ahead of its job row; returns the translatable count."""
+        segments = 0
+        rows: list[tuple] = []
+        for index, piece in enumerate(pieces):
+            rows.append((job_id, index, piece.text, piece.encoding))
+            segments += piece.encoding is not None
+            if len(rows) >= _INSERT_CHUNK:
+                self._insert_pieces(rows)
+                rows = []
+        if rows:
+            self._insert_pieces(rows)
+        return segments
+
+    def _insert_pieces(self, rows: list[tuple]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO pieces (job_id, idx, text, encoding) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def add_job(self, job: DocumentJob) -> None:
+        """Insert the job row; from here on the worker sees its pieces."""
+        row = _job_row(job)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO jobs ({_JOB_COLUMNS}) VALUES ({', '.join('?' * len(row))})", row
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> DocumentJob | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return _job_from_row(row) if row else None
+
+    def list(self, *, status: str | None = None, limit: int = 100) -> list[DocumentJob]:
+        """Most recent jobs first."""
+        query = f"SELECT {_JOB_COLUMNS} FROM jobs"
+        params: tuple = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._conn.execute(
+                query + " ORDER BY created_at DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [_job_from_row(row) for row in rows]
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+            return {status: count for status, count in rows}
+
+    def pending(self, limit: int) -> list[PendingSegment]:
+        """Untranslated segments of active jobs, oldest job first, in document order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.job_id, p.idx, p.text, p.encoding, j.source_lang, j.target_lang,"
+                " j.options"
+                " FROM jobs j JOIN pieces p ON p.job_id = j.id"
+                " WHERE j.status IN (?, ?) AND p.encoding IS NOT NULL AND p.translation IS NULL"
+                " ORDER BY j.created_at, p.idx LIMIT ?",
+                (*ACTIVE_STATUSES, limit),
+            ).fetchall()
+        return [
+            PendingSegment(
+                job_id, index, Piece(text, encoding), source, target, json.loads(options)
+            )
+            for job_id, index, text, encoding, source, target, options in rows
+        ]
+
+    def finish_segment(
+        self,
+        job_id: str,
+        index: int,
+        translation: str,
+        *,
+        untranslated: bool = False,
+    ) -> None:
+        """Checkpoint one translated segment; the job completes with its last segment."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE pieces SET translation = ?"
+                " WHERE job_id = ? AND idx = ? AND translation IS NULL",
+                (translation, job_id, index),
+            )
+            if cursor.rowcount:
+                self._conn.execute(
+                    "UPDATE jobs SET"
+                    " segments_done = segments_done + 1,"
+                    " segments_untranslated = segments_untranslated + ?,"
+                    " status = CASE WHEN status NOT IN (?, ?) THEN status"
+                    "  WHEN segments_done + 1 >= segments_total THEN 'completed'"
+                    "  ELSE 'running' END,"
+                    " finished_at = CASE WHEN status IN (?, ?)"
+                    "  AND segments_done + 1 >= segments_total THEN ? ELSE finished_at END"
+                    " WHERE id = ?",
+                    (int(untranslated), *ACTIVE_STATUSES, *ACTIVE_STATUSES, now, job_id),
+                )
+            self._conn.commit()
+
+    def fail(self, job_id: str, error: dict) -> None:
+        self._set_status(job_id, "failed", ACTIVE_STATUSES, error=error)
+
+    def cancel(self, job_id: str) -> bool:
+        return self._set_status(job_id, "cancelled", ACTIVE_STATUSES)
+
+    def retry(self, job_id: str) -> bool:
+        """Re-queue a failed or cancelled job; segments already translated are kept."""
+        return self._set_status(job_id, "queued", ("failed", "cancelled"))
+
+    def _set_status(
+        self,
+        job_id: str,
+        status: str,
+        allowed: tuple[str, ...],
+        *,
+        error: dict | None = None,
+    ) -> bool:
+        finished_at = None if status in ACTIVE_STATUSES else time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, finished_at = ?"
+                f" WHERE id = ? AND status IN ({', '.join('?' * len(allowed))})",
+                (status, json.dumps(error) if error else None, finished_at, job_id, *allowed),
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def delete(self, job_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self._conn.execute("DELETE FROM pieces WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def iter_output(self, job_id: str) -> Iterator[str]:
+        """Render the translated document piece by piece through a separate connection."""
+        conn = sqlite3.connect(self._path, timeout=5.0)
+        try:
+            rows = conn.execute(
+                "SELECT text, encoding, translation FROM pieces WHERE job_id = ? ORDER BY idx",
+                (job_id,),
+            )
+            for text, encoding, translation in rows:
+                yield render(Piece(text, encoding), translation or "")
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _job_row(job: DocumentJob) -> tuple:
+    return (
+        job.id,
+        job.filename,
+        job.format,
+        job.source_lang,
+        job.target_lang,
+        json.dumps(job.options),
+        job.status,
+        job.segments_total,
+        job.segments_done,
+        job.segments_untranslated,
+        job.detected_source_lang,
+        json.dumps(job.error) if job.error else None,
+        job.created_at,
+        job.finished_at,
+    )
+
+
+def _job_from_row(row: tuple) -> DocumentJob:
+    (
+        job_id,
+        filename,
+        fmt,
+        source_lang,
+        target_lang,
+        options,
+        status,
+        total,
+        done,
+        untranslated,
+        detected,
+        error,
+        created_at,
+        finished_at,
+    ) = row
+    return DocumentJob(
+        id=job_id,
+        filename=filename,
+        format=fmt,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        options=json.loads(options),
+        status=status,
+        segments_total=total,
+        segments_done=done,
+        segments_untranslated=untranslated,
+        detected_source_lang=detected,
+        error=json.loads(error) if error else None,
+        created_at=created_at,
+        finished_at=finished_at,
+    )
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from pathlib import Path
+
+from .documents import DocumentError, source_text, split_document
+from .job_store import DocumentJob, JobStore, PendingSegment
+from .languages import is_supported
+from .translator.lang_detect import detect_language_async
+
+# translate(text, source_lang=..., target_lang=..., options=...) -> translated text
+TranslateFn = Callable[..., Awaitable[str]]
+
+# Characters of translatable text sampled to detect the language of an "auto" document.
+_DETECT_SAMPLE_CHARS = 2000
+
+
+class DocumentTooLarge(DocumentError):
+    pass
+
+
+class DocumentJobs:
+    """
+    Durable background translation of uploaded documents.
+
+    Uploads are streamed to disk, split and stored in a JobStore under `root`. A single worker
+    pulls the untranslated segments of every active job from the store in batches of
+    `batch_size`, keeps `concurrency` of them in flight across job boundaries so the
+    translator never idles between documents, and checkpoints each translation as it lands.
+    Jobs left queued or running by a previous process resume on `start()` without redoing
+    finished segments.
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike,
+        *,
+        translate: TranslateFn,
+        concurrency: int = 4,
+        batch_size: int = 64,
+        max_bytes: int = 50 * 1024 * 1024,
+    ) -> None:
+        self._root = Path(root)
+        self._store = JobStore(os.fspath(self._root / "jobs.sqlite3"))
+        self._translate = translate
+        self._concurrency = max(1, concurrency)
+        self._batch_size = max(1, batch_size)
+        self._max_bytes = max_bytes
+        # Jobs cancelled, failed or deleted while some of their segments were already pulled.
+        self._stopped: set[str] = set()
+        self._queued: deque[PendingSegment] = deque()
+        self._running: set[asyncio.Task] = set()
+        self._wake = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Start the worker, resuming any unfinished jobs in the store."""
+        self._wake.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+
+    async def create(
+        self,
+        body: AsyncIterator[bytes],
+        *,
+        filename: str | None,
+        fmt: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> DocumentJob:
+        """Store the uploaded body, split it and queue the job. Raises DocumentError."""
+        job_id = uuid.uuid4().hex
+        upload = self._root / f"{job_id}.upload"
+        self._root.mkdir(parents=True, exist_ok=True)
+        try:
+            size = 0
+            with open(upload, "wb") as fh:
+                async for chunk in body:
+                    size += len(chunk)
+                    if size > self._max_bytes:
+                        raise DocumentTooLarge(
+                            f"The document exceeds {self._max_bytes // (1024 * 1024)} MB."
+                        )
+                    fh.write(chunk)
+            segments, sample = await asyncio.to_thread(self._store_pieces, job_id, upload, fmt)
+            detected = None
+            if source_lang == "auto" and sample:
+                detected = await _detect_source(sample)
+            now = time.time()
+            job = DocumentJob(
+                id=job_id,
+                filename=filename,
+                format=fmt,
+                source_lang=detected or source_lang,
+                target_lang=target_lang,
+                options=options,
+                status="queued" if segments else "completed",
+                segments_total=segments,
+                detected_source_lang=detected,
+                created_at=now,
+                finished_at=None if segments else now,
+            )
+            await asyncio.to_thread(self._store.add_job, job)
+        except BaseException:
+            self._store.delete(job_id)
+            raise
+        finally:
+            upload.unlink(missing_ok=True)
+        await self.start()
+        return job
+
+    async def get(self, job_id: str) -> DocumentJob | None:
+        return await asyncio.to_thread(self._store.get, job_id)
+
+    async def list(self, *, status: str | None = None, limit: int = 100) -> list[DocumentJob]:
+        return await asyncio.to_thread(self._store.list, status=status, limit=limit)
+
+    async def cancel(self, job_id: str) -> bool:
+        """Stop a queued or running job; its finished segments are kept for a retry."""
+        cancelled = await asyncio.to_thread(self._store.cancel, job_id)
+        if cancelled:
+            self._stopped.add(job_id)
+        return cancelled
+
+    async def retry(self, job_id: str) -> bool:
+        """Re-queue a failed or cancelled job; only its unfinished segments are translated."""
+        retried = await asyncio.to_thread(self._store.retry, job_id)
+        if retried:
+            self._stopped.discard(job_id)
+            await self.start()
+        return retried
+
+    async def delete(self, job_id: str) -> bool:
+        self._stopped.add(job_id)
+        return await asyncio.to_thread(self._store.delete, job_id)
+
+    def output(self, job_id: str) -> Iterator[str]:
+        """The translated document in order; iterate from a thread, it reads the store."""
+        return self._store.iter_output(job_id)
+
+    def stats(self) -> dict:
+        return {
+            "jobs": self._store.counts(),
+            "pending": len(self._queued),
+            "in_flight": len(self._running),
+        }
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._worker
+            self._worker = None
+        self._store.close()
+
+    def _store_pieces(self, job_id: str, upload: Path, fmt: str) -> tuple[int, str]:
+        """Split the upload into the store; returns the segment count and a detection sample."""
+        sample: list[str] = []
+        sampled = 0
+
+        def _pieces(lines):
+            nonlocal sampled
+            for piece in split_document(lines, fmt):
+                if piece.encoding is not None and sampled < _DETECT_SAMPLE_CHARS:
+                    sample.append(source_text(piece))
+                    sampled += len(sample[-1])
+                yield piece
+
+        with open(upload, encoding="utf-8-sig", newline="") as src:
+            segments = self._store.add_pieces(job_id, _pieces(src))
+        return segments, "\n".join(sample)[:_DETECT_SAMPLE_CHARS]
+
+    async def _drain(self) -> None:
+        # Segments pulled from the store and not yet checkpointed, so a refill taken while
+        # they are in flight does not hand them out twice.
+        claimed: set[tuple[str, int]] = set()
+        exhausted = False
+        try:
+            while True:
+                if self._wake.is_set():
+                    self._wake.clear()
+                    exhausted = False
+                if not self._queued and not exhausted:
+                    batch = await asyncio.to_thread(
+                        self._store.pending, self._batch_size + len(claimed)
+                    )
+                    fresh = [s for s in batch if (s.job_id, s.index) not in claimed]
+                    self._queued.extend(fresh)
+                    claimed.update((s.job_id, s.index) for s in fresh)
+                    exhausted = not fresh
+                while self._queued and len(self._running) < self._concurrency:
+                    segment = self._queued.popleft()
+                    if segment.job_id in self._stopped:
+                        claimed.discard((segment.job_id, segment.index))
+                        continue
+                    self._running.add(asyncio.create_task(self._run_segment(segment)))
+                if not self._queued and not exhausted and len(self._running) < self._concurrency:
+                    # Everything pulled belonged to stopped jobs; pull again.
+                    continue
+
+                woken = asyncio.ensure_future(self._wake.wait())
+                try:
+                    done, _ = await asyncio.wait(
+                        {*self._running, woken}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    woken.cancel()
+                for task in done - {woken}:
+                    self._running.discard(task)
+                    segment = task.result()
+                    claimed.discard((segment.job_id, segment.index))
+        finally:
+            # Unfinished segments stay untranslated in the store and resume on the next start.
+            for task in self._running:
+                task.cancel()
+            self._running.clear()
+            self._queued.clear()
+
+    async def _run_segment(self, segment: PendingSegment) -> PendingSegment:
+        text = source_text(segment.piece)
+        try:
+            translated = await self._translate(
+                text,
+                source_lang=segment.source_lang,
+                target_lang=segment.target_lang,
+                options=segment.options,
+            )
+            untranslated = not translated.strip()
+            await asyncio.to_thread(
+                self._store.finish_segment,
+                segment.job_id,
+                segment.index,
+                text if untranslated else translated,
+                untranslated=untranslated,
+            )
+        except Exception as exc:
+            self._stopped.add(segment.job_id)
+            error = {
+                "code": getattr(exc, "code", "TRANSLATION_FAILED"),
+                "message": getattr(exc, "message", None) or "Translation failed.",
+            }
+            await asyncio.to_thread(self._store.fail, segment.job_id, error)
+        return segment
+
+
+async def _detect_source(sample: str) -> str | None:
+    detection = await detect_language_async(sample)
+    if detection.code and is_supported(detection.code) and (detection.confidence or 0) >= 0.7:
+        return detection.code
+    return None
@@ -38,13 +38,14 @@ LANGUAGES: list[Language] = [
 ]
 
 
+# Built once; both lookups run on every request.
+_NAMES: dict[str, str] = {lang.code: lang.name for lang in LANGUAGES}
+
+
 def is_supported(code: str) -> bool:
-    return any(lang.code == code for lang in LANGUAGES)
+    return code in _NAMES
 
 
 def language_name(code: str) -> str:
-    for lang in LANGUAGES:
-        if lang.code == code:
-            return lang.name
-    return code
+    return _NAMES.get(code, code)
 
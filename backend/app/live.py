@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from .errors import ApiError
+from .translator.segment import split_segments
+
+# translate(text, source_lang=..., target_lang=..., options=...) -> translated text
+TranslateFn = Callable[..., Awaitable[str]]
+# resolve_source(text, source_lang) -> the language segments are translated from
+ResolveFn = Callable[[str, str], Awaitable[str]]
+SendFn = Callable[[dict], Awaitable[None]]
+
+MAX_TEXT_CHARS = 100_000
+# Continuous typing still gets an update once this many debounce periods have passed.
+_MAX_DEBOUNCE_PERIODS = 4
+
+
+@dataclass(frozen=True)
+class LiveTarget:
+    source_lang: str
+    target_lang: str
+    options: dict
+
+
+class LiveSession:
+    """
+    Server side of one "translate as you type" connection.
+
+    The client sends the whole text or edits to it; once edits pause for `debounce_ms`, the
+    text is split into sentences and only sentences without a translation yet reach the
+    model, so an edit costs about one sentence of work whatever the document's length.
+    Finished sentences are remembered per (source language, sentence); a sentence that is no
+    longer in the text has its in-flight translation cancelled. Everything goes through one
+    task (`run`), which also pushes each translated sentence as it lands.
+
+    Messages sent: `segments` (the layout of a revision: every segment with its translation
+    so far), `segment` (one sentence translated), `error` (one sentence failed) and `done`
+    (every sentence of the revision settled).
+    """
+
+    def __init__(
+        self,
+        *,
+        translate: TranslateFn,
+        resolve_source: ResolveFn,
+        send: SendFn,
+        debounce_ms: int = 300,
+        max_chars: int = 1000,
+        memo_size: int = 2048,
+        on_sentence: Callable[[str], None] | None = None,
+    ) -> None:
+        self._translate = translate
+        self._resolve_source = resolve_source
+        self._send = send
+        # Called with "translated", "reused" or "cancelled" for every sentence handled.
+        self._on_sentence = on_sentence or (lambda _outcome: None)
+        self._debounce = debounce_ms / 1000
+        self._max_chars = max_chars
+        self._memo_size = memo_size
+        self._target: LiveTarget | None = None
+        self._text = ""
+        self._rev = 0
+        self._changed = asyncio.Event()
+        # (source language, sentence) -> translation, least recently used first.
+        self._memo: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._inflight: dict[tuple[str, str], asyncio.Task[str]] = {}
+        # The applied revision: its number, segments, each segment's key (None if copied
+        # verbatim) and the translations it still waits for.
+        self._applied_rev = 0
+        self._texts: list[str] = []
+        self._keys: list[tuple[str, str] | None] = []
+        self._awaited: dict[tuple[str, str], asyncio.Task[str]] = {}
+        self._failed = 0
+
+    def configure(self, target: LiveTarget) -> None:
+        """Set the languages and options; a change drops every translation made so far."""
+        if target == self._target:
+            return
+        self._target = target
+        self._memo.clear()
+        self._awaited = {}
+        for key in list(self._inflight):
+            self._cancel(key)
+        self._touch()
+
+    def set_text(self, text: str, *, rev: int | None = None) -> None:
+        if len(text) > MAX_TEXT_CHARS:
+            raise ApiError(
+                "TEXT_TOO_LONG", f"Live text is limited to {MAX_TEXT_CHARS} characters.", 413
+            )
+        self._text = text
+        self._touch(rev)
+
+    def edit(self, start: int, end: int, text: str, *, rev: int | None = None) -> None:
+        """Replace `[start, end)` of the current text with `text`."""
+        if not 0 <= start <= end <= len(self._text):
+            raise ApiError("INVALID_EDIT", "Edit range is outside the current text.", 400)
+        self.set_text(self._text[:start] + text + self._text[end:], rev=rev)
+
+    def _touch(self, rev: int | None = None) -> None:
+        self._rev = self._rev + 1 if rev is None else rev
+        self._changed.set()
+
+    async def run(self) -> None:
+        """Debounce edits, apply them and push finished sentences until cancelled."""
+        loop = asyncio.get_running_loop()
+        due: float | None = None
+        first_edit: float | None = None
+        while True:
+            changed = asyncio.ensure_future(self._changed.wait())
+            timeout = None if due is None else max(0.0, due - loop.time())
+            try:
+                await asyncio.wait(
+                    {changed, *self._awaited.values()},
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+            finally:
+                changed.cancel()
+            if self._changed.is_set():
+                # Trailing debounce, capped so continuous typing still sees updates.
+                self._changed.clear()
+                now = loop.time()
+                first_edit = now if first_edit is None else first_edit
+                due = min(now + self._debounce, first_edit + self._debounce * _MAX_DEBOUNCE_PERIODS)
+            if due is not None and loop.time() >= due:
+                due = first_edit = None
+                await self._apply()
+            await self._publish_finished()
+
+    async def close(self) -> None:
+        for key in list(self._inflight):
+            self._cancel(key)
+
+    async def _apply(self) -> None:
+        target, text, rev = self._target, self._text, self._rev
+        if target is None:
+            # Text sent before the languages; it is applied once they arrive.
+            return
+        source = target.source_lang
+        if text.strip():
+            source = await self._resolve_source(text, target.source_lang)
+        segments = split_segments(text, max_chars=self._max_chars, per_sentence=True)
+        keys = [(source, s.text) if s.translatable else None for s in segments]
+        # In document order, so the first sentences are queued first.
+        wanted = dict.fromkeys(key for key in keys if key is not None)
+
+        # Sentences edited away: their translations are of no use any more.
+        for key in list(self._inflight):
+            if key not in wanted:
+                self._cancel(key)
+        awaited: dict[tuple[str, str], asyncio.Task[str]] = {}
+        for key in wanted:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self._on_sentence("reused")
+            elif key in self._inflight:
+                awaited[key] = self._inflight[key]
+            else:
+                awaited[key] = self._start(key, target)
+
+        self._applied_rev, self._keys, self._awaited, self._failed = rev, keys, awaited, 0
+        self._texts = [segment.text for segment in segments]
+        await self._send(
+            {
+                "type": "segments",
+                "rev": rev,
+                "source_lang": source,
+                "segments": [
+                    {
+                        "text": segment.text,
+                        "translated_text": segment.text if key is None else self._memo.get(key),
+                    }
+                    for segment, key in zip(segments, keys, strict=True)
+                ],
+                "pending": len(awaited),
+            }
+        )
+        if not awaited:
+            # Nothing left to translate (an undo, a deletion, an empty text): settled already.
+            await self._send_done()
+
+    def _start(self, key: tuple[str, str], target: LiveTarget) -> asyncio.Task[str]:
+        source, sentence = key
+        task = asyncio.ensure_future(
+            self._translate(
+                sentence,
+                source_lang=source,
+                target_lang=target.target_lang,
+                options=target.options,
+            )
+        )
+        self._inflight[key] = task
+        self._on_sentence("translated")
+
+        def _finished(_: asyncio.Task[str]) -> None:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+            if task.cancelled() or task.exception() is not None:
+                return
+            # Kept even if the revision moved on: undoing an edit brings the sentence back.
+            self._memo[key] = task.result()
+            while len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+
+        task.add_done_callback(_finished)
+        return task
+
+    def _cancel(self, key: tuple[str, str]) -> None:
+        task = self._inflight.pop(key)
+        if not task.done():
+            task.cancel()
+            self._on_sentence("cancelled")
+
+    async def _publish_finished(self) -> None:
+        finished = [key for key, task in self._awaited.items() if task.done()]
+        if not finished:
+            return
+        for key in finished:
+            task = self._awaited.pop(key)
+            indexes = [i for i, k in enumerate(self._keys) if k == key]
+            if task.cancelled():
+                continue
+            exc = task.exception()
+            if exc is not None:
+                self._failed += 1
+                await self._send(
+                    {
+                        "type": "error",
+                        "rev": self._applied_rev,
+                        "indexes": indexes,
+                        "error": {
+                            "code": getattr(exc, "code", "TRANSLATION_FAILED"),
+                            "message": getattr(exc, "message", None) or "Translation failed.",
+                        },
+                    }
+                )
+                continue
+            for index in indexes:
+                await self._send(
+                    {
+                        "type": "segment",
+                        "rev": self._applied_rev,
+                        "index": index,
+                        "translated_text": task.result(),
+                    }
+                )
+        if not self._awaited:
+            await self._send_done()
+
+    async def _send_done(self) -> None:
+        await self._send(
+            {
+                "type": "done",
+                "rev": self._applied_rev,
+                "translated_text": self._joined(),
+                "failed": self._failed,
+            }
+        )
+
+    def _joined(self) -> str:
+        # Sentences that failed keep their source text.
+        return "".join(
+            text if key is None else self._memo.get(key, text)
+            for text, key in zip(self._texts, self._keys, strict=True)
+        )
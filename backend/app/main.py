@@ -1,20 +1,69 @@
+import asyncio
+import contextlib
+import json
+import os
 import time
+from dataclasses import asdict, replace
+from functools import partial
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import Depends, FastAPI, Request
+from fastapi import Depends, FastAPI, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
 
+from . import IMPORT_STARTED
+from .admission import AdmissionConfig, AdmissionController, RequestContext, estimate_cost
+from .cache import TranslationCache, translation_cache_key
 from .config import Settings, load_settings
+from .documents import MEDIA_TYPES, DocumentError, detect_format
 from .errors import ApiError, as_error_payload
+from .job_store import DocumentJob
+from .jobs import DocumentJobs, DocumentTooLarge
 from .languages import LANGUAGES, is_supported
-from .models import HealthResponse, LanguagesResponse, TranslateRequest, TranslateResponse
-from .translator.base import Translator
+from .live import LiveSession, LiveTarget
+from .metrics import RequestTracker, ServiceMetrics
+from .models import (
+    DocumentJobResponse,
+    HealthResponse,
+    JobListResponse,
+    JobStatus,
+    LanguagesResponse,
+    LiveConfigMessage,
+    LiveEditMessage,
+    LivenessResponse,
+    LiveTextMessage,
+    ReadinessResponse,
+    SlowRequestsResponse,
+    StatsResponse,
+    TimingBreakdown,
+    TranslateBatchRequest,
+    TranslateBatchResponse,
+    TranslateMultiRequest,
+    TranslateMultiResponse,
+    TranslateOptions,
+    TranslateRequest,
+    TranslateResponse,
+)
+from .readiness import Readiness, prepare_translator
+from .singleflight import SingleFlight
+from .smart import SmartModePlanner, SmartPlannerConfig
+from .startup import StartupReport
+from .timing import RequestTiming, SlowRequest, SlowRequestLog
+from .translator.base import TranslationResult, Translator, unwrap_translator
 from .translator.fake import FakeTranslator
-from .translator.lang_detect import detect_language
-from .translator.llama_cpp import LlamaCppConfig, LlamaCppTranslator
+from .translator.lang_detect import detect_language_async, preload_detector
+from .translator.llama_cpp import LlamaCppConfig, LlamaCppTranslator, preimport_llama_cpp
+from .translator.memory import MemoryTranslator, TranslationMemory
+from .translator.router import ModelSpec, RoutingTranslator
+from .translator.segment import SegmentingTranslator, has_any_letter
+from .translator.worker_pool import WorkerPoolConfig, WorkerPoolTranslator
+from .tuning import apply_profile
+
+# Characters at the start of a live session's text its source language is detected from.
+_LIVE_DETECT_CHARS = 2000
 
 
 def _normalize_for_compare(text: str) -> str:
@@ -25,12 +74,104 @@ def _is_passthrough(*, source_text: str, translated_text: str) -> bool:
     return _normalize_for_compare(source_text) == _normalize_for_compare(translated_text)
 
 
-def _has_any_letter(text: str) -> bool:
-    return any(ch.isalpha() for ch in (text or ""))
+def _natural_retry_eligible(*, text: str, effective_source_lang: str, target_lang: str) -> bool:
+    """Whether an echoed literal translation should be retried in natural mode."""
+    return has_any_letter(text) and not (
+        effective_source_lang != "auto" and target_lang == effective_source_lang
+    )
+
+
+def _translation_error(exc: Exception) -> ApiError | None:
+    """Map known translator failures onto API errors; None means "not ours, re-raise"."""
+    if isinstance(exc, FileNotFoundError):
+        return ApiError(
+            "MODEL_NOT_FOUND",
+            "The configured model file was not found. Check LOCALLINGUA_MODEL_PATH.",
+            503,
+        )
+    if isinstance(exc, RuntimeError) and str(exc) == "LLAMA_CPP_NOT_INSTALLED":
+        return ApiError(
+            "LLAMA_CPP_NOT_INSTALLED",
+            "llama-cpp-python is not installed. Install backend deps with the llama extra.",
+            503,
+        )
+    if isinstance(exc, RuntimeError) and str(exc) == "DRAFT_MODEL_INCOMPATIBLE":
+        return ApiError(
+            "DRAFT_MODEL_INCOMPATIBLE",
+            "The draft model's vocabulary differs from the main model's. Check "
+            "LOCALLINGUA_DRAFT_MODEL_PATH.",
+            503,
+        )
+    if isinstance(exc, RuntimeError) and str(exc) == "WORKER_CRASHED":
+        return ApiError(
+            "WORKER_CRASHED",
+            "The inference worker handling this request crashed; it is being restarted.",
+            503,
+        )
+    return None
+
+
+def _empty_output_error() -> ApiError:
+    return ApiError(
+        "MODEL_EMPTY_OUTPUT",
+        "The model returned an empty translation. Try a different text or model "
+        "quantization.",
+        503,
+    )
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    # The body has already been read, so the next ASGI message is the disconnect.
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _job_response(job: DocumentJob) -> DocumentJobResponse:
+    return DocumentJobResponse(
+        id=job.id,
+        status=job.status,
+        format=job.format,
+        filename=job.filename,
+        source_lang=job.source_lang,
+        target_lang=job.target_lang,
+        detected_source_lang=job.detected_source_lang,
+        segments_total=job.segments_total,
+        segments_done=job.segments_done,
+        segments_untranslated=job.segments_untranslated,
+        progress=(job.segments_done / job.segments_total) if job.segments_total else 1.0,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+    )
+
+
+def _output_filename(job: DocumentJob) -> str:
+    name = Path(job.filename or job.id)
+    return f"{name.stem}.{job.target_lang}{name.suffix or '.' + job.format}"
+
+
+def _encode_chunks(pieces, chunk_size: int = 1 << 16):
+    buffered: list[str] = []
+    size = 0
+    for piece in pieces:
+        buffered.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buffered).encode("utf-8")
+            buffered, size = [], 0
+    if buffered:
+        yield "".join(buffered).encode("utf-8")
 
 
 def create_app() -> FastAPI:
     app = FastAPI(title="LocalLingua API", version="0.1.0")
+    app.state.startup = StartupReport.since_import(IMPORT_STARTED, _IMPORTED)
 
     app.add_middleware(
         CORSMiddleware,
@@ -45,6 +186,7 @@ def create_app() -> FastAPI:
         return JSONResponse(
             status_code=exc.status_code,
             content={"error": {"code": exc.code, "message": exc.message}},
+            headers=exc.headers,
         )
 
     @app.exception_handler(RequestValidationError)
@@ -69,9 +211,58 @@ def create_app() -> FastAPI:
 
     @app.on_event("startup")
     async def _startup() -> None:
-        settings = load_settings()
-        app.state.settings = settings
+        report: StartupReport = app.state.startup
+        # Between building the app and the server starting it (uvicorn setup, event loop).
+        report.mark("server")
+        # Settings a dependency already loaded (e.g. with --reload) are not read again.
+        settings = get_settings()
+        report.mark("settings")
         app.state.translator = _build_translator(settings)
+        report.mark("translator")
+        app.state.cache = _build_cache(settings)
+        app.state.readiness = Readiness(eager=settings.eager_load)
+        app.state.smart_planner = _build_smart_planner(settings)
+        report.mark("cache")
+        # Build the detector's n-gram tables now instead of on the first "auto" request.
+        await asyncio.to_thread(preload_detector, settings.detector_cache_dir)
+        report.mark("detector")
+        # Resume document jobs a previous process left unfinished.
+        await get_documents().start()
+        report.mark("documents")
+        report.log()
+        translator = app.state.translator
+        if translator is None:
+            return
+        if settings.eager_load:
+            # Load in the background so liveness answers while readiness reports progress.
+            app.state.prepare_task = asyncio.create_task(
+                prepare_translator(
+                    translator,
+                    app.state.readiness,
+                    warmup_prompts=settings.warmup_prompts,
+                )
+            )
+            return
+        pool = unwrap_translator(translator)
+        if isinstance(pool, WorkerPoolTranslator):
+            await pool.start()
+        elif not isinstance(pool, FakeTranslator):
+            # Lazy load: the first request still reads the model, but not the library too.
+            app.state.preimport_task = asyncio.create_task(
+                asyncio.to_thread(preimport_llama_cpp)
+            )
+
+    @app.on_event("shutdown")
+    async def _shutdown() -> None:
+        prepare_task = getattr(app.state, "prepare_task", None)
+        if prepare_task is not None and not prepare_task.done():
+            prepare_task.cancel()
+        documents = getattr(app.state, "documents", None)
+        if documents is not None:
+            await documents.close()
+        translator = getattr(app.state, "translator", None)
+        if translator is not None:
+            await translator.close()
 
     def get_settings() -> Settings:
         # Ensure repo-root `.env` is loaded even if startup didn't run yet (dev reload edge case).
@@ -87,18 +278,180 @@ def create_app() -> FastAPI:
             return FakeTranslator()
         return translator
 
+    def get_cache() -> TranslationCache | None:
+        return getattr(app.state, "cache", None)
+
+    def get_readiness(settings: Annotated[Settings, Depends(get_settings)]) -> Readiness:
+        readiness = getattr(app.state, "readiness", None)
+        if readiness is None:
+            readiness = Readiness(eager=settings.eager_load)
+            app.state.readiness = readiness
+        return readiness
+
+    def get_smart_planner() -> SmartModePlanner:
+        planner = getattr(app.state, "smart_planner", None)
+        if planner is None:
+            planner = _build_smart_planner(get_settings())
+            app.state.smart_planner = planner
+        return planner
+
+    def get_metrics() -> ServiceMetrics:
+        metrics = getattr(app.state, "metrics", None)
+        if metrics is None:
+            metrics = ServiceMetrics(
+                queued=_queued_requests,
+                model_load_seconds=_model_load_seconds,
+            )
+            app.state.metrics = metrics
+        return metrics
+
+    def get_singleflight() -> SingleFlight[TranslationResult] | None:
+        if not get_settings().coalesce:
+            return None
+        singleflight = getattr(app.state, "singleflight", None)
+        if singleflight is None:
+            singleflight = SingleFlight()
+            app.state.singleflight = singleflight
+        return singleflight
+
+    def get_admission() -> AdmissionController:
+        admission = getattr(app.state, "admission", None)
+        if admission is None:
+            admission = _build_admission(get_settings(), get_metrics())
+            app.state.admission = admission
+        return admission
+
+    def get_slow_log() -> SlowRequestLog:
+        slow_log = getattr(app.state, "slow_log", None)
+        if slow_log is None:
+            settings = get_settings()
+            slow_log = SlowRequestLog(settings.slow_log_size, window_s=settings.slow_log_window_s)
+            app.state.slow_log = slow_log
+        return slow_log
+
+    def get_documents() -> DocumentJobs:
+        documents = getattr(app.state, "documents", None)
+        if documents is None:
+            settings = get_settings()
+            documents = DocumentJobs(
+                settings.jobs_dir,
+                translate=_translate_segment,
+                concurrency=settings.document_concurrency,
+                batch_size=settings.jobs_batch,
+                max_bytes=settings.document_max_mb * 1024 * 1024,
+            )
+            app.state.documents = documents
+        return documents
+
+    def get_request_context(request: Request) -> RequestContext:
+        client_id = request.headers.get("x-client-id") or (
+            request.client.host if request.client else "anonymous"
+        )
+        deadline_ms = None
+        raw = request.headers.get("x-deadline-ms")
+        if raw is not None:
+            try:
+                deadline_ms = int(raw)
+            except ValueError:
+                raise ApiError(
+                    "INVALID_DEADLINE",
+                    "X-Deadline-Ms must be an integer number of milliseconds.",
+                    400,
+                ) from None
+        return get_admission().context(client_id=client_id, deadline_ms=deadline_ms)
+
+    def _queued_requests() -> float | None:
+        translator = getattr(app.state, "translator", None)
+        admission = getattr(app.state, "admission", None)
+        if translator is None:
+            return None
+        return translator.queue_depth() + (admission.queued if admission is not None else 0)
+
+    def _model_load_seconds() -> float | None:
+        readiness = getattr(app.state, "readiness", None)
+        load_ms = readiness.load_ms if readiness is not None else None
+        translator = getattr(app.state, "translator", None)
+        if load_ms is None and translator is not None:
+            load_ms = translator.stats().get("load_ms")
+        return load_ms / 1000 if load_ms is not None else None
+
+    async def _run_request(request: Request, ctx: RequestContext, coro):
+        """
+        Await `coro` unless the client disconnects or the deadline passes first. Either way the
+        translation task is cancelled (which stops llama.cpp at the next token) and awaited, so
+        the inference slot is free again before this returns.
+        """
+        work = asyncio.ensure_future(coro)
+        watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+        timeout = None if ctx.deadline is None else max(0.0, ctx.deadline - time.monotonic())
+        try:
+            done, _ = await asyncio.wait(
+                {work, watcher},
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        except asyncio.CancelledError:
+            work.cancel()
+            raise
+        finally:
+            watcher.cancel()
+        if work in done:
+            return work.result()
+
+        reason = "disconnect" if watcher in done else "deadline"
+        work.cancel()
+        await asyncio.gather(work, return_exceptions=True)
+        get_metrics().cancelled.inc(reason=reason)
+        if reason == "deadline":
+            raise ApiError(
+                "DEADLINE_EXCEEDED",
+                "The translation did not finish within the request deadline.",
+                503,
+            )
+        raise ApiError("CLIENT_DISCONNECTED", "The client closed the connection.", 499)
+
+    def _track(
+        endpoint: str,
+        req: TranslateRequest | TranslateBatchRequest | TranslateMultiRequest,
+    ) -> RequestTracker:
+        # Unsupported codes come straight from clients; fold them into one label value.
+        source = req.source_lang
+        target = getattr(req, "target_lang", "multi")
+        return get_metrics().track(
+            endpoint,
+            mode=req.options.mode,
+            source_lang=source if source == "auto" or is_supported(source) else "unsupported",
+            target_lang=target if target == "multi" or is_supported(target) else "unsupported",
+        )
+
     @app.get("/api/health", response_model=HealthResponse)
     async def health(settings: Annotated[Settings, Depends(get_settings)]) -> HealthResponse:
         translator = get_translator(settings)
         if translator is None:
             return HealthResponse(model_loaded=False, model_name=None)
+        translator = unwrap_translator(translator)
+        if isinstance(translator, RoutingTranslator):
+            models = translator.models()
+            if settings.eager_load:
+                loaded = get_readiness(settings).state == "ready"
+            else:
+                loaded = any(Path(s.path).expanduser().exists() for s in settings.model_specs)
+            return HealthResponse(
+                model_loaded=loaded,
+                model_name=settings.model_name or models[0]["name"],
+                models=models,
+            )
         if isinstance(translator, FakeTranslator):
             return HealthResponse(model_loaded=True, model_name="FakeTranslator")
-        # For llama.cpp, consider "loaded" if a model path is set and exists.
-        if isinstance(translator, LlamaCppTranslator):
-            if settings.model_path and Path(settings.model_path).expanduser().exists():
-                return HealthResponse(model_loaded=True, model_name=settings.model_name)
-            return HealthResponse(model_loaded=False, model_name=None)
+        if isinstance(translator, (LlamaCppTranslator, WorkerPoolTranslator)):
+            if not (settings.model_path and Path(settings.model_path).expanduser().exists()):
+                return HealthResponse(model_loaded=False, model_name=None)
+            # With eager loading, report the real load state. In lazy mode the model loads on the
+            # first request, so an existing model file is what makes the backend usable.
+            if settings.eager_load:
+                loaded = get_readiness(settings).state == "ready"
+                return HealthResponse(model_loaded=loaded, model_name=settings.model_name)
+            return HealthResponse(model_loaded=True, model_name=settings.model_name)
 
         # For dependency-injected/custom translators (including tests), treat presence as loaded.
         return HealthResponse(
@@ -106,28 +459,102 @@ def create_app() -> FastAPI:
             model_name=settings.model_name or translator.__class__.__name__,
         )
 
+    @app.get("/api/health/live", response_model=LivenessResponse)
+    async def health_live() -> LivenessResponse:
+        return LivenessResponse()
+
+    @app.get("/api/health/ready", response_model=ReadinessResponse)
+    async def health_ready(
+        response: Response,
+        settings: Annotated[Settings, Depends(get_settings)],
+        readiness: Annotated[Readiness, Depends(get_readiness)],
+    ) -> ReadinessResponse:
+        translator = get_translator(settings)
+        if translator is None:
+            ready = False
+        elif readiness.eager:
+            # Also false while a restarted worker process reloads the model.
+            ready = readiness.state == "ready" and translator.is_loaded
+        else:
+            # Lazy mode: nothing to wait for; the first request pays the load.
+            ready = True
+        if not ready:
+            response.status_code = 503
+        return ReadinessResponse(
+            ready=ready,
+            state="loading" if readiness.state == "ready" and not ready else readiness.state,
+            model_loaded=bool(translator is not None and translator.is_loaded),
+            model_name=settings.model_name,
+            load_ms=readiness.load_ms,
+            warmup_ms=readiness.warmup_ms,
+            warmup_prompts=readiness.warmup_prompts,
+            model=translator.model_info() if translator is not None else {},
+            error=readiness.error,
+            startup=app.state.startup.as_dict(),
+        )
+
+    @app.get("/api/metrics", response_class=PlainTextResponse)
+    async def metrics() -> PlainTextResponse:
+        return PlainTextResponse(
+            get_metrics().render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+    @app.get("/api/admin/slow-requests", response_model=SlowRequestsResponse)
+    async def slow_requests() -> SlowRequestsResponse:
+        """The slowest recent requests with their timing breakdown, slowest first."""
+        slow_log = get_slow_log()
+        return SlowRequestsResponse(
+            capacity=slow_log.capacity,
+            window_s=slow_log.window_s,
+            requests=[asdict(entry) for entry in slow_log.slowest()],
+        )
+
     @app.get("/api/languages", response_model=LanguagesResponse)
     async def languages() -> LanguagesResponse:
         return LanguagesResponse(
             languages=[{"code": lang.code, "name": lang.name} for lang in LANGUAGES],
         )
 
-    @app.post("/api/translate", response_model=TranslateResponse)
-    async def translate(
+    @app.get("/api/stats", response_model=StatsResponse)
+    async def stats(
+        cache: Annotated[TranslationCache | None, Depends(get_cache)],
+    ) -> StatsResponse:
+        translator = getattr(app.state, "translator", None)
+        documents = getattr(app.state, "documents", None)
+        singleflight = get_singleflight()
+        return StatsResponse(
+            cache=cache.stats() if cache is not None else None,
+            translator=translator.stats() if translator is not None else None,
+            smart=get_smart_planner().stats(),
+            admission=get_admission().stats(),
+            documents=documents.stats() if documents is not None else None,
+            coalescing=singleflight.stats() if singleflight is not None else None,
+        )
+
+    def _validate_request(
         req: TranslateRequest,
-        settings: Annotated[Settings, Depends(get_settings)],
-        translator: Annotated[Translator | None, Depends(get_translator)],
-    ) -> TranslateResponse:
-        if req.source_lang != "auto" and not is_supported(req.source_lang):
+        settings: Settings,
+        translator: Translator | None,
+    ) -> Translator:
+        return _validate_languages(req.source_lang, req.target_lang, settings, translator)
+
+    def _validate_languages(
+        source_lang: str,
+        target_lang: str,
+        settings: Settings,
+        translator: Translator | None,
+    ) -> Translator:
+        if source_lang != "auto" and not is_supported(source_lang):
             raise ApiError(
                 "UNSUPPORTED_SOURCE_LANG",
-                f"Unsupported source_lang: {req.source_lang}",
+                f"Unsupported source_lang: {source_lang}",
                 400,
             )
-        if not is_supported(req.target_lang):
+        if not is_supported(target_lang):
             raise ApiError(
                 "UNSUPPORTED_TARGET_LANG",
-                f"Unsupported target_lang: {req.target_lang}",
+                f"Unsupported target_lang: {target_lang}",
                 400,
             )
 
@@ -144,47 +571,192 @@ def create_app() -> FastAPI:
                 "(or enable LOCALLINGUA_ALLOW_FAKE_TRANSLATOR=1).",
                 503,
             )
+        return translator
 
-        detected = None
-        detection_confidence = None
-        effective_source_lang = req.source_lang
-        if req.source_lang == "auto":
-            detection = detect_language(req.text)
-            detection_confidence = detection.confidence
-            if detection.code and is_supported(detection.code):
-                # Be more permissive for short inputs so we don't fall back to "Unknown"
-                # unnecessarily.
-                threshold = 0.35 if len(req.text.strip()) <= 20 else 0.70
-                if (detection.confidence or 0.0) >= threshold:
-                    detected = detection.code
-                    effective_source_lang = detected
+    async def _resolve_source(req: TranslateRequest) -> tuple[str | None, float | None, str]:
+        """Return (detected code, detection confidence, effective source language)."""
+        if req.source_lang != "auto":
+            return None, None, req.source_lang
+
+        start = time.perf_counter()
+        detection = await detect_language_async(req.text)
+        get_metrics().detect_seconds.observe(time.perf_counter() - start)
+        if detection.code and is_supported(detection.code):
+            # Be more permissive for short inputs so we don't fall back to "Unknown"
+            # unnecessarily.
+            threshold = 0.35 if len(req.text.strip()) <= 20 else 0.70
+            if (detection.confidence or 0.0) >= threshold:
+                return detection.code, detection.confidence, detection.code
+        return None, detection.confidence, "auto"
+
+    def _cache_key(
+        translator: Translator,
+        cache: TranslationCache | None,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> str | None:
+        if cache is None:
+            return None
+        return _request_key(
+            translator,
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        )
+
+    def _request_key(
+        translator: Translator,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> str | None:
+        """Identity of a deterministic request: normalized text, languages, mode, decoding."""
+        return translation_cache_key(
+            fingerprint=translator.fingerprint(),
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        )
+
+    async def _translate_cached(
+        translator: Translator,
+        cache: TranslationCache | None,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+        ctx: RequestContext | None = None,
+        cost: int = 0,
+    ) -> TranslationResult:
+        """
+        One translator call behind the cache; `ctx` routes it through admission control.
+        Identical deterministic requests already in flight share that call's result instead
+        of queueing a generation of their own.
+        """
+        key = _request_key(
+            translator,
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        )
+        cache_key = key if cache is not None else None
+        if cache_key is not None:
+            hit = await cache.get(cache_key)
+            if hit is not None:
+                return hit
+
+        async def _generate(ctx: RequestContext | None) -> TranslationResult:
+            slot = (
+                get_admission().slot(ctx, cost) if ctx is not None else contextlib.nullcontext()
+            )
+            queued = time.perf_counter()
+            try:
+                async with slot:
+                    admission_ms = (time.perf_counter() - queued) * 1000
+                    result = await translator.translate(
+                        text=text,
+                        source_lang=source_lang,
+                        target_lang=target_lang,
+                        options=options,
+                    )
+            except (FileNotFoundError, RuntimeError) as exc:
+                api_error = _translation_error(exc)
+                if api_error is None:
+                    raise
+                raise api_error from exc
+            get_metrics().observe_translation(result, cached=result.cached)
+            if cache_key is not None and result.translated_text.strip():
+                await cache.put(cache_key, result)
+            # Reported per request only; the metrics keep admission wait separately.
+            return replace(result, queue_ms=(result.queue_ms or 0.0) + admission_ms)
+
+        singleflight = get_singleflight()
+        if key is None or singleflight is None:
+            return await _generate(ctx)
+        # The shared generation belongs to no single caller: it queues without the first
+        # caller's deadline and runs until its last waiter leaves. Each caller's own deadline
+        # and disconnect still apply while it waits (see _run_request).
+        shared_ctx = replace(ctx, deadline=None) if ctx is not None else None
+        result, joined = await singleflight.do(key, partial(_generate, shared_ctx))
+        if joined:
+            get_metrics().coalesced.inc()
+        return result
+
+    async def _translate_segment(
+        text: str,
+        *,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> str:
+        """Translate one document segment (background jobs skip admission control)."""
+        settings = get_settings()
+        translator = _validate_languages(
+            source_lang, target_lang, settings, get_translator(settings)
+        )
+        result = await _translate_cached(
+            translator,
+            get_cache(),
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        )
+        return result.translated_text
+
+    async def _translate_text(
+        req: TranslateRequest,
+        translator: Translator,
+        cache: TranslationCache | None,
+        ctx: RequestContext,
+        *,
+        source: tuple[str | None, float | None, str] | None = None,
+        fan_out: bool = False,
+        timing: RequestTiming | None = None,
+    ) -> TranslateResponse:
+        """
+        `source` is an already resolved (detected, confidence, effective) source language.
+        `fan_out` puts the target language after the text in the prompt, so the requests of
+        one text in several languages share the evaluated text. `timing` collects where the
+        time went; the response carries it too.
+        """
+        timing = timing if timing is not None else RequestTiming()
+        if source is None:
+            detect_start = time.perf_counter()
+            source = await _resolve_source(req)
+            timing.detect_ms = (time.perf_counter() - detect_start) * 1000
+        detected, detection_confidence, effective_source_lang = source
 
         start = time.perf_counter()
         requested_mode = req.options.mode
+        cost = estimate_cost(req.text, req.options.max_tokens)
 
         async def _run_translate(mode: str):
-            try:
-                return await translator.translate(
-                    text=req.text,
-                    source_lang=effective_source_lang,
-                    target_lang=req.target_lang,
-                    options={**req.options.model_dump(), "mode": mode},
-                )
-            except FileNotFoundError as exc:
-                raise ApiError(
-                    "MODEL_NOT_FOUND",
-                    "The configured model file was not found. Check LOCALLINGUA_MODEL_PATH.",
-                    503,
-                ) from exc
-            except RuntimeError as exc:
-                if str(exc) == "LLAMA_CPP_NOT_INSTALLED":
-                    raise ApiError(
-                        "LLAMA_CPP_NOT_INSTALLED",
-                        "llama-cpp-python is not installed. Install backend deps with the llama "
-                        "extra.",
-                        503,
-                    ) from exc
-                raise
+            result = await _translate_cached(
+                translator,
+                cache,
+                text=req.text,
+                source_lang=effective_source_lang,
+                target_lang=req.target_lang,
+                options={
+                    **req.options.model_dump(),
+                    "mode": mode,
+                    **({"target_last": True} if fan_out else {}),
+                },
+                ctx=ctx,
+                cost=cost,
+            )
+            timing.add(result)
+            return result
 
         used_mode: str | None = None
         if requested_mode == "natural":
@@ -194,35 +766,59 @@ def create_app() -> FastAPI:
             result = await _run_translate("literal")
             used_mode = "literal"
         else:
-            # smart: try literal first; if unchanged, retry once with natural.
-            result = await _run_translate("literal")
-            used_mode = "literal"
-            should_retry = (
-                _has_any_letter(req.text)
-                and _is_passthrough(source_text=req.text, translated_text=result.translated_text)
-                and not (
-                    effective_source_lang != "auto"
-                    and req.target_lang == effective_source_lang
-                )
+            # smart: literal first, retrying once with natural if the output echoes the input.
+            # The planner skips straight to natural when that retry is the likely outcome.
+            planner = get_smart_planner()
+            eligible = _natural_retry_eligible(
+                text=req.text,
+                effective_source_lang=effective_source_lang,
+                target_lang=req.target_lang,
             )
-            if should_retry:
-                natural_result = await _run_translate("natural")
-                if not _is_passthrough(
+            first_mode = "literal"
+            if eligible:
+                first_mode = planner.first_mode(
+                    text=req.text,
+                    source_lang=effective_source_lang,
+                    target_lang=req.target_lang,
+                )
+            pass_start = time.perf_counter()
+            result = await _run_translate(first_mode)
+            used_mode = first_mode
+            if eligible and first_mode == "literal":
+                passthrough = _is_passthrough(
                     source_text=req.text,
-                    translated_text=natural_result.translated_text,
-                ):
-                    result = natural_result
-                    used_mode = "natural"
+                    translated_text=result.translated_text,
+                )
+                if not result.cached:
+                    planner.record_literal(
+                        text=req.text,
+                        source_lang=effective_source_lang,
+                        target_lang=req.target_lang,
+                        passthrough=passthrough,
+                        elapsed_ms=(time.perf_counter() - pass_start) * 1000,
+                    )
+                if passthrough:
+                    retry_start = time.perf_counter()
+                    timing.retried = True
+                    natural_result = await _run_translate("natural")
+                    rescued = not _is_passthrough(
+                        source_text=req.text,
+                        translated_text=natural_result.translated_text,
+                    )
+                    planner.record_retry(
+                        elapsed_ms=(time.perf_counter() - retry_start) * 1000,
+                        rescued=rescued,
+                    )
+                    if rescued:
+                        result = natural_result
+                        used_mode = "natural"
 
-        latency_ms = int((time.perf_counter() - start) * 1000)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        latency_ms = int(elapsed_ms)
+        timing.total_ms = timing.detect_ms + elapsed_ms
 
         if not result.translated_text.strip():
-            raise ApiError(
-                "MODEL_EMPTY_OUTPUT",
-                "The model returned an empty translation. Try a different text or model "
-                "quantization.",
-                503,
-            )
+            raise _empty_output_error()
 
         return TranslateResponse(
             translated_text=result.translated_text,
@@ -230,27 +826,761 @@ def create_app() -> FastAPI:
             detection_confidence=detection_confidence,
             used_mode=used_mode,
             latency_ms=latency_ms,
+            cached=result.cached,
+            prompt_tokens=result.prompt_tokens,
+            completion_tokens=result.completion_tokens,
+            model=result.model or get_settings().model_name,
+            timing=TimingBreakdown(**timing.as_dict()),
+        )
+
+    def _report_timing(
+        response: Response,
+        endpoint: str,
+        req: TranslateRequest | TranslateBatchRequest | TranslateMultiRequest,
+        timing: RequestTiming,
+        *,
+        input_chars: int,
+    ) -> None:
+        """Send the Server-Timing header and offer the request to the slow-request log."""
+        response.headers["Server-Timing"] = timing.server_timing()
+        target = getattr(req, "target_lang", None) or ",".join(
+            dict.fromkeys(getattr(req, "target_langs", ()))
+        )
+        get_slow_log().record(
+            SlowRequest(
+                at=time.time(),
+                endpoint=endpoint,
+                input_chars=input_chars,
+                source_lang=req.source_lang,
+                target_lang=target,
+                mode=req.options.mode,
+                timing=timing.as_dict(),
+            )
+        )
+
+    @app.post("/api/translate", response_model=TranslateResponse)
+    async def translate(
+        request: Request,
+        response: Response,
+        req: TranslateRequest,
+        settings: Annotated[Settings, Depends(get_settings)],
+        translator: Annotated[Translator | None, Depends(get_translator)],
+        cache: Annotated[TranslationCache | None, Depends(get_cache)],
+        ctx: Annotated[RequestContext, Depends(get_request_context)],
+        with_timing: Annotated[bool, Query(alias="timing")] = False,
+    ) -> TranslateResponse:
+        with _track("translate", req):
+            translator = _validate_request(req, settings, translator)
+            timing = RequestTiming()
+            result = await _run_request(
+                request, ctx, _translate_text(req, translator, cache, ctx, timing=timing)
+            )
+        _report_timing(response, "translate", req, timing, input_chars=len(req.text))
+        if not with_timing:
+            result.timing = None
+        return result
+
+    @app.post("/api/translate/batch", response_model=TranslateBatchResponse)
+    async def translate_batch(
+        request: Request,
+        response: Response,
+        req: TranslateBatchRequest,
+        settings: Annotated[Settings, Depends(get_settings)],
+        translator: Annotated[Translator | None, Depends(get_translator)],
+        cache: Annotated[TranslationCache | None, Depends(get_cache)],
+        ctx: Annotated[RequestContext, Depends(get_request_context)],
+        with_timing: Annotated[bool, Query(alias="timing")] = False,
+    ) -> TranslateBatchResponse:
+        items = [
+            TranslateRequest(
+                text=text,
+                source_lang=req.source_lang,
+                target_lang=req.target_lang,
+                options=req.options,
+            )
+            for text in req.texts
+        ]
+        with _track("batch", req):
+            translator = _validate_request(items[0], settings, translator)
+            # Reject the whole batch up front rather than failing it halfway through.
+            get_admission().check(
+                ctx,
+                max(estimate_cost(text, req.options.max_tokens) for text in req.texts),
+                count=len(items),
+            )
+            start = time.perf_counter()
+            timings = [RequestTiming() for _ in items]
+            # Submit everything at once; with LOCALLINGUA_BATCH_SIZE>1 the scheduler merges
+            # these into shared decode batches.
+            results = await _run_request(
+                request,
+                ctx,
+                asyncio.gather(
+                    *(
+                        _translate_text(item, translator, cache, ctx, timing=timing)
+                        for item, timing in zip(items, timings, strict=True)
+                    )
+                ),
+            )
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        _report_timing(
+            response,
+            "batch",
+            req,
+            RequestTiming.merge(timings, total_ms=elapsed_ms),
+            input_chars=sum(len(text) for text in req.texts),
+        )
+        if not with_timing:
+            for result in results:
+                result.timing = None
+        return TranslateBatchResponse(results=list(results), latency_ms=int(elapsed_ms))
+
+    def _fan_out(
+        req: TranslateMultiRequest,
+        settings: Settings,
+        translator: Translator | None,
+        ctx: RequestContext,
+    ) -> tuple[Translator, list[TranslateRequest]]:
+        """Validate every target and check admission for all of them up front."""
+        items = [
+            TranslateRequest(
+                text=req.text,
+                source_lang=req.source_lang,
+                target_lang=target,
+                options=req.options,
+            )
+            for target in dict.fromkeys(req.target_langs)
+        ]
+        for item in items:
+            translator = _validate_request(item, settings, translator)
+        get_admission().check(
+            ctx, estimate_cost(req.text, req.options.max_tokens), count=len(items)
+        )
+        return translator, items
+
+    @app.post("/api/translate/multi", response_model=TranslateMultiResponse)
+    async def translate_multi(
+        request: Request,
+        response: Response,
+        req: TranslateMultiRequest,
+        settings: Annotated[Settings, Depends(get_settings)],
+        translator: Annotated[Translator | None, Depends(get_translator)],
+        cache: Annotated[TranslationCache | None, Depends(get_cache)],
+        ctx: Annotated[RequestContext, Depends(get_request_context)],
+        with_timing: Annotated[bool, Query(alias="timing")] = False,
+    ) -> TranslateMultiResponse:
+        """Translate one text into several languages, detecting the source once."""
+        with _track("multi", req):
+            translator, items = _fan_out(req, settings, translator, ctx)
+            start = time.perf_counter()
+            source = await _resolve_source(items[0])
+            detect_ms = (time.perf_counter() - start) * 1000
+            timings = [RequestTiming() for _ in items]
+
+            async def _all():
+                return await asyncio.gather(
+                    *(
+                        _translate_text(
+                            item, translator, cache, ctx, source=source, fan_out=True, timing=t
+                        )
+                        for item, t in zip(items, timings, strict=True)
+                    )
+                )
+
+            results = await _run_request(request, ctx, _all())
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        timing = RequestTiming.merge(timings, total_ms=elapsed_ms)
+        timing.detect_ms = detect_ms
+        _report_timing(response, "multi", req, timing, input_chars=len(req.text))
+        if not with_timing:
+            for result in results:
+                result.timing = None
+        return TranslateMultiResponse(
+            results={item.target_lang: r for item, r in zip(items, results, strict=True)},
+            detected_source_lang=source[0],
+            detection_confidence=source[1],
+            latency_ms=int(elapsed_ms),
+        )
+
+    @app.post("/api/translate/multi/stream")
+    async def translate_multi_stream(
+        req: TranslateMultiRequest,
+        settings: Annotated[Settings, Depends(get_settings)],
+        translator: Annotated[Translator | None, Depends(get_translator)],
+        cache: Annotated[TranslationCache | None, Depends(get_cache)],
+        ctx: Annotated[RequestContext, Depends(get_request_context)],
+    ) -> StreamingResponse:
+        """Like /api/translate/multi, with one SSE event per language as soon as it is done."""
+        tracker = _track("multi_stream", req).start()
+        try:
+            translator, items = _fan_out(req, settings, translator, ctx)
+            source = await _resolve_source(items[0])
+        except BaseException as exc:
+            tracker.finish(exc)
+            raise
+
+        async def _one(item: TranslateRequest):
+            try:
+                result = await _translate_text(
+                    item, translator, cache, ctx, source=source, fan_out=True
+                )
+            except (ApiError, FileNotFoundError, RuntimeError) as exc:
+                api_error = exc if isinstance(exc, ApiError) else _translation_error(exc)
+                if api_error is None:
+                    api_error = ApiError("TRANSLATION_FAILED", "Translation failed.", 500)
+                return item.target_lang, api_error
+            return item.target_lang, result
+
+        async def _events():
+            start = time.perf_counter()
+            tasks = [asyncio.ensure_future(_one(item)) for item in items]
+            error: BaseException | None = None
+            failed = 0
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    target, outcome = await next_done
+                    if isinstance(outcome, ApiError):
+                        failed += 1
+                        payload = {"code": outcome.code, "message": outcome.message}
+                        yield _sse_event("error", {"target_lang": target, "error": payload})
+                    else:
+                        yield _sse_event("result", {"target_lang": target, **outcome.model_dump()})
+                yield _sse_event(
+                    "done",
+                    {
+                        "detected_source_lang": source[0],
+                        "detection_confidence": source[1],
+                        "failed": failed,
+                        "latency_ms": int((time.perf_counter() - start) * 1000),
+                    },
+                )
+            except GeneratorExit:
+                tracker.status = "CLIENT_CLOSED"
+                raise
+            except BaseException as exc:
+                error = exc
+                raise
+            finally:
+                for task in tasks:
+                    task.cancel()
+                if failed and error is None and tracker.status == "ok":
+                    tracker.status = "PARTIAL"
+                tracker.finish(error)
+
+        return StreamingResponse(
+            _events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
 
+    @app.post("/api/translate/stream")
+    async def translate_stream(
+        req: TranslateRequest,
+        settings: Annotated[Settings, Depends(get_settings)],
+        translator: Annotated[Translator | None, Depends(get_translator)],
+        cache: Annotated[TranslationCache | None, Depends(get_cache)],
+        ctx: Annotated[RequestContext, Depends(get_request_context)],
+    ) -> StreamingResponse:
+        # Validate, detect and check admission up front so request errors keep the regular
+        # JSON error shape (and 429/503 status codes).
+        tracker = _track("stream", req).start()
+        cost = estimate_cost(req.text, req.options.max_tokens)
+        try:
+            translator = _validate_request(req, settings, translator)
+            get_admission().check(ctx, cost)
+            detected, detection_confidence, effective_source_lang = await _resolve_source(req)
+        except BaseException as exc:
+            tracker.finish(exc)
+            raise
+
+        async def _stream_mode(mode: str, sink: list[TranslationResult]):
+            options = {**req.options.model_dump(), "mode": mode}
+            cache_key = _cache_key(
+                translator,
+                cache,
+                text=req.text,
+                source_lang=effective_source_lang,
+                target_lang=req.target_lang,
+                options=options,
+            )
+            if cache_key is not None:
+                hit = await cache.get(cache_key)
+                if hit is not None:
+                    sink.append(hit)
+                    yield hit.translated_text
+                    return
+            async with get_admission().slot(ctx, cost):
+                stream = translator.translate_stream(
+                    text=req.text,
+                    source_lang=effective_source_lang,
+                    target_lang=req.target_lang,
+                    options=options,
+                )
+                async for chunk in stream:
+                    if chunk.result is not None:
+                        sink.append(chunk.result)
+                        get_metrics().observe_translation(
+                            chunk.result,
+                            cached=chunk.result.cached,
+                        )
+                    elif chunk.delta:
+                        yield chunk.delta
+            if cache_key is not None and sink and sink[-1].translated_text.strip():
+                await cache.put(cache_key, sink[-1])
+
+        async def _stream_events():
+            start = time.perf_counter()
+            requested_mode = req.options.mode
+            used_mode = "natural" if requested_mode == "natural" else "literal"
+            planner = get_smart_planner()
+            eligible = requested_mode == "smart" and _natural_retry_eligible(
+                text=req.text,
+                effective_source_lang=effective_source_lang,
+                target_lang=req.target_lang,
+            )
+            if eligible:
+                used_mode = planner.first_mode(
+                    text=req.text,
+                    source_lang=effective_source_lang,
+                    target_lang=req.target_lang,
+                )
+            results: list[TranslationResult] = []
+            try:
+                async for delta in _stream_mode(used_mode, results):
+                    yield _sse_event("delta", {"text": delta})
+
+                if eligible and used_mode == "literal" and results:
+                    literal = results[-1]
+                    passthrough = _is_passthrough(
+                        source_text=req.text,
+                        translated_text=literal.translated_text,
+                    )
+                    if not literal.cached:
+                        planner.record_literal(
+                            text=req.text,
+                            source_lang=effective_source_lang,
+                            target_lang=req.target_lang,
+                            passthrough=passthrough,
+                            elapsed_ms=(time.perf_counter() - start) * 1000,
+                        )
+                    if passthrough:
+                        # The literal pass echoed the input; tell the client to discard it.
+                        yield _sse_event("reset", {"mode": "natural"})
+                        used_mode = "natural"
+                        retry_start = time.perf_counter()
+                        async for delta in _stream_mode("natural", results):
+                            yield _sse_event("delta", {"text": delta})
+                        planner.record_retry(
+                            elapsed_ms=(time.perf_counter() - retry_start) * 1000,
+                            rescued=not _is_passthrough(
+                                source_text=req.text,
+                                translated_text=results[-1].translated_text,
+                            ),
+                        )
+
+                if not results or not results[-1].translated_text.strip():
+                    raise _empty_output_error()
+            except (ApiError, FileNotFoundError, RuntimeError) as exc:
+                api_error = exc if isinstance(exc, ApiError) else _translation_error(exc)
+                if api_error is None:
+                    api_error = ApiError("TRANSLATION_FAILED", "Translation failed.", 500)
+                tracker.status = api_error.code
+                yield _sse_event(
+                    "error",
+                    {"error": {"code": api_error.code, "message": api_error.message}},
+                )
+                return
+
+            result = results[-1]
+            final = TranslateResponse(
+                translated_text=result.translated_text,
+                detected_source_lang=detected or result.detected_source_lang,
+                detection_confidence=detection_confidence,
+                used_mode=used_mode,
+                latency_ms=int((time.perf_counter() - start) * 1000),
+                cached=result.cached,
+                prompt_tokens=result.prompt_tokens,
+                completion_tokens=result.completion_tokens,
+                model=result.model or get_settings().model_name,
+            )
+            yield _sse_event("done", final.model_dump())
+
+        async def _events():
+            error: BaseException | None = None
+            try:
+                async for event in _stream_events():
+                    yield event
+            except GeneratorExit:
+                tracker.status = "CLIENT_CLOSED"
+                raise
+            except BaseException as exc:
+                error = exc
+                raise
+            finally:
+                tracker.finish(error)
+
+        return StreamingResponse(
+            _events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def _get_job(job_id: str) -> DocumentJob:
+        job = await get_documents().get(job_id)
+        if job is None:
+            raise ApiError("JOB_NOT_FOUND", f"No document job with id {job_id}.", 404)
+        return job
+
+    @app.websocket("/api/translate/live")
+    async def translate_live(websocket: WebSocket) -> None:
+        """
+        Translate as you type. Client messages (JSON):
+        `{"type": "config", "source_lang", "target_lang", "options"}` (first, and whenever the
+        languages change), `{"type": "text", "text", "rev"}` for the whole text and
+        `{"type": "edit", "start", "end", "text", "rev"}` to replace a range of it.
+        """
+        await websocket.accept()
+        settings = get_settings()
+        metrics = get_metrics()
+        client_id = websocket.headers.get("x-client-id") or (
+            websocket.client.host if websocket.client else "anonymous"
+        )
+
+        async def _translate_sentence(
+            text: str, *, source_lang: str, target_lang: str, options: dict
+        ) -> str:
+            req = TranslateRequest(
+                text=text,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                options=TranslateOptions(**options),
+            )
+            with _track("live", req):
+                translator = _validate_request(req, settings, get_translator(settings))
+                ctx = get_admission().context(client_id=client_id, deadline_ms=None)
+                # Detected once per revision for the whole text, not per sentence.
+                source = (None, None, source_lang)
+                response = await _translate_text(req, translator, get_cache(), ctx, source=source)
+            return response.translated_text
+
+        async def _resolve(text: str, source_lang: str) -> str:
+            req = TranslateRequest(
+                text=text[:_LIVE_DETECT_CHARS], source_lang=source_lang, target_lang="en"
+            )
+            return (await _resolve_source(req))[2]
+
+        send_lock = asyncio.Lock()
+
+        async def _send(message: dict) -> None:
+            # The session's pushes and the replies to bad messages come from different tasks.
+            async with send_lock:
+                await websocket.send_json(message)
+
+        session = LiveSession(
+            translate=_translate_sentence,
+            resolve_source=_resolve,
+            send=_send,
+            debounce_ms=settings.live_debounce_ms,
+            max_chars=settings.segment_max_chars or 1000,
+            on_sentence=lambda outcome: metrics.live_sentences.inc(outcome=outcome),
+        )
+        runner = asyncio.create_task(session.run())
+        metrics.live_sessions.inc()
+        try:
+            while True:
+                raw = await websocket.receive_text()
+                try:
+                    try:
+                        message = json.loads(raw)
+                    except ValueError:
+                        raise ApiError("INVALID_MESSAGE", "Messages must be JSON.", 400) from None
+                    kind = message.get("type") if isinstance(message, dict) else None
+                    if kind == "config":
+                        config = LiveConfigMessage.model_validate(message)
+                        _validate_languages(
+                            config.source_lang,
+                            config.target_lang,
+                            settings,
+                            get_translator(settings),
+                        )
+                        session.configure(
+                            LiveTarget(
+                                config.source_lang,
+                                config.target_lang,
+                                config.options.model_dump(),
+                            )
+                        )
+                    elif kind == "text":
+                        text = LiveTextMessage.model_validate(message)
+                        session.set_text(text.text, rev=text.rev)
+                    elif kind == "edit":
+                        edit = LiveEditMessage.model_validate(message)
+                        session.edit(edit.start, edit.end, edit.text, rev=edit.rev)
+                    else:
+                        raise ApiError("INVALID_MESSAGE", "Unknown message type.", 400)
+                except ApiError as exc:
+                    await _send(
+                        {"type": "error", "error": {"code": exc.code, "message": exc.message}}
+                    )
+                except ValidationError as exc:
+                    await _send(
+                        {
+                            "type": "error",
+                            "error": {"code": "VALIDATION_ERROR", "message": "Invalid message."},
+                            "details": exc.errors(include_url=False, include_context=False),
+                        }
+                    )
+        except WebSocketDisconnect:
+            pass
+        finally:
+            metrics.live_sessions.dec()
+            runner.cancel()
+            with contextlib.suppress(asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+                await runner
+            await session.close()
+
+    @app.post("/api/documents", response_model=DocumentJobResponse, status_code=202)
+    async def create_document(
+        request: Request,
+        target_lang: str,
+        settings: Annotated[Settings, Depends(get_settings)],
+        translator: Annotated[Translator | None, Depends(get_translator)],
+        source_lang: str = "auto",
+        filename: str | None = None,
+        fmt: Annotated[str | None, Query(alias="format")] = None,
+        mode: Literal["literal", "natural"] = "literal",
+    ) -> DocumentJobResponse:
+        """Upload a document as the raw request body; it is translated in the background."""
+        _validate_languages(source_lang, target_lang, settings, translator)
+        document_format = detect_format(filename, fmt)
+        if document_format is None:
+            raise ApiError(
+                "UNSUPPORTED_DOCUMENT_FORMAT",
+                "Pass format=txt|md|srt|json|po or a filename with one of those extensions.",
+                400,
+            )
+        try:
+            job = await get_documents().create(
+                request.stream(),
+                filename=filename,
+                fmt=document_format,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                options=TranslateOptions(mode=mode).model_dump(),
+            )
+        except DocumentTooLarge as exc:
+            raise ApiError("DOCUMENT_TOO_LARGE", str(exc), 413) from exc
+        except DocumentError as exc:
+            raise ApiError("INVALID_DOCUMENT", str(exc), 400) from exc
+        return _job_response(job)
+
+    @app.get("/api/documents/{job_id}", response_model=DocumentJobResponse)
+    async def get_document(job_id: str) -> DocumentJobResponse:
+        return _job_response(await _get_job(job_id))
+
+    @app.get("/api/documents/{job_id}/output")
+    async def get_document_output(job_id: str) -> StreamingResponse:
+        job = await _get_job(job_id)
+        if job.status != "completed":
+            raise ApiError(
+                "JOB_NOT_COMPLETED",
+                f"The document job is {job.status}; the output is available once it completes.",
+                409,
+            )
+        return StreamingResponse(
+            _encode_chunks(get_documents().output(job.id)),
+            media_type=MEDIA_TYPES[job.format],
+            headers={
+                "Content-Disposition": f'attachment; filename="{_output_filename(job)}"',
+            },
+        )
+
+    @app.get("/api/jobs", response_model=JobListResponse)
+    async def list_jobs(
+        status: JobStatus | None = None,
+        limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    ) -> JobListResponse:
+        """Document jobs, most recent first."""
+        jobs = await get_documents().list(status=status, limit=limit)
+        return JobListResponse(jobs=[_job_response(job) for job in jobs])
+
+    @app.get("/api/jobs/{job_id}", response_model=DocumentJobResponse)
+    async def get_job(job_id: str) -> DocumentJobResponse:
+        return _job_response(await _get_job(job_id))
+
+    @app.post("/api/jobs/{job_id}/cancel", response_model=DocumentJobResponse)
+    async def cancel_job(job_id: str) -> DocumentJobResponse:
+        job = await _get_job(job_id)
+        if not await get_documents().cancel(job_id):
+            raise ApiError("JOB_NOT_ACTIVE", f"The job is already {job.status}.", 409)
+        return _job_response(await _get_job(job_id))
+
+    @app.post("/api/jobs/{job_id}/retry", response_model=DocumentJobResponse)
+    async def retry_job(job_id: str) -> DocumentJobResponse:
+        """Re-queue a failed or cancelled job; finished segments are not translated again."""
+        job = await _get_job(job_id)
+        if not await get_documents().retry(job_id):
+            raise ApiError(
+                "JOB_NOT_RETRYABLE",
+                f"Only failed or cancelled jobs can be retried; this one is {job.status}.",
+                409,
+            )
+        return _job_response(await _get_job(job_id))
+
+    @app.delete("/api/jobs/{job_id}", status_code=204)
+    async def delete_job(job_id: str) -> Response:
+        if not await get_documents().delete(job_id):
+            raise ApiError("JOB_NOT_FOUND", f"No document job with id {job_id}.", 404)
+        return Response(status_code=204)
+
+    app.state.startup.mark("create_app")
     return app
 
 
+def _build_model(settings: Settings, path: str) -> Translator | None:
+    model_path = Path(path).expanduser()
+    if not model_path.exists():
+        return None
+    llama_config = LlamaCppConfig(
+        model_path=str(model_path),
+        max_concurrency=settings.max_concurrency,
+        batch_size=settings.batch_size,
+        batch_ctx=settings.batch_ctx,
+        n_ctx=settings.n_ctx,
+        n_gpu_layers=settings.n_gpu_layers,
+        prefix_cache_size=settings.prefix_cache_size,
+        prefix_cache_scope=settings.prefix_cache_scope,
+        prefix_state_path=settings.prefix_state_path,
+        speculative=settings.speculative,
+        draft_model_path=(
+            str(Path(settings.draft_model_path).expanduser())
+            if settings.draft_model_path
+            else None
+        ),
+        speculative_tokens=settings.speculative_tokens,
+        speculative_baseline_every=settings.speculative_baseline_every,
+        early_stop=settings.early_stop,
+    )
+    llama_config = apply_profile(llama_config, settings.tuning_profile)
+    if settings.workers > 0:
+        # Workers are pinned to their share of cores, whatever the profile measured.
+        worker_config = replace(
+            llama_config,
+            max_concurrency=1,
+            n_threads=settings.threads_per_worker,
+            n_threads_batch=settings.threads_per_worker,
+        )
+        probe = LlamaCppTranslator(worker_config)
+        return WorkerPoolTranslator(
+            partial(LlamaCppTranslator, worker_config),
+            WorkerPoolConfig(
+                workers=settings.workers,
+                threads_per_worker=settings.threads_per_worker,
+            ),
+            fingerprint=probe.fingerprint(),
+            model_info=probe.model_info(),
+        )
+    return LlamaCppTranslator(llama_config)
+
+
+def _wrap_translator(
+    translator: Translator,
+    settings: Settings,
+    memory: TranslationMemory | None,
+) -> Translator:
+    if memory is not None:
+        # Inside the segmenter, so the memory works on segments rather than whole documents.
+        translator = MemoryTranslator(translator, memory)
+    if settings.segment_max_chars > 0:
+        translator = SegmentingTranslator(translator, max_chars=settings.segment_max_chars)
+    return translator
+
+
 def _build_translator(settings: Settings) -> Translator | None:
+    memory = None
+    if settings.memory_path:
+        memory = TranslationMemory(
+            settings.memory_path,
+            hint_similarity=settings.memory_hint_similarity,
+        )
+
+    if settings.model_specs:
+
+        def _build_spec(spec: ModelSpec) -> Translator:
+            translator = _build_model(settings, spec.path)
+            if translator is None:
+                raise FileNotFoundError(spec.path)
+            return _wrap_translator(translator, settings, memory)
+
+        # Routing sits outside segmentation so rules see the whole input's length.
+        return RoutingTranslator(
+            settings.model_specs,
+            _build_spec,
+            memory_budget_bytes=settings.model_memory_mb * 1024 * 1024,
+            fingerprints={
+                spec.name: LlamaCppTranslator(
+                    LlamaCppConfig(model_path=os.path.expanduser(spec.path), max_concurrency=1)
+                ).fingerprint()
+                for spec in settings.model_specs
+            },
+        )
+
+    translator: Translator | None = None
     if settings.model_path:
-        model_path = Path(settings.model_path).expanduser()
-        if model_path.exists():
-            return LlamaCppTranslator(
-                LlamaCppConfig(
-                    model_path=str(model_path),
-                    max_concurrency=settings.max_concurrency,
-                ),
-            )
+        translator = _build_model(settings, settings.model_path)
+    elif settings.allow_fake_translator:
+        translator = FakeTranslator()
+    if translator is None:
         return None
+    return _wrap_translator(translator, settings, memory)
 
-    if settings.allow_fake_translator:
-        return FakeTranslator()
 
-    return None
+def _admission_capacity(settings: Settings) -> int:
+    # How many requests the translator actually runs at once.
+    if settings.workers > 0:
+        per_model = settings.workers
+    elif settings.batch_size > 1:
+        per_model = settings.batch_size
+    else:
+        per_model = settings.max_concurrency
+    # Registered models each run their own slots; routing decides which fill up.
+    return per_model * max(1, len(settings.model_specs))
+
+
+def _build_admission(settings: Settings, metrics: ServiceMetrics) -> AdmissionController:
+    return AdmissionController(
+        AdmissionConfig(
+            capacity=_admission_capacity(settings),
+            max_queue=settings.queue_size,
+            default_deadline_ms=settings.request_timeout_ms,
+        ),
+        metrics=metrics,
+    )
+
+
+def _build_smart_planner(settings: Settings) -> SmartModePlanner:
+    return SmartModePlanner(
+        SmartPlannerConfig(
+            enabled=settings.smart_precheck,
+            min_samples=settings.smart_min_samples,
+            natural_rate=settings.smart_natural_rate,
+        )
+    )
+
+
+def _build_cache(settings: Settings) -> TranslationCache | None:
+    if settings.cache_size <= 0 and not settings.cache_path:
+        return None
+    return TranslationCache(max_entries=settings.cache_size, path=settings.cache_path)
+
+
+_IMPORTED = time.perf_counter()
 
 
-app = create_app()
+def __getattr__(name: str) -> FastAPI:
+    # `app.main:app` builds the app on first access, so importing this module (tests, the
+    # CLIs) does not; `uvicorn --factory app.main:create_app` skips the attribute entirely.
+    if name == "app":
+        globals()["app"] = application = create_app()
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
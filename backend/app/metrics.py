@@ -0,0 +1,403 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+from .errors import ApiError
+
+# Latency buckets (seconds) from sub-millisecond detection up to long generations.
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+TOKENS_PER_SECOND_BUCKETS = (1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0, 160.0, 320.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A settable gauge, or one read from ``fn`` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        fn: Callable[[], float | None] | None = None,
+    ) -> None:
+        super().__init__(name, help_text)
+        self._fn = fn
+        self._value = 0.0
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def value(self) -> float | None:
+        return self._fn() if self._fn is not None else self._value
+
+    def render(self) -> list[str]:
+        value = self.value()
+        if value is None:
+            return []
+        return [*super().render(), f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: per-bucket (non-cumulative) counts + overflow, then sum and count.
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def mean(self, **labels: str) -> float | None:
+        series = self._series.get(self._key(labels))
+        return series[1] / series[2] if series and series[2] else None
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._series.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                labels = _format_labels(self.labelnames, key, le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class ServiceMetrics:
+    """
+    The metrics LocalLingua exports at /api/metrics.
+
+    Everything is an in-process counter or fixed-bucket histogram updated under a short lock,
+    so recording costs a few microseconds per request. Gauges that mirror translator or
+    readiness state are read when the endpoint is scraped.
+    """
+
+    def __init__(
+        self,
+        *,
+        queued: Callable[[], float | None] | None = None,
+        model_load_seconds: Callable[[], float | None] | None = None,
+    ) -> None:
+        self.registry = MetricsRegistry()
+        register = self.registry.register
+        self.requests = register(
+            Counter(
+                "locallingua_requests_total",
+                "Translation requests by endpoint, mode, language pair and outcome.",
+                ("endpoint", "mode", "source_lang", "target_lang", "status"),
+            )
+        )
+        self.request_seconds = register(
+            Histogram(
+                "locallingua_request_duration_seconds",
+                "End-to-end translation latency.",
+                ("endpoint",),
+            )
+        )
+        self.queue_seconds = register(
+            Histogram(
+                "locallingua_queue_wait_seconds",
+                "Time spent waiting for an inference slot.",
+            )
+        )
+        self.detect_seconds = register(
+            Histogram("locallingua_detect_seconds", "Source language detection time.")
+        )
+        self.prompt_eval_seconds = register(
+            Histogram("locallingua_prompt_eval_seconds", "llama.cpp prompt evaluation time.")
+        )
+        self.generation_seconds = register(
+            Histogram("locallingua_generation_seconds", "llama.cpp token generation time.")
+        )
+        self.sanitize_seconds = register(
+            Histogram("locallingua_sanitize_seconds", "Output sanitizing time.")
+        )
+        self.prompt_tokens = register(
+            Counter("locallingua_prompt_tokens_total", "Prompt tokens evaluated by the model.")
+        )
+        self.completion_tokens = register(
+            Counter("locallingua_completion_tokens_total", "Tokens generated by the model.")
+        )
+        self.tokens_per_second = register(
+            Histogram(
+                "locallingua_generation_tokens_per_second",
+                "Generation throughput per request, by decoding (plain or speculative).",
+                ("decoding",),
+                buckets=TOKENS_PER_SECOND_BUCKETS,
+            )
+        )
+        self.draft_tokens = register(
+            Counter(
+                "locallingua_speculative_draft_tokens_total",
+                "Tokens proposed by speculative decoding.",
+            )
+        )
+        self.accepted_tokens = register(
+            Counter(
+                "locallingua_speculative_accepted_tokens_total",
+                "Drafted tokens the model accepted.",
+            )
+        )
+        register(
+            Gauge(
+                "locallingua_speculative_acceptance_ratio",
+                "Accepted over drafted tokens since start.",
+                self._acceptance_ratio,
+            )
+        )
+        register(
+            Gauge(
+                "locallingua_speculative_speedup_ratio",
+                "Mean speculative over mean plain generation tokens/sec since start.",
+                self._speculative_speedup,
+            )
+        )
+        self.generation_stops = register(
+            Counter(
+                "locallingua_generation_stops_total",
+                "Generations by the reason they ended (stop, fence, repetition, length, ...).",
+                ("reason",),
+            )
+        )
+        self.admission_wait_seconds = register(
+            Histogram(
+                "locallingua_admission_wait_seconds",
+                "Time spent in the admission queue before reaching the translator.",
+            )
+        )
+        self.admission_rejections = register(
+            Counter(
+                "locallingua_admission_rejections_total",
+                "Requests rejected by admission control.",
+                ("reason",),
+            )
+        )
+        self.cancelled = register(
+            Counter(
+                "locallingua_cancelled_total",
+                "Requests abandoned mid-translation (client disconnect or deadline).",
+                ("reason",),
+            )
+        )
+        self.coalesced = register(
+            Counter(
+                "locallingua_coalesced_requests_total",
+                "Translations served by joining an identical request already in flight.",
+            )
+        )
+        self.live_sentences = register(
+            Counter(
+                "locallingua_live_sentences_total",
+                "Sentences of live sessions by outcome (translated, reused, cancelled).",
+                ("outcome",),
+            )
+        )
+        self.live_sessions = register(
+            Gauge("locallingua_live_sessions", "Open live translation connections.")
+        )
+        self.in_flight = register(
+            Gauge("locallingua_requests_in_flight", "Translation requests being served.")
+        )
+        register(
+            Gauge(
+                "locallingua_requests_queued",
+                "Requests waiting for an inference slot.",
+                queued,
+            )
+        )
+        register(
+            Gauge(
+                "locallingua_model_load_seconds",
+                "Time it took to load the model.",
+                model_load_seconds,
+            )
+        )
+
+    def _acceptance_ratio(self) -> float | None:
+        drafted = self.draft_tokens.value()
+        return self.accepted_tokens.value() / drafted if drafted else None
+
+    def _speculative_speedup(self) -> float | None:
+        speculative = self.tokens_per_second.mean(decoding="speculative")
+        plain = self.tokens_per_second.mean(decoding="plain")
+        return speculative / plain if speculative and plain else None
+
+    def track(self, endpoint: str, **labels: str) -> RequestTracker:
+        return RequestTracker(self, endpoint, labels)
+
+    def observe_translation(self, result, *, cached: bool) -> None:
+        """Record the per-stage timings and token counts of one translator result."""
+        if cached:
+            return
+        for histogram, ms in (
+            (self.queue_seconds, result.queue_ms),
+            (self.prompt_eval_seconds, result.prompt_eval_ms),
+            (self.generation_seconds, result.generation_ms),
+            (self.sanitize_seconds, result.sanitize_ms),
+        ):
+            if ms is not None:
+                histogram.observe(ms / 1000)
+        if result.prompt_tokens:
+            self.prompt_tokens.inc(result.prompt_tokens)
+        if result.completion_tokens:
+            self.completion_tokens.inc(result.completion_tokens)
+            if result.generation_ms:
+                self.tokens_per_second.observe(
+                    result.completion_tokens / (result.generation_ms / 1000),
+                    decoding="plain" if result.draft_tokens is None else "speculative",
+                )
+        if result.draft_tokens:
+            self.draft_tokens.inc(result.draft_tokens)
+            self.accepted_tokens.inc(result.accepted_tokens or 0)
+        if result.stop_reason:
+            self.generation_stops.inc(reason=result.stop_reason)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+class RequestTracker:
+    """
+    Counts one request: in flight between start() and finish(), then its outcome and latency.
+    Used as a context manager for plain endpoints; streams call start()/finish() themselves
+    and set ``status`` for failures reported to the client as events instead of raised.
+    """
+
+    def __init__(self, metrics: ServiceMetrics, endpoint: str, labels: dict[str, str]) -> None:
+        self._metrics = metrics
+        self._endpoint = endpoint
+        self._labels = labels
+        self.status = "ok"
+        self._start = 0.0
+
+    def start(self) -> RequestTracker:
+        self._start = time.perf_counter()
+        self._metrics.in_flight.inc()
+        return self
+
+    def finish(self, exc: BaseException | None = None) -> None:
+        if exc is not None and self.status == "ok":
+            self.status = exc.code if isinstance(exc, ApiError) else "INTERNAL_ERROR"
+        self._metrics.in_flight.dec()
+        self._metrics.requests.inc(endpoint=self._endpoint, status=self.status, **self._labels)
+        self._metrics.request_seconds.observe(
+            time.perf_counter() - self._start,
+            endpoint=self._endpoint,
+        )
+
+    def __enter__(self) -> RequestTracker:
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.finish(exc)
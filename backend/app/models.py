@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Literal
+from typing import Annotated, Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -21,19 +21,157 @@ class TranslateRequest(BaseModel):
     options: TranslateOptions = Field(default_factory=TranslateOptions)
 
 
+class TranslateBatchRequest(BaseModel):
+    texts: list[Annotated[str, Field(min_length=1, max_length=10_000)]] = Field(
+        min_length=1, max_length=64
+    )
+    source_lang: str = Field(default="auto")
+    target_lang: str
+    options: TranslateOptions = Field(default_factory=TranslateOptions)
+
+
+class TranslateMultiRequest(BaseModel):
+    text: str = Field(min_length=1, max_length=10_000)
+    source_lang: str = Field(default="auto")
+    # Repeated codes are translated once.
+    target_langs: list[str] = Field(min_length=1, max_length=32)
+    options: TranslateOptions = Field(default_factory=TranslateOptions)
+
+
+class LiveConfigMessage(BaseModel):
+    source_lang: str = Field(default="auto")
+    target_lang: str
+    options: TranslateOptions = Field(default_factory=TranslateOptions)
+
+
+class LiveTextMessage(BaseModel):
+    text: str
+    # Echoed in the replies so the client can drop output for text it has since changed.
+    rev: int | None = None
+
+
+class LiveEditMessage(BaseModel):
+    # Replaces text[start:end] of the session's current text.
+    start: int = Field(ge=0)
+    end: int = Field(ge=0)
+    text: str = ""
+    rev: int | None = None
+
+
+class TimingBreakdown(BaseModel):
+    # Detection plus translation; smart mode's retry and long inputs' segments add up.
+    total_ms: float
+    # Admission control plus waiting for an inference slot.
+    queue_ms: float
+    detect_ms: float
+    prompt_eval_ms: float
+    generation_ms: float
+    prompt_tokens: int
+    completion_tokens: int
+    tokens_per_second: float | None = None
+    # Model calls made: 0 when served from the cache, 2 when smart mode retried.
+    passes: int
+    retried: bool
+    cached: bool
+
+
 class TranslateResponse(BaseModel):
     translated_text: str
     detected_source_lang: str | None
     detection_confidence: float | None = None
     used_mode: Literal["literal", "natural"] | None = None
     latency_ms: int
+    cached: bool = False
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    # Registered model that served the request (LOCALLINGUA_MODEL_NAME without a registry).
+    model: str | None = None
+    # Only with `?timing=true`; the Server-Timing header carries the durations either way.
+    timing: TimingBreakdown | None = None
+
+
+class TranslateBatchResponse(BaseModel):
+    # Results are returned in the same order as the submitted texts.
+    results: list[TranslateResponse]
+    latency_ms: int
+
+
+class TranslateMultiResponse(BaseModel):
+    # Keyed by target language, in the order requested; the source is detected once.
+    results: dict[str, TranslateResponse]
+    detected_source_lang: str | None
+    detection_confidence: float | None = None
+    latency_ms: int
 
 
 class HealthResponse(BaseModel):
     status: str = "ok"
     model_loaded: bool
     model_name: str | None
+    # Registered models with their load state, when a model registry is configured.
+    models: list[dict[str, Any]] | None = None
+
+
+class LivenessResponse(BaseModel):
+    status: str = "ok"
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    state: Literal["lazy", "loading", "warming", "ready", "failed"]
+    model_loaded: bool
+    model_name: str | None
+    load_ms: float | None = None
+    warmup_ms: float | None = None
+    warmup_prompts: int = 0
+    model: dict[str, Any] = Field(default_factory=dict)
+    error: str | None = None
+    # Cold-start phases of this process in ms, plus their "total".
+    startup: dict[str, float] = Field(default_factory=dict)
 
 
 class LanguagesResponse(BaseModel):
     languages: list[dict[str, Any]]
+
+
+class SlowRequestsResponse(BaseModel):
+    capacity: int
+    window_s: float
+    # Slowest first: endpoint, time (`at`, epoch seconds), input size, languages, mode and
+    # the request's timing breakdown.
+    requests: list[dict[str, Any]]
+
+
+class StatsResponse(BaseModel):
+    cache: dict[str, Any] | None = None
+    translator: dict[str, Any] | None = None
+    smart: dict[str, Any] | None = None
+    admission: dict[str, Any] | None = None
+    documents: dict[str, Any] | None = None
+    coalescing: dict[str, Any] | None = None
+
+
+JobStatus = Literal["queued", "running", "completed", "failed", "cancelled"]
+
+
+class DocumentJobResponse(BaseModel):
+    id: str
+    status: JobStatus
+    format: str
+    filename: str | None = None
+    source_lang: str
+    target_lang: str
+    detected_source_lang: str | None = None
+    segments_total: int
+    segments_done: int
+    # Segments the model returned nothing for; their source text is kept in the output.
+    segments_untranslated: int = 0
+    # segments_done / segments_total (1.0 for documents with nothing to translate).
+    progress: float
+    error: dict[str, str] | None = None
+    created_at: float
+    finished_at: float | None = None
+
+
+class JobListResponse(BaseModel):
+    jobs: list[DocumentJobResponse]
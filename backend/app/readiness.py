@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Literal
+
+from .translator.base import Translator
+
+logger = logging.getLogger(__name__)
+
+# Representative inputs, shortest first: a greeting, a UI string and a short paragraph.
+WARMUP_TEXTS = [
+    "Hello!",
+    "Please save your changes before closing this window.",
+    (
+        "Thank you for contacting support. We have received your request and a member of "
+        "our team will get back to you within two business days.\n"
+        "In the meantime, you can check the status of your order in your account."
+    ),
+]
+
+
+@dataclass
+class Readiness:
+    eager: bool
+    state: Literal["lazy", "loading", "warming", "ready", "failed"] = "lazy"
+    load_ms: float | None = None
+    warmup_ms: float | None = None
+    warmup_prompts: int = 0
+    error: str | None = None
+
+
+def warmup_requests(prompts_per_mode: int) -> list[dict]:
+    texts = WARMUP_TEXTS[: max(0, prompts_per_mode)]
+    return [
+        {
+            "text": text,
+            "source_lang": "en",
+            "target_lang": "es",
+            "options": {
+                "mode": mode,
+                "temperature": 0.0,
+                "top_p": 1.0,
+                "max_tokens": 64,
+                "seed": 42,
+            },
+        }
+        for mode in ("literal", "natural")
+        for text in texts
+    ]
+
+
+async def prepare_translator(
+    translator: Translator,
+    readiness: Readiness,
+    *,
+    warmup_prompts: int,
+) -> None:
+    """Load the model, then run the warmup prompts; readiness flips to "ready" only after both."""
+    try:
+        readiness.state = "loading"
+        start = time.perf_counter()
+        await translator.load()
+        readiness.load_ms = (time.perf_counter() - start) * 1000
+
+        requests = warmup_requests(warmup_prompts)
+        readiness.state = "warming"
+        start = time.perf_counter()
+        if requests:
+            await translator.warmup(requests)
+        readiness.warmup_ms = (time.perf_counter() - start) * 1000
+        readiness.warmup_prompts = len(requests)
+        readiness.state = "ready"
+    except Exception as exc:
+        logger.exception("Model load/warmup failed")
+        readiness.state = "failed"
+        readiness.error = f"{type(exc).__name__}: {exc}"
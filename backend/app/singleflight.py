@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call(Generic[T]):
+    task: asyncio.Future[T]
+    waiters: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces identical in-flight calls.
+
+    The first caller for a key runs the work as its own task; callers arriving with the same
+    key while it runs wait for that task instead of starting another. Waiters are counted:
+    when the last one is cancelled (its client went away or hit its deadline) the work is
+    cancelled too, so a generation nobody waits for does not keep its inference slot.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call[T]] = {}
+        self._started = 0
+        self._coalesced = 0
+        self._abandoned = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Run `fn()` or join the pending run for `key`; returns (result, joined)."""
+        call = self._calls.get(key)
+        joined = call is not None
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self._started += 1
+        else:
+            self._coalesced += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), joined
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Every waiter is gone; later callers start a fresh run.
+                self._forget(key, call)
+                call.task.cancel()
+                self._abandoned += 1
+
+    def _forget(self, key: str, call: _Call[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "started": self._started,
+            "coalesced": self._coalesced,
+            "abandoned": self._abandoned,
+        }
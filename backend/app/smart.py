@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Literal
+
+# Inputs up to this many words are counted in the "short" bucket; greetings and one-word UI
+# strings are where the literal pass most often echoes the input.
+SHORT_INPUT_WORDS = 3
+
+
+@dataclass
+class _Outcomes:
+    literal_runs: int = 0
+    passthroughs: int = 0
+
+    @property
+    def rate(self) -> float:
+        return self.passthroughs / self.literal_runs if self.literal_runs else 0.0
+
+
+@dataclass(frozen=True)
+class SmartPlannerConfig:
+    enabled: bool = True
+    # Observed literal passes needed before a bucket's passthrough rate is trusted.
+    min_samples: int = 8
+    # Passthrough rate at or above which smart mode goes straight to natural.
+    natural_rate: float = 0.5
+    # Every Nth request predicted as natural still runs literal first, so the estimate keeps
+    # tracking the model instead of freezing once natural is chosen.
+    explore_every: int = 20
+
+
+class SmartModePlanner:
+    """
+    Chooses the first pass of smart mode and accounts for what the natural retry costs.
+
+    Smart mode runs literal and retries with natural when the literal output just echoes the
+    input. The planner learns per (source, target, length bucket) how often that happens and
+    starts with natural when the retry is likely anyway, saving the wasted literal pass.
+    Buckets without enough samples fall back to the rate across all pairs for that bucket.
+    """
+
+    def __init__(self, config: SmartPlannerConfig | None = None) -> None:
+        self._config = config or SmartPlannerConfig()
+        self._lock = threading.Lock()
+        self._outcomes: dict[tuple[str, str, str], _Outcomes] = {}
+        self._bucket_outcomes: dict[str, _Outcomes] = {}
+        self._predicted_natural = 0
+        self._requests = 0
+        self._literal_first = 0
+        self._natural_first = 0
+        self._retries = 0
+        self._retries_rescued = 0
+        self._wasted_ms = 0.0
+        self._retry_ms = 0.0
+
+    @staticmethod
+    def bucket(text: str) -> str:
+        return "short" if len(text.split()) <= SHORT_INPUT_WORDS else "long"
+
+    def first_mode(self, *, text: str, source_lang: str, target_lang: str) -> Literal[
+        "literal", "natural"
+    ]:
+        bucket = self.bucket(text)
+        with self._lock:
+            self._requests += 1
+            mode = "literal"
+            if self._config.enabled and self._predict_passthrough(
+                (source_lang, target_lang, bucket), bucket
+            ):
+                self._predicted_natural += 1
+                explore = self._config.explore_every
+                if not explore or self._predicted_natural % explore:
+                    mode = "natural"
+            if mode == "natural":
+                self._natural_first += 1
+            else:
+                self._literal_first += 1
+            return mode
+
+    def _predict_passthrough(self, key: tuple[str, str, str], bucket: str) -> bool:
+        outcomes = self._outcomes.get(key)
+        if outcomes is None or outcomes.literal_runs < self._config.min_samples:
+            outcomes = self._bucket_outcomes.get(bucket)
+        if outcomes is None or outcomes.literal_runs < self._config.min_samples:
+            return False
+        return outcomes.rate >= self._config.natural_rate
+
+    def record_literal(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        passthrough: bool,
+        elapsed_ms: float,
+    ) -> None:
+        """Record a literal pass that was eligible for the natural retry."""
+        bucket = self.bucket(text)
+        with self._lock:
+            for outcomes in (
+                self._outcomes.setdefault((source_lang, target_lang, bucket), _Outcomes()),
+                self._bucket_outcomes.setdefault(bucket, _Outcomes()),
+            ):
+                outcomes.literal_runs += 1
+                outcomes.passthroughs += int(passthrough)
+            if passthrough:
+                self._wasted_ms += elapsed_ms
+
+    def record_retry(self, *, elapsed_ms: float, rescued: bool) -> None:
+        with self._lock:
+            self._retries += 1
+            self._retries_rescued += int(rescued)
+            self._retry_ms += elapsed_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            pairs = {
+                f"{src}->{tgt}:{bucket}": {
+                    "literal_runs": o.literal_runs,
+                    "passthrough_rate": round(o.rate, 3),
+                }
+                for (src, tgt, bucket), o in self._outcomes.items()
+            }
+            return {
+                "precheck": self._config.enabled,
+                "requests": self._requests,
+                "literal_first": self._literal_first,
+                "natural_first": self._natural_first,
+                "retries": self._retries,
+                "retry_rate": self._retries / self._requests if self._requests else 0.0,
+                "retries_rescued": self._retries_rescued,
+                # Literal passes that were thrown away, and the extra natural passes they caused.
+                "wasted_literal_ms": round(self._wasted_ms, 1),
+                "retry_ms": round(self._retry_ms, 1),
+                "pairs": pairs,
+            }
@@ -0,0 +1,106 @@
+"""
+Measure the service's cold start against a time budget.
+
+    uv run python -m app.startup --budget-ms 2000
+
+Imports the app, builds it and runs its startup the way uvicorn does, then prints the
+per-phase timing report as JSON. Exits with status 1 when the total is over the budget
+(default: LOCALLINGUA_STARTUP_BUDGET_MS, else 2000 ms). With LOCALLINGUA_EAGER_LOAD=1 the
+report also waits for the model load and warmup, which are not part of the budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET_MS = 2000
+
+
+@dataclass
+class StartupReport:
+    """Milliseconds spent in each cold-start phase, in the order the phases ran."""
+
+    phases: dict[str, float] = field(default_factory=dict)
+    _last: float = field(default_factory=time.perf_counter, repr=False)
+
+    @classmethod
+    def since_import(cls, started: float, imported: float) -> StartupReport:
+        report = cls()
+        report.phases["import"] = round((imported - started) * 1000, 2)
+        return report
+
+    def mark(self, phase: str) -> None:
+        """Close `phase`: it took the time since the previous mark."""
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self._last) * 1000, 2)
+        self._last = now
+
+    @property
+    def total_ms(self) -> float:
+        return round(sum(self.phases.values()), 2)
+
+    def as_dict(self) -> dict[str, float]:
+        return {**self.phases, "total": self.total_ms}
+
+    def log(self) -> None:
+        phases = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases.items())
+        logger.info("Cold start took %.0f ms (%s)", self.total_ms, phases)
+
+
+async def _cold_start() -> dict:
+    from .main import create_app
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        report = app.state.startup.as_dict()
+        prepare_task = getattr(app.state, "prepare_task", None)
+        if prepare_task is not None:
+            await prepare_task
+        readiness = app.state.readiness
+    return {
+        "phases": report,
+        "state": readiness.state,
+        "load_ms": readiness.load_ms,
+        "warmup_ms": readiness.warmup_ms,
+        "error": readiness.error,
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.environ.get("LOCALLINGUA_STARTUP_BUDGET_MS") or DEFAULT_BUDGET_MS),
+        help="fail when import-to-ready takes longer",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    result = asyncio.run(_cold_start())
+    total = result["phases"]["total"]
+    result["budget_ms"] = args.budget_ms
+    result["within_budget"] = total <= args.budget_ms
+    print(json.dumps(result, indent=2))
+    if not result["within_budget"]:
+        print(
+            f"Cold start took {total:.0f} ms, over the {args.budget_ms:.0f} ms budget",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from .translator.base import TranslationResult
+
+# Server-Timing metric names, in header order.
+_PHASES = ("queue", "detect", "prompt_eval", "generation")
+
+
+@dataclass
+class RequestTiming:
+    """
+    Where the time of one translation request went. Smart mode's second pass and the
+    segments of a long input add up; `queue_ms` is the admission wait plus the wait for an
+    inference slot.
+    """
+
+    total_ms: float = 0.0
+    queue_ms: float = 0.0
+    detect_ms: float = 0.0
+    prompt_eval_ms: float = 0.0
+    generation_ms: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Model calls: 0 for a cache hit, 2 when smart mode retried with natural mode.
+    passes: int = 0
+    retried: bool = False
+    cached: bool = False
+
+    def add(self, result: TranslationResult) -> None:
+        """Count one translator call; cache hits carry the timings of the original call."""
+        if result.cached:
+            self.cached = True
+            return
+        self.passes += 1
+        self.queue_ms += result.queue_ms or 0.0
+        self.prompt_eval_ms += result.prompt_eval_ms or 0.0
+        self.generation_ms += result.generation_ms or 0.0
+        self.prompt_tokens += result.prompt_tokens or 0
+        self.completion_tokens += result.completion_tokens or 0
+
+    @classmethod
+    def merge(cls, timings: Iterable[RequestTiming], *, total_ms: float) -> RequestTiming:
+        """Concurrent parts of one request: model time adds up, while queue wait overlaps."""
+        merged = cls(total_ms=total_ms)
+        for timing in timings:
+            merged.queue_ms = max(merged.queue_ms, timing.queue_ms)
+            merged.detect_ms = max(merged.detect_ms, timing.detect_ms)
+            merged.prompt_eval_ms += timing.prompt_eval_ms
+            merged.generation_ms += timing.generation_ms
+            merged.prompt_tokens += timing.prompt_tokens
+            merged.completion_tokens += timing.completion_tokens
+            merged.passes += timing.passes
+            merged.retried = merged.retried or timing.retried
+            merged.cached = merged.cached or timing.cached
+        return merged
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        if not self.completion_tokens or not self.generation_ms:
+            return None
+        return round(self.completion_tokens / (self.generation_ms / 1000), 1)
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": round(self.total_ms, 1),
+            "queue_ms": round(self.queue_ms, 1),
+            "detect_ms": round(self.detect_ms, 1),
+            "prompt_eval_ms": round(self.prompt_eval_ms, 1),
+            "generation_ms": round(self.generation_ms, 1),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tokens_per_second": self.tokens_per_second,
+            "passes": self.passes,
+            "retried": self.retried,
+            "cached": self.cached,
+        }
+
+    def server_timing(self) -> str:
+        """The `Server-Timing` header value (durations in ms)."""
+        entries = [f"{name};dur={getattr(self, name + '_ms'):.1f}" for name in _PHASES]
+        if self.cached:
+            entries.append('cache;desc="hit"')
+        if self.retried:
+            entries.append('retry;desc="natural"')
+        entries.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(entries)
+
+
+@dataclass(frozen=True)
+class SlowRequest:
+    at: float
+    endpoint: str
+    input_chars: int
+    source_lang: str
+    target_lang: str
+    mode: str
+    timing: dict = field(default_factory=dict)
+
+
+class SlowRequestLog:
+    """
+    The `capacity` slowest requests of the last `window_s` seconds, for chasing tail
+    latency. A min-heap on total time: a new request only displaces the fastest kept one.
+    """
+
+    def __init__(self, capacity: int, *, window_s: float = 3600.0) -> None:
+        self._capacity = capacity
+        self._window_s = window_s
+        self._heap: list[tuple[float, int, SlowRequest]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def record(self, request: SlowRequest) -> None:
+        if self._capacity <= 0:
+            return
+        item = (request.timing.get("total_ms", 0.0), next(self._seq), request)
+        with self._lock:
+            self._expire()
+            if len(self._heap) < self._capacity:
+                heapq.heappush(self._heap, item)
+            elif item[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def slowest(self) -> list[SlowRequest]:
+        with self._lock:
+            self._expire()
+            items = sorted(self._heap, reverse=True)
+        return [request for _, _, request in items]
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self._window_s
+        if any(request.at < cutoff for _, _, request in self._heap):
+            self._heap = [item for item in self._heap if item[2].at >= cutoff]
+            heapq.heapify(self._heap)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def window_s(self) -> float:
+        return self._window_s
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 
 
@@ -7,6 +8,29 @@ from dataclasses import dataclass
 class TranslationResult:
     translated_text: str
     detected_source_lang: str | None
+    cached: bool = False
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    prompt_eval_ms: float | None = None
+    generation_ms: float | None = None
+    # Time spent waiting for an inference slot, and post-processing the raw model output.
+    queue_ms: float | None = None
+    sanitize_ms: float | None = None
+    # Speculative decoding: tokens drafted and accepted by the model (None = plain decoding).
+    draft_tokens: int | None = None
+    accepted_tokens: int | None = None
+    # Name of the registered model that produced the translation (set by RoutingTranslator).
+    model: str | None = None
+    # Why generation ended: "stop" (end of sequence or a prompt label), "fence" (closed code
+    # fence), "repetition" (runaway loop), "length" (hit max_tokens) or "cancelled".
+    stop_reason: str | None = None
+
+
+@dataclass(frozen=True)
+class TranslationChunk:
+    # Incremental text; the last chunk of a stream carries the complete result instead.
+    delta: str
+    result: TranslationResult | None = None
 
 
 class Translator:
@@ -20,3 +44,125 @@ class Translator:
     ) -> TranslationResult:
         raise NotImplementedError
 
+    async def translate_stream(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> AsyncIterator[TranslationChunk]:
+        """
+        Yield translation deltas followed by one final chunk carrying the full result.
+        Translators without native streaming emit the whole translation as a single delta.
+        """
+        result = await self.translate(
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        )
+        if result.translated_text:
+            yield TranslationChunk(delta=result.translated_text)
+        yield TranslationChunk(delta="", result=result)
+
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    async def load(self) -> None:
+        """Load model weights ahead of the first request (no-op for translators without any)."""
+
+    async def warmup(self, requests: list[dict]) -> None:
+        """Run representative translations so the first real request hits warm caches."""
+        for request in requests:
+            await self.translate(**request)
+
+    def model_info(self) -> dict:
+        """Static model/context parameters reported by the readiness endpoint."""
+        return {}
+
+    def stats(self) -> dict:
+        """Runtime counters for /api/stats; empty when the translator keeps none."""
+        return {}
+
+    def queue_depth(self) -> int:
+        """Requests currently waiting for an inference slot."""
+        return 0
+
+    async def close(self) -> None:
+        """Release background threads or processes; called on app shutdown."""
+
+    def fingerprint(self) -> str:
+        """Identify the model behind this translator (used to key cached results)."""
+        return self.__class__.__name__
+
+
+class WrappingTranslator(Translator):
+    """Base for translators layered over another one; delegates everything by default."""
+
+    def __init__(self, inner: Translator) -> None:
+        self.inner = inner
+
+    async def translate(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> TranslationResult:
+        return await self.inner.translate(
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        )
+
+    async def translate_stream(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> AsyncIterator[TranslationChunk]:
+        async for chunk in self.inner.translate_stream(
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        ):
+            yield chunk
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.inner.is_loaded
+
+    async def load(self) -> None:
+        await self.inner.load()
+
+    async def warmup(self, requests: list[dict]) -> None:
+        await self.inner.warmup(requests)
+
+    def model_info(self) -> dict:
+        return self.inner.model_info()
+
+    def stats(self) -> dict:
+        return self.inner.stats()
+
+    def queue_depth(self) -> int:
+        return self.inner.queue_depth()
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    def fingerprint(self) -> str:
+        return self.inner.fingerprint()
+
+
+def unwrap_translator(translator: Translator) -> Translator:
+    """Return the innermost translator beneath any WrappingTranslator layers."""
+    while isinstance(translator, WrappingTranslator):
+        translator = translator.inner
+    return translator
@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+# Prompt tokens a new sequence must share with a running one before it copies that
+# sequence's KV cells instead of evaluating the prefix itself.
+MIN_SHARED_PREFIX = 16
+
+
+@dataclass(frozen=True)
+class BatchSchedulerConfig:
+    max_sequences: int
+    # KV budget per sequence; the shared context is max_sequences * n_ctx_per_sequence.
+    n_ctx_per_sequence: int = 2048
+    n_threads: int | None = None
+
+
+@dataclass(frozen=True)
+class Completion:
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    # Wait before admission, the decode step that evaluated the prompt, and the steps after it.
+    queue_ms: float | None = None
+    prompt_eval_ms: float | None = None
+    generation_ms: float | None = None
+    # "stop" (end of sequence or the caller's stop check) or "length" (hit max_tokens).
+    finish_reason: str = "stop"
+
+
+@dataclass
+class _Sequence:
+    prompt: str
+    temperature: float
+    top_p: float
+    max_tokens: int
+    seed: int | None
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    # Called with every sampled token; True ends the sequence after it.
+    stop: Callable[[int], bool] | None = None
+    finish_reason: str = "stop"
+    prompt_tokens: list[int] = field(default_factory=list)
+    tokens: list[int] = field(default_factory=list)
+    seq_id: int = -1
+    n_past: int = 0
+    batch_index: int = -1
+    rng: object = None
+    submitted_at: float = field(default_factory=time.perf_counter)
+    admitted_at: float = 0.0
+    first_token_at: float = 0.0
+    # Set from the event loop when the awaiting request is cancelled (client went away).
+    cancelled: bool = False
+
+
+class BatchScheduler:
+    """
+    Continuous-batching decode loop over one multi-sequence llama.cpp context.
+
+    Every step decodes one token for each running sequence plus the full prompt of any newly
+    admitted ones in a single llama_decode call. Finished sequences free their KV slot
+    immediately so queued requests join the next step instead of waiting for the whole batch.
+    A prompt that starts like one already evaluated (the instructions, or one text fanned out
+    to several target languages) shares those KV cells and only evaluates the rest.
+    """
+
+    def __init__(self, llm, config: BatchSchedulerConfig) -> None:
+        self._llm = llm
+        self._config = config
+        self._incoming: queue.Queue[_Sequence | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._active = 0
+        # Sequences the decode loop has taken in but not admitted yet (no free slot).
+        self._waiting = 0
+        self._steps = 0
+        self._step_sequences = 0
+        self._generated_tokens = 0
+        self._shared_prompt_tokens = 0
+        self._cancelled = 0
+
+    async def submit(
+        self,
+        prompt: str,
+        *,
+        temperature: float,
+        top_p: float,
+        max_tokens: int,
+        seed: int | None,
+        stop: Callable[[int], bool] | None = None,
+    ) -> Completion:
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        seq = _Sequence(
+            prompt=prompt,
+            temperature=temperature,
+            top_p=top_p,
+            max_tokens=max_tokens,
+            seed=seed,
+            stop=stop,
+            loop=loop,
+            future=loop.create_future(),
+        )
+        self._incoming.put(seq)
+        try:
+            return await seq.future
+        except asyncio.CancelledError:
+            # The decode loop drops the sequence and frees its slot on its next step.
+            seq.cancelled = True
+            raise
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._incoming.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "max_sequences": self._config.max_sequences,
+            "active_sequences": self._active,
+            "queued": self._waiting + self._incoming.qsize(),
+            "steps": self._steps,
+            "generated_tokens": self._generated_tokens,
+            "shared_prompt_tokens": self._shared_prompt_tokens,
+            "cancelled": self._cancelled,
+            "mean_batch_occupancy": (self._step_sequences / self._steps) if self._steps else 0.0,
+        }
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="llama-batch-scheduler", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        import llama_cpp  # type: ignore
+        import numpy as np  # type: ignore  # shipped with llama-cpp-python
+
+        cfg = self._config
+        n_ctx = cfg.n_ctx_per_sequence * cfg.max_sequences
+        params = llama_cpp.llama_context_default_params()
+        params.n_ctx = n_ctx
+        # Prompts are admitted whole, so one decode call must be able to hold a full context.
+        params.n_batch = n_ctx
+        params.n_seq_max = cfg.max_sequences
+        if cfg.n_threads:
+            params.n_threads = cfg.n_threads
+            params.n_threads_batch = cfg.n_threads
+        ctx = llama_cpp.llama_new_context_with_model(self._llm.model, params)
+        batch = llama_cpp.llama_batch_init(n_ctx, 0, cfg.max_sequences)
+        n_vocab = self._llm.n_vocab()
+
+        free_slots = list(range(cfg.max_sequences))
+        running: list[_Sequence] = []
+        waiting: deque[_Sequence] = deque()
+        stopping = False
+
+        try:
+            while not stopping or running or waiting:
+                # Block only when idle; otherwise just drain whatever arrived meanwhile.
+                try:
+                    while not stopping:
+                        item = self._incoming.get(block=not running and not waiting)
+                        if item is None:
+                            stopping = True
+                            break
+                        waiting.append(item)
+                except queue.Empty:
+                    pass
+
+                if any(seq.cancelled for seq in running):
+                    for seq in running:
+                        if seq.cancelled:
+                            llama_cpp.llama_kv_cache_seq_rm(ctx, seq.seq_id, -1, -1)
+                            free_slots.append(seq.seq_id)
+                            self._cancelled += 1
+                    running = [seq for seq in running if not seq.cancelled]
+                if any(seq.cancelled for seq in waiting):
+                    self._cancelled += sum(1 for seq in waiting if seq.cancelled)
+                    waiting = deque(seq for seq in waiting if not seq.cancelled)
+
+                n_tokens = 0
+                # Sequences whose prompt is in the KV cache, before this step admits more.
+                evaluated = list(running)
+                for seq in running:
+                    self._add_token(batch, n_tokens, seq.tokens[-1], seq.n_past, seq.seq_id)
+                    seq.batch_index = n_tokens
+                    seq.n_past += 1
+                    n_tokens += 1
+
+                while waiting and free_slots:
+                    seq = waiting[0]
+                    if not seq.prompt_tokens:
+                        seq.prompt_tokens = self._llm.tokenize(seq.prompt.encode("utf-8"))
+                    budget = cfg.n_ctx_per_sequence - len(seq.prompt_tokens)
+                    if budget <= 0:
+                        waiting.popleft()
+                        self._resolve(seq, exc=ValueError("PROMPT_TOO_LONG"))
+                        continue
+                    source, shared = _longest_shared_prefix(seq.prompt_tokens, evaluated)
+                    _, pending = _longest_shared_prefix(seq.prompt_tokens, running)
+                    if pending >= shared + MIN_SHARED_PREFIX:
+                        # A sequence admitted in this step has more in common; wait one step
+                        # and copy its cells once they are evaluated.
+                        break
+                    if n_tokens + len(seq.prompt_tokens) - shared > n_ctx:
+                        break
+                    waiting.popleft()
+                    seq.max_tokens = min(seq.max_tokens, budget)
+                    seq.seq_id = free_slots.pop()
+                    seq.rng = np.random.default_rng(seq.seed)
+                    if shared:
+                        llama_cpp.llama_kv_cache_seq_cp(ctx, source.seq_id, seq.seq_id, 0, shared)
+                        self._shared_prompt_tokens += shared
+                    for pos in range(shared, len(seq.prompt_tokens)):
+                        self._add_token(batch, n_tokens, seq.prompt_tokens[pos], pos, seq.seq_id)
+                        n_tokens += 1
+                    batch.logits[n_tokens - 1] = True
+                    seq.batch_index = n_tokens - 1
+                    seq.n_past = len(seq.prompt_tokens)
+                    seq.admitted_at = time.perf_counter()
+                    running.append(seq)
+
+                if n_tokens == 0:
+                    self._waiting = len(waiting)
+                    continue
+                batch.n_tokens = n_tokens
+                self._active = len(running)
+                self._waiting = len(waiting)
+
+                rc = llama_cpp.llama_decode(ctx, batch)
+                if rc != 0:
+                    for seq in running:
+                        llama_cpp.llama_kv_cache_seq_rm(ctx, seq.seq_id, -1, -1)
+                        free_slots.append(seq.seq_id)
+                        self._resolve(seq, exc=RuntimeError(f"LLAMA_DECODE_FAILED:{rc}"))
+                    running.clear()
+                    continue
+
+                self._steps += 1
+                self._step_sequences += len(running)
+                step_done = time.perf_counter()
+                still_running: list[_Sequence] = []
+                for seq in running:
+                    logits_ptr = llama_cpp.llama_get_logits_ith(ctx, seq.batch_index)
+                    logits = np.ctypeslib.as_array(logits_ptr, shape=(n_vocab,))
+                    if not seq.first_token_at:
+                        seq.first_token_at = step_done
+                    token = _sample(np, logits, seq.temperature, seq.top_p, seq.rng)
+                    self._generated_tokens += 1
+                    if self._is_eog(llama_cpp, token):
+                        finished = True
+                    else:
+                        seq.tokens.append(token)
+                        finished = seq.stop is not None and seq.stop(token)
+                        if not finished and len(seq.tokens) >= seq.max_tokens:
+                            finished = True
+                            seq.finish_reason = "length"
+                    if finished:
+                        llama_cpp.llama_kv_cache_seq_rm(ctx, seq.seq_id, -1, -1)
+                        free_slots.append(seq.seq_id)
+                        self._resolve(seq)
+                    else:
+                        still_running.append(seq)
+                running = still_running
+                self._active = len(running)
+        except BaseException as exc:  # pragma: no cover - keep awaiting coroutines from hanging
+            for seq in [*running, *waiting]:
+                self._resolve(seq, exc=RuntimeError(f"BATCH_SCHEDULER_FAILED:{exc}"))
+            raise
+        finally:
+            llama_cpp.llama_batch_free(batch)
+            llama_cpp.llama_free(ctx)
+            self._active = self._waiting = 0
+
+    @staticmethod
+    def _add_token(batch, index: int, token: int, pos: int, seq_id: int) -> None:
+        batch.token[index] = token
+        batch.pos[index] = pos
+        batch.n_seq_id[index] = 1
+        batch.seq_id[index][0] = seq_id
+        batch.logits[index] = False
+
+    def _is_eog(self, llama_cpp, token: int) -> bool:
+        is_eog = getattr(llama_cpp, "llama_token_is_eog", None)
+        if is_eog is not None:
+            return bool(is_eog(self._llm.model, token))
+        return token == self._llm.token_eos()
+
+    def _resolve(self, seq: _Sequence, *, exc: BaseException | None = None) -> None:
+        if exc is not None:
+            seq.loop.call_soon_threadsafe(_set_exception, seq.future, exc)
+            return
+        now = time.perf_counter()
+        first_token_at = seq.first_token_at or now
+        completion = Completion(
+            text=self._llm.detokenize(seq.tokens).decode("utf-8", errors="ignore"),
+            prompt_tokens=len(seq.prompt_tokens),
+            completion_tokens=len(seq.tokens),
+            queue_ms=(seq.admitted_at - seq.submitted_at) * 1000,
+            prompt_eval_ms=(first_token_at - seq.admitted_at) * 1000,
+            generation_ms=(now - first_token_at) * 1000,
+            finish_reason=seq.finish_reason,
+        )
+        seq.loop.call_soon_threadsafe(_set_result, seq.future, completion)
+
+
+def _longest_shared_prefix(
+    tokens: list[int], candidates: list[_Sequence]
+) -> tuple[_Sequence | None, int]:
+    """
+    The candidate whose prompt shares the longest prefix with `tokens`, and its length (0
+    below MIN_SHARED_PREFIX). The last prompt token is never shared: it has to be decoded
+    for the new sequence's first logits.
+    """
+    best, best_len = None, 0
+    for seq in candidates:
+        n = 0
+        for a, b in zip(seq.prompt_tokens, tokens[:-1], strict=False):
+            if a != b:
+                break
+            n += 1
+        if n > best_len:
+            best, best_len = seq, n
+    if best_len < MIN_SHARED_PREFIX:
+        return None, 0
+    return best, best_len
+
+
+def _sample(np, logits, temperature: float, top_p: float, rng) -> int:
+    if temperature <= 0.0:
+        return int(np.argmax(logits))
+    scaled = logits.astype(np.float64) / temperature
+    scaled -= scaled.max()
+    probs = np.exp(scaled)
+    probs /= probs.sum()
+    order = np.argsort(-probs)
+    cutoff = int(np.searchsorted(np.cumsum(probs[order]), top_p)) + 1
+    keep = order[:cutoff]
+    return int(rng.choice(keep, p=probs[keep] / probs[keep].sum()))
+
+
+def _set_result(future: asyncio.Future, value: Completion) -> None:
+    if not future.done():
+        future.set_result(value)
+
+
+def _set_exception(future: asyncio.Future, exc: BaseException) -> None:
+    if not future.done():
+        future.set_exception(exc)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import deque
+from collections.abc import Callable
+
+import numpy as np
+
+from .prompt import PromptParts
+
+_LABEL_RE = re.compile(r"^([A-Z][A-Za-z ]{0,30}):", re.MULTILINE)
+
+# Runaway repetition: the last REPEAT_MIN_TOKENS tokens repeat a pattern of at most
+# REPEAT_MAX_PERIOD tokens at least REPEAT_MIN_CYCLES times.
+REPEAT_MAX_PERIOD = 16
+REPEAT_MIN_TOKENS = 48
+REPEAT_MIN_CYCLES = 4
+
+
+def stop_sequences(parts: PromptParts, source_text: str) -> list[str]:
+    """
+    Section labels of the prompt template ("TEXT:", "TRANSLATION:", "Source language:", ...)
+    at the start of a line: a model that writes one has finished translating and is
+    continuing the template. Labels that occur in the source text itself are left out.
+    """
+    labels = dict.fromkeys(f"\n{m.group(1)}:" for m in _LABEL_RE.finditer(parts.text))
+    return [label for label in labels if label.strip() not in source_text]
+
+
+def trim_at_stops(text: str, stops: list[str]) -> str:
+    """Cut `text` at the first stop sequence, like llama.cpp does for `stop`."""
+    cut = min((i for i in (text.find(s) for s in stops) if i >= 0), default=-1)
+    return text if cut < 0 else text[:cut]
+
+
+def is_runaway(tokens: list[int]) -> bool:
+    if len(tokens) < REPEAT_MIN_TOKENS:
+        return False
+    for period in range(1, REPEAT_MAX_PERIOD + 1):
+        length = max(REPEAT_MIN_TOKENS, period * REPEAT_MIN_CYCLES)
+        if len(tokens) < length:
+            break
+        tail = tokens[-length:]
+        if tail[period:] == tail[:-period]:
+            return True
+    return False
+
+
+class GenerationGuard:
+    """
+    Per-generation stop check, fed one sampled token at a time.
+
+    Stops once a fenced answer (```text ... ```) closes, when a prompt label shows up (for the
+    batching scheduler, which has no native stop strings) and on runaway repetition; `reason`
+    says which. Skipped when the source contains fences itself, since then they are content.
+    """
+
+    def __init__(
+        self,
+        detokenize: Callable[[list[int]], bytes],
+        *,
+        source_text: str,
+        stops: list[str] = (),
+        prefix: str = "",
+    ) -> None:
+        self._detokenize = detokenize
+        self._check_fence = "```" not in source_text
+        self._stops = [s.encode("utf-8") for s in stops]
+        self._text = prefix.encode("utf-8")
+        self._tokens: list[int] = []
+        self.reason: str | None = None
+
+    def feed(self, token: int) -> bool:
+        """Record `token`; True when generation should stop after it."""
+        self._tokens.append(token)
+        self._text += self._detokenize([token])
+        if self._check_fence:
+            head = self._text.lstrip()
+            if head.startswith(b"```") and b"\n```" in head[3:]:
+                self.reason = "fence"
+                return True
+        tail = self._text[-64:]
+        if any(stop in tail for stop in self._stops):
+            # Same outcome as llama.cpp's native stop strings.
+            self.reason = "stop"
+            return True
+        if is_runaway(self._tokens):
+            self.reason = "repetition"
+            return True
+        return False
+
+    def criterion(self):
+        """A llama-cpp-python stopping criterion (input_ids, logits) -> bool for this guard."""
+        start: list[int] = []
+
+        def _check(input_ids, _logits) -> bool:
+            # llama.cpp passes the evaluated tokens, which lag the newest sample by one: on
+            # the first call that is exactly the prompt.
+            if not start:
+                start.append(len(input_ids))
+            stop = self.reason is not None
+            for token in input_ids[start[0] + len(self._tokens) :]:
+                stop = self.feed(int(token)) or stop
+            return stop
+
+        return _check
+
+
+class OutputLengthPredictor:
+    """
+    Predicts a completion token budget from the input's token count, per language pair.
+
+    Keeps the last `window` output/input token ratios of generations that ended on their own
+    and budgets a margin over their 95th percentile; pairs with fewer than `min_samples`
+    observations get the generous `prior_ratio`. Budgets are never above the caller's
+    max_tokens, and a generation that hits a predicted budget is continued, so a bad guess
+    costs a second call rather than a truncated translation.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_samples: int = 16,
+        prior_ratio: float = 4.0,
+        margin: float = 1.25,
+        slack_tokens: int = 16,
+        window: int = 256,
+    ) -> None:
+        self._min_samples = min_samples
+        self._prior_ratio = prior_ratio
+        self._margin = margin
+        self._slack = slack_tokens
+        self._window = window
+        self._ratios: dict[tuple[str, str], deque[float]] = {}
+        self._lock = threading.Lock()
+        self._budgets = 0
+        self._budget_total = 0
+        self._continued = 0
+
+    def _ratio(self, pair: tuple[str, str]) -> float:
+        with self._lock:
+            ratios = list(self._ratios.get(pair, ()))
+        if len(ratios) < self._min_samples:
+            return self._prior_ratio
+        return float(np.quantile(ratios, 0.95)) * self._margin
+
+    def budget(self, *, source_lang: str, target_lang: str, input_tokens: int, max_tokens: int):
+        predicted = math.ceil(input_tokens * self._ratio((source_lang, target_lang))) + self._slack
+        budget = max(1, min(max_tokens, predicted))
+        self._budgets += 1
+        self._budget_total += budget
+        return budget
+
+    def record(
+        self,
+        *,
+        source_lang: str,
+        target_lang: str,
+        input_tokens: int,
+        output_tokens: int,
+    ) -> None:
+        """Learn from a generation that ended on its own (not cut off by a token limit)."""
+        ratio = output_tokens / max(1, input_tokens)
+        with self._lock:
+            ratios = self._ratios.get((source_lang, target_lang))
+            if ratios is None:
+                ratios = self._ratios[(source_lang, target_lang)] = deque(maxlen=self._window)
+            ratios.append(ratio)
+
+    def record_continuation(self) -> None:
+        self._continued += 1
+
+    def stats(self) -> dict:
+        return {
+            "pairs": len(self._ratios),
+            "mean_budget": (self._budget_total / self._budgets) if self._budgets else None,
+            "continued": self._continued,
+        }
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import re
+from collections.abc import AsyncIterator
 
-from .base import TranslationResult, Translator
+from .base import TranslationChunk, TranslationResult, Translator
 
 
 class FakeTranslator(Translator):
@@ -16,5 +18,29 @@ class FakeTranslator(Translator):
     ) -> TranslationResult:
         cleaned = re.sub(r"\s+", " ", text).strip()
         prefix = f"[fake {source_lang}->{target_lang}] "
-        return TranslationResult(translated_text=prefix + cleaned, detected_source_lang=None)
+        return TranslationResult(
+            translated_text=prefix + cleaned,
+            detected_source_lang=None,
+            prompt_tokens=len(cleaned.split()),
+            completion_tokens=len(cleaned.split()) + 2,
+        )
 
+    async def translate_stream(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> AsyncIterator[TranslationChunk]:
+        result = await self.translate(
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        )
+        # Emit word-sized deltas (keeping the separators) to mimic token streaming.
+        for piece in re.findall(r"\S+\s*", result.translated_text):
+            yield TranslationChunk(delta=piece)
+            await asyncio.sleep(0)
+        yield TranslationChunk(delta="", result=result)
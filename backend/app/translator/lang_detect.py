@@ -1,10 +1,27 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
+from pathlib import Path
 
-from langdetect import DetectorFactory, detect_langs
+import langdetect
+import numpy as np
+from langdetect.detector import Detector
+from langdetect.utils.ngram import NGram
+
+from ..languages import LANGUAGES
+
+# langdetect's smoothing: each n-gram contributes log(ALPHA / BASE_FREQ + p(ngram | lang)).
+_SMOOTHING = 0.5 / 10_000
+# langdetect ships Chinese as two profiles; both map onto our single "zh".
+_PROFILE_ALIASES = {"zh-cn": "zh", "zh-tw": "zh"}
+_MAX_TEXT_CHARS = 10_000
 
-DetectorFactory.seed = 42
 
 @dataclass(frozen=True)
 class Detection:
@@ -12,15 +29,204 @@ class Detection:
     confidence: float | None
 
 
+class LanguageDetector:
+    """
+    Naive-Bayes n-gram detector over langdetect's bundled profiles, restricted to `codes`.
+
+    Unlike langdetect's randomized sampling, every 1-3 gram of the input is scored at once
+    with a single NumPy gather-and-sum over a precomputed log-probability matrix, so results
+    are deterministic and a call costs one pass over the text.
+
+    Building the matrix means parsing every profile's JSON; `load(cache_dir)` keeps the built
+    tables in an `.npz` file keyed by the profiles and codes, so later processes map them
+    back in instead of rebuilding.
+    """
+
+    def __init__(self, codes: list[str], *, memo_size: int = 4096) -> None:
+        self._codes = list(dict.fromkeys(codes))
+        self._memo_size = memo_size
+        self._memo: OrderedDict[str, Detection] = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._index: dict[str, int] | None = None
+        self._log_probs: np.ndarray | None = None
+        self._column_codes: list[str] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._index is not None
+
+    def load(self, cache_dir: str | None = None) -> None:
+        if self._index is not None:
+            return
+        with self._load_lock:
+            if self._index is not None:
+                return
+            profiles_dir = Path(langdetect.__file__).parent / "profiles"
+            wanted = set(self._codes)
+            paths = [
+                (_PROFILE_ALIASES.get(path.name, path.name), path)
+                for path in sorted(profiles_dir.iterdir())
+            ]
+            paths = [(code, path) for code, path in paths if code in wanted]
+
+            cache_file = None
+            if cache_dir:
+                cache_file = Path(cache_dir).expanduser() / f"detector-{_tables_key(paths)}.npz"
+                if self._load_tables(cache_file):
+                    return
+
+            profiles = [
+                (code, json.loads(path.read_text(encoding="utf-8"))) for code, path in paths
+            ]
+            index: dict[str, int] = {}
+            for _, profile in profiles:
+                for gram in profile["freq"]:
+                    index.setdefault(gram, len(index))
+
+            probs = np.zeros((len(index), len(profiles)), dtype=np.float64)
+            for col, (_, profile) in enumerate(profiles):
+                n_words = profile["n_words"]
+                rows = [index[gram] for gram in profile["freq"]]
+                totals = [n_words[len(gram) - 1] for gram in profile["freq"]]
+                probs[rows, col] = np.fromiter(profile["freq"].values(), dtype=np.float64) / totals
+            self._log_probs = np.log(probs + _SMOOTHING).astype(np.float32)
+            self._column_codes = [code for code, _ in profiles]
+            self._index = index
+            if cache_file is not None:
+                self._save_tables(cache_file)
+
+    def _load_tables(self, path: Path) -> bool:
+        try:
+            with np.load(path, allow_pickle=False) as tables:
+                grams = tables["grams"].tolist()
+                log_probs = tables["log_probs"]
+                codes = tables["codes"].tolist()
+        except (OSError, KeyError, ValueError):
+            return False
+        self._log_probs = log_probs
+        self._column_codes = codes
+        self._index = dict(zip(grams, range(len(grams)), strict=True))
+        return True
+
+    def _save_tables(self, path: Path) -> None:
+        # Best effort: a read-only or full cache dir only costs the next start its rebuild.
+        tmp = path.with_suffix(f".{os.getpid()}.tmp.npz")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(
+                tmp,
+                grams=np.array(list(self._index)),
+                log_probs=self._log_probs,
+                codes=np.array(self._column_codes),
+            )
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+
+    def detect(self, text: str) -> Detection:
+        with self._memo_lock:
+            hit = self._memo.get(text)
+            if hit is not None:
+                self._memo.move_to_end(text)
+                return hit
+        detection = self.detect_many([text])[0]
+        with self._memo_lock:
+            self._memo[text] = detection
+            while len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+        return detection
+
+    def cached(self, text: str) -> Detection | None:
+        with self._memo_lock:
+            return self._memo.get(text)
+
+    def detect_many(self, texts: list[str]) -> list[Detection]:
+        """Score many texts with one scatter-add; rows of the result follow `texts`."""
+        self.load()
+        rows: list[int] = []
+        owners: list[int] = []
+        for i, text in enumerate(texts):
+            grams = [self._index[g] for g in _extract_ngrams(text) if g in self._index]
+            rows.extend(grams)
+            owners.extend([i] * len(grams))
+
+        scores = np.zeros((len(texts), self._log_probs.shape[1]), dtype=np.float64)
+        np.add.at(scores, np.asarray(owners, dtype=np.intp), self._log_probs[rows])
+        counts = np.bincount(np.asarray(owners, dtype=np.intp), minlength=len(texts))
+
+        results: list[Detection] = []
+        for i in range(len(texts)):
+            if counts[i] == 0:
+                results.append(Detection(code=None, confidence=None))
+                continue
+            row = scores[i] - scores[i].max()
+            probs = np.exp(row)
+            probs /= probs.sum()
+            by_code: dict[str, float] = {}
+            for code, p in zip(self._column_codes, probs, strict=True):
+                by_code[code] = by_code.get(code, 0.0) + float(p)
+            code, confidence = max(by_code.items(), key=lambda item: item[1])
+            results.append(Detection(code=code, confidence=confidence))
+        return results
+
+
+def _tables_key(paths: list[tuple[str, Path]]) -> str:
+    # A langdetect upgrade changes the profiles' sizes or mtimes and so the file name.
+    digest = hashlib.sha1(f"{_SMOOTHING}".encode())
+    for code, path in paths:
+        stat = path.stat()
+        digest.update(f"{code}:{path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+def _extract_ngrams(text: str) -> list[str]:
+    """langdetect's text cleaning and 1-3 gram extraction, without the random sampling."""
+    text = Detector.URL_RE.sub(" ", text[:_MAX_TEXT_CHARS])
+    text = Detector.MAIL_RE.sub(" ", text)
+    text = NGram.normalize_vi(text)
+
+    latin = sum(1 for ch in text if "A" <= ch <= "z")
+    non_latin = sum(1 for ch in text if ch >= "\u0300" and not "\u1e00" <= ch <= "\u1eff")
+    if latin * 2 < non_latin:
+        # Mostly non-Latin script: drop embedded Latin words (brand names, code, URLs).
+        text = "".join(ch for ch in text if ch < "A" or "z" < ch)
+
+    grams: list[str] = []
+    ngram = NGram()
+    for ch in text:
+        ngram.add_char(ch)
+        for n in (1, 2, 3):
+            gram = ngram.get(n)
+            if gram is not None:
+                grams.append(gram)
+    return grams
+
+
+_DETECTOR = LanguageDetector([lang.code for lang in LANGUAGES])
+
+
+def preload_detector(cache_dir: str | None = None) -> None:
+    _DETECTOR.load(cache_dir)
+
+
 def detect_language(text: str) -> Detection:
     try:
-        candidates = detect_langs(text)
+        return _DETECTOR.detect(text)
     except Exception:
         return Detection(code=None, confidence=None)
-    if not candidates:
-        return Detection(code=None, confidence=None)
-    best = candidates[0]
-    return Detection(
-        code=getattr(best, "lang", None),
-        confidence=getattr(best, "prob", None),
-    )
+
+
+def detect_languages(texts: list[str]) -> list[Detection]:
+    try:
+        return _DETECTOR.detect_many(texts)
+    except Exception:
+        return [Detection(code=None, confidence=None) for _ in texts]
+
+
+async def detect_language_async(text: str) -> Detection:
+    # Memo hits are answered inline; everything else is scored off the event loop.
+    hit = _DETECTOR.cached(text)
+    if hit is not None:
+        return hit
+    return await asyncio.to_thread(detect_language, text)
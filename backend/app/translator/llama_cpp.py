@@ -1,26 +1,137 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import hashlib
 import os
+import pickle
 import re
+import threading
 import time
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
 from dataclasses import dataclass
+from typing import Literal
 
-from .base import TranslationResult, Translator
-from .prompt import build_translation_prompt
+from .base import TranslationChunk, TranslationResult, Translator
+from .batching import BatchScheduler, BatchSchedulerConfig
+from .early_stop import GenerationGuard, OutputLengthPredictor, stop_sequences, trim_at_stops
+from .prefix_cache import PrefixStateCache
+from .prompt import PromptParts, build_translation_prompt_parts
+from .speculative import DraftCounter, build_draft_model
 
 
 @dataclass(frozen=True)
 class LlamaCppConfig:
     model_path: str
     max_concurrency: int
+    # >1 routes non-streaming requests through the continuous-batching scheduler.
+    batch_size: int = 1
+    batch_ctx: int = 2048
+    n_ctx: int = 4096
+    # None picks half the visible cores; worker processes pass their pinned share.
+    n_threads: int | None = None
+    # Threads for prompt evaluation (None = llama.cpp default) and its batch size in tokens.
+    n_threads_batch: int | None = None
+    n_batch: int = 512
+    # Memory-mapped weights are shared through the page cache across worker processes.
+    use_mmap: bool = True
+    use_mlock: bool = False
+    # Layers offloaded to a GPU/Metal device when llama.cpp was built with one (-1 = all).
+    n_gpu_layers: int = -1
+    # KV cache element type for keys and values (a KV_CACHE_TYPES name; None = f16).
+    kv_cache_type: str | None = None
+    # KV states kept for shared prompt prefixes (0 disables); "mode" shares the instruction
+    # block across language pairs, "pair" also includes the language lines.
+    prefix_cache_size: int = 0
+    prefix_cache_scope: Literal["mode", "pair"] = "pair"
+    # Pickled prefix KV states written after warmup and restored on load (restarts come back hot).
+    prefix_state_path: str | None = None
+    # Speculative decoding: "lookup" drafts from n-grams of the prompt (copied names, numbers,
+    # URLs), "draft" from a small GGUF with the same vocabulary. Not used by batching.
+    speculative: Literal["off", "lookup", "draft"] = "off"
+    draft_model_path: str | None = None
+    speculative_tokens: int = 10
+    # Every Nth generation decodes plainly so the speedup can be measured (0 = never).
+    speculative_baseline_every: int = 20
+    # Stop at prompt labels, closed code fences and runaway repetition, and cap max_tokens at
+    # a budget predicted per language pair (continuing past it when the guess was short).
+    early_stop: bool = True
+
+
+@dataclass(frozen=True)
+class _StopPlan:
+    stops: list[str]
+    source_text: str
+    pair: tuple[str, str]
+    input_tokens: int
+    max_tokens: int
+    budget: int
+
+
+# ggml_type values of the KV cache types worth trying on CPU.
+KV_CACHE_TYPES = {"f32": 0, "f16": 1, "q4_0": 2, "q4_1": 3, "q5_0": 6, "q5_1": 7, "q8_0": 8}
+
+
+def default_n_threads() -> int:
+    return max(1, (os.cpu_count() or 4) // 2)
+
+
+def llama_params(config: LlamaCppConfig) -> dict:
+    """Keyword arguments for llama_cpp.Llama built from the config (shared with autotune)."""
+    params = {
+        "model_path": config.model_path,
+        "n_ctx": config.n_ctx,
+        "n_threads": config.n_threads or default_n_threads(),
+        "n_batch": config.n_batch,
+        "n_gpu_layers": config.n_gpu_layers,
+        "use_mmap": config.use_mmap,
+        "use_mlock": config.use_mlock,
+    }
+    if config.n_threads_batch:
+        params["n_threads_batch"] = config.n_threads_batch
+    if config.kv_cache_type and config.kv_cache_type != "f16":
+        kv_type = KV_CACHE_TYPES[config.kv_cache_type]
+        params["type_k"] = kv_type
+        params["type_v"] = kv_type
+        # llama.cpp only supports a quantized V cache with flash attention.
+        params["flash_attn"] = True
+    return params
 
 
 class LlamaCppTranslator(Translator):
     def __init__(self, config: LlamaCppConfig) -> None:
         self._config = config
         self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        self._waiting = 0
+        self._cancelled = 0
+        self._load_ms: float | None = None
         self._llm = None
+        self._draft: DraftCounter | None = None
+        self._generations = 0
+        self._drafted = 0
+        self._accepted = 0
+        self._predictor = OutputLengthPredictor() if config.early_stop else None
+        self._stop_reasons: Counter[str] = Counter()
+        self._scheduler: BatchScheduler | None = None
+        self._prefix_cache = (
+            PrefixStateCache(config.prefix_cache_size) if config.prefix_cache_size > 0 else None
+        )
+        self._fingerprint: str | None = None
+
+    def fingerprint(self) -> str:
+        # File name + size + a hash of the GGUF header (metadata lives there) is enough to
+        # notice a swapped model without hashing gigabytes of weights.
+        if self._fingerprint is None:
+            path = self._config.model_path
+            try:
+                stat = os.stat(path)
+                with open(path, "rb") as fh:
+                    head = hashlib.sha256(fh.read(1 << 20)).hexdigest()[:16]
+                self._fingerprint = f"{os.path.basename(path)}:{stat.st_size}:{head}"
+            except OSError:
+                return f"{os.path.basename(path)}:missing"
+        return self._fingerprint
 
     def _load(self):
         if self._llm is not None:
@@ -34,59 +145,640 @@ class LlamaCppTranslator(Translator):
         if not os.path.exists(self._config.model_path):
             raise FileNotFoundError(self._config.model_path)
 
-        # Heuristic defaults for macOS. Users can tune later.
-        self._llm = Llama(
-            model_path=self._config.model_path,
-            n_ctx=4096,
-            n_threads=max(1, (os.cpu_count() or 4) // 2),
-            n_gpu_layers=-1,  # try GPU/Metal when available
+        start = time.perf_counter()
+        # Defaults suit a laptop; `python -m app.autotune` measures better ones for the host.
+        config = self._config
+        draft = build_draft_model(
+            config.speculative,
+            num_pred_tokens=config.speculative_tokens,
+            draft_model_path=config.draft_model_path,
+            n_ctx=config.n_ctx,
+            n_threads=self._n_threads(),
+            n_gpu_layers=config.n_gpu_layers,
         )
+        params = llama_params(config)
+        if draft is not None:
+            params["draft_model"] = draft
+        llm = Llama(**params)
+        draft_llm = getattr(getattr(draft, "_draft", None), "llm", None)
+        if draft_llm is not None and draft_llm.n_vocab() != llm.n_vocab():
+            raise RuntimeError("DRAFT_MODEL_INCOMPATIBLE")
+        self._llm, self._draft = llm, draft
+        self._load_ms = (time.perf_counter() - start) * 1000
         return self._llm
 
-    async def translate(
+    def _begin_speculation(self, llm) -> bool:
+        """Pick speculative or plain decoding for the next generation on `llm`."""
+        if self._draft is None:
+            return False
+        self._generations += 1
+        every = self._config.speculative_baseline_every
+        speculative = not (every and self._generations % every == 0)
+        llm.draft_model = self._draft if speculative else None
+        self._draft.begin()
+        return speculative
+
+    def _end_speculation(self, speculative: bool) -> tuple[int | None, int | None]:
+        if not speculative:
+            return None, None
+        drafted, accepted = self._draft.finish()
+        self._drafted += drafted
+        self._accepted += accepted
+        return drafted, accepted
+
+    @contextlib.asynccontextmanager
+    async def _slot(self):
+        """Hold one of the max_concurrency inference slots; yields the ms spent waiting."""
+        start = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            yield (time.perf_counter() - start) * 1000
+        finally:
+            self._semaphore.release()
+
+    def _n_threads(self) -> int:
+        return self._config.n_threads or default_n_threads()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._llm is not None
+
+    async def load(self) -> None:
+        async with self._semaphore:
+            await asyncio.to_thread(self._load)
+            if self._prefix_cache is not None and self._config.prefix_state_path:
+                await asyncio.to_thread(self._restore_prefix_states)
+
+    async def warmup(self, requests: list[dict]) -> None:
+        await super().warmup(requests)
+        if self._prefix_cache is not None and self._config.prefix_state_path:
+            async with self._semaphore:
+                await asyncio.to_thread(self._save_prefix_states)
+
+    def model_info(self) -> dict:
+        try:
+            size = os.path.getsize(self._config.model_path)
+        except OSError:
+            size = None
+        return {
+            "model_path": self._config.model_path,
+            "model_size_bytes": size,
+            "n_ctx": self._config.n_ctx,
+            "n_threads": self._n_threads(),
+            "n_threads_batch": self._config.n_threads_batch,
+            "n_batch": self._config.n_batch,
+            "batch_size": self._config.batch_size,
+            "use_mmap": self._config.use_mmap,
+            "use_mlock": self._config.use_mlock,
+            "kv_cache_type": self._config.kv_cache_type or "f16",
+            "speculative": self._config.speculative,
+        }
+
+    def _save_prefix_states(self) -> None:
+        path = self._config.prefix_state_path
+        payload = {
+            "fingerprint": self.fingerprint(),
+            "n_ctx": self._config.n_ctx,
+            "states": self._prefix_cache.export(),
+        }
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(payload, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        # Atomic replace: several worker processes may save the same file.
+        os.replace(tmp, path)
+
+    def _restore_prefix_states(self) -> None:
+        path = self._config.prefix_state_path
+        try:
+            with open(path, "rb") as fh:
+                payload = pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return
+        # States are only valid for the exact model and context size they were saved from.
+        if payload.get("fingerprint") != self.fingerprint():
+            return
+        if payload.get("n_ctx") != self._config.n_ctx:
+            return
+        self._prefix_cache.restore(payload.get("states") or {})
+
+    def _prompt_parts(
         self,
         *,
         text: str,
         source_lang: str,
         target_lang: str,
         options: dict,
-    ) -> TranslationResult:
+    ) -> PromptParts:
         requested_mode = options.get("mode") or "literal"
         mode = "natural" if requested_mode == "natural" else "literal"
-        prompt = build_translation_prompt(
+        hint = options.get("memory_hint")
+        return build_translation_prompt_parts(
             text=text,
             source_lang=source_lang,
             target_lang=target_lang,
             mode=mode,
+            reference=(hint["source"], hint["target"]) if hint else None,
+            target_last=bool(options.get("target_last")),
         )
 
-        async with self._semaphore:
-            llm = self._load()
+    @staticmethod
+    def _sampling(options: dict) -> dict:
+        return {
+            "temperature": float(options.get("temperature", 0.2)),
+            "top_p": float(options.get("top_p", 0.9)),
+            "max_tokens": int(options.get("max_tokens", 512)),
+            "seed": options.get("seed", 42),
+        }
+
+    def _prepare_context(self, llm, parts: PromptParts) -> tuple[str, float]:
+        """
+        Restore or evaluate the shared prompt prefix, then reset llama.cpp perf counters.
+        Returns the prefix-cache outcome and the time spent evaluating a missed prefix.
+        """
+        outcome, prefix_ms = "off", 0.0
+        if self._prefix_cache is not None:
             start = time.perf_counter()
+            outcome = self._prefix_cache.prime(llm, parts.prefix(self._config.prefix_cache_scope))
+            if outcome == "miss":
+                prefix_ms = (time.perf_counter() - start) * 1000
+        _reset_perf(llm)
+        return outcome, prefix_ms
+
+    def _read_timings(
+        self,
+        llm,
+        prepared: tuple[str, float],
+    ) -> tuple[float | None, float | None]:
+        outcome, prefix_ms = prepared
+        prompt_eval_ms, generation_ms = _read_perf(llm)
+        if prompt_eval_ms is not None:
+            prompt_eval_ms += prefix_ms
+            if self._prefix_cache is not None:
+                self._prefix_cache.record_prompt_eval(outcome, prompt_eval_ms)
+        return prompt_eval_ms, generation_ms
+
+    def _stop_plan(
+        self,
+        llm,
+        parts: PromptParts,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        max_tokens: int,
+    ) -> _StopPlan | None:
+        if self._predictor is None:
+            return None
+        input_tokens = len(llm.tokenize(text.encode("utf-8"), add_bos=False))
+        return _StopPlan(
+            stops=stop_sequences(parts, text),
+            source_text=text,
+            pair=(source_lang, target_lang),
+            input_tokens=input_tokens,
+            max_tokens=max_tokens,
+            budget=self._predictor.budget(
+                source_lang=source_lang,
+                target_lang=target_lang,
+                input_tokens=input_tokens,
+                max_tokens=max_tokens,
+            ),
+        )
+
+    def _continues(self, plan: _StopPlan | None, reason: str, used: int) -> bool:
+        """Whether a generation that ended with `reason` only ran out of predicted budget."""
+        if plan is None or reason != "length" or used >= plan.max_tokens:
+            return False
+        self._predictor.record_continuation()
+        return True
+
+    def _record_stop(self, plan: _StopPlan | None, reason: str, used: int) -> None:
+        self._stop_reasons[reason] += 1
+        if plan is not None and reason in ("stop", "fence"):
+            self._predictor.record(
+                source_lang=plan.pair[0],
+                target_lang=plan.pair[1],
+                input_tokens=plan.input_tokens,
+                output_tokens=used,
+            )
+
+    def _generate(
+        self,
+        llm,
+        parts: PromptParts,
+        sampling: dict,
+        plan: _StopPlan | None,
+        cancelled: threading.Event,
+        on_text: Callable[[str], None] | None = None,
+    ) -> tuple[str, int | None, int, str]:
+        """
+        Run the completion for `parts`, streaming pieces to `on_text` when given. A generation
+        that hits its predicted budget is continued from its own output until it ends on its
+        own or reaches the caller's max_tokens. Returns the raw text, prompt and completion
+        tokens and the stop reason.
+        """
+        text, prompt_tokens, used = "", None, 0
+        budget = plan.budget if plan is not None else sampling["max_tokens"]
+        while True:
+            guard = None
+            extra = {}
+            if plan is not None:
+                guard = GenerationGuard(llm.detokenize, source_text=plan.source_text, prefix=text)
+                extra["stop"] = plan.stops
+            # Using create_completion for broad compatibility with GGUF instruct models.
+            completion = llm.create_completion(
+                prompt=parts.text + text,
+                stream=on_text is not None,
+                stopping_criteria=_stop_when(cancelled, guard),
+                **{**sampling, "max_tokens": budget},
+                **extra,
+            )
+            if on_text is None:
+                choice = (completion.get("choices") or [{}])[0]
+                piece = choice.get("text") or ""
+                usage = completion.get("usage") or {}
+                if prompt_tokens is None:
+                    prompt_tokens = usage.get("prompt_tokens")
+                tokens = usage.get("completion_tokens") or 0
+                finish = choice.get("finish_reason")
+            else:
+                piece, tokens, finish = "", 0, None
+                for chunk in completion:
+                    choice = (chunk.get("choices") or [{}])[0]
+                    delta = choice.get("text") or ""
+                    on_text(delta)
+                    piece += delta
+                    # llama.cpp streams one chunk per sampled token.
+                    tokens += 1
+                    finish = choice.get("finish_reason") or finish
+            text += piece
+            used += tokens
+            reason = _stop_reason(guard, finish, cancelled)
+            if not self._continues(plan, reason, used):
+                break
+            budget = plan.max_tokens - used
+        self._record_stop(plan, reason, used)
+        return text, prompt_tokens, used, reason
+
+    async def translate(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> TranslationResult:
+        parts = self._prompt_parts(
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        )
+
+        route = {"text": text, "source_lang": source_lang, "target_lang": target_lang}
+        if self._config.batch_size > 1:
+            return await self._translate_batched(parts, options, **route)
+
+        cancelled = threading.Event()
+        async with self._slot() as queue_ms:
+            llm = self._load()
 
             def _run():
-                # Using create_completion for broad compatibility with GGUF instruct models.
-                return llm.create_completion(
-                    prompt=prompt,
-                    temperature=float(options.get("temperature", 0.2)),
-                    top_p=float(options.get("top_p", 0.9)),
-                    max_tokens=int(options.get("max_tokens", 512)),
-                    seed=options.get("seed", 42),
+                prepared = self._prepare_context(llm, parts)
+                speculative = self._begin_speculation(llm)
+                sampling = self._sampling(options)
+                plan = self._stop_plan(llm, parts, max_tokens=sampling["max_tokens"], **route)
+                generated = self._generate(llm, parts, sampling, plan, cancelled)
+                drafted = self._end_speculation(speculative)
+                return generated, self._read_timings(llm, prepared), drafted
+
+            try:
+                generated, timings, drafted = await _run_cancellable(_run, cancelled)
+            except asyncio.CancelledError:
+                self._cancelled += 1
+                raise
+
+        raw, prompt_tokens, completion_tokens, stop_reason = generated
+        prompt_eval_ms, generation_ms = timings
+        draft_tokens, accepted_tokens = drafted
+        sanitize_start = time.perf_counter()
+        text_out = sanitize_translation(raw)
+        sanitize_ms = (time.perf_counter() - sanitize_start) * 1000
+
+        # detected_source_lang is handled outside (langdetect) for MVP
+        return TranslationResult(
+            translated_text=text_out,
+            detected_source_lang=None,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            prompt_eval_ms=prompt_eval_ms,
+            generation_ms=generation_ms,
+            queue_ms=queue_ms,
+            sanitize_ms=sanitize_ms,
+            draft_tokens=draft_tokens,
+            accepted_tokens=accepted_tokens,
+            stop_reason=stop_reason,
+        )
+
+    async def _translate_batched(
+        self,
+        parts: PromptParts,
+        options: dict,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+    ) -> TranslationResult:
+        if self._scheduler is None:
+            async with self._semaphore:
+                llm = self._load()
+                if self._scheduler is None:
+                    self._scheduler = BatchScheduler(
+                        llm,
+                        BatchSchedulerConfig(
+                            max_sequences=self._config.batch_size,
+                            n_ctx_per_sequence=self._config.batch_ctx,
+                            n_threads=self._n_threads(),
+                        ),
+                    )
+        sampling = self._sampling(options)
+        plan = self._stop_plan(
+            self._llm,
+            parts,
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            max_tokens=sampling["max_tokens"],
+        )
+        raw = ""
+        completions = []
+        budget = plan.budget if plan is not None else sampling["max_tokens"]
+        while True:
+            guard = None
+            if plan is not None:
+                # The scheduler samples token by token, so label stops are checked here too.
+                guard = GenerationGuard(
+                    self._llm.detokenize, source_text=text, stops=plan.stops, prefix=raw
                 )
+            completion = await self._scheduler.submit(
+                parts.text + raw,
+                **{**sampling, "max_tokens": budget},
+                stop=guard.feed if guard is not None else None,
+            )
+            completions.append(completion)
+            raw += trim_at_stops(completion.text, plan.stops) if plan else completion.text
+            used = sum(c.completion_tokens for c in completions)
+            reason = _stop_reason(guard, completion.finish_reason)
+            if not self._continues(plan, reason, used):
+                break
+            budget = plan.max_tokens - used
+        self._record_stop(plan, reason, used)
+
+        def _total(name: str) -> float | None:
+            values = [getattr(c, name) for c in completions if getattr(c, name) is not None]
+            return sum(values) if values else None
+
+        sanitize_start = time.perf_counter()
+        text_out = sanitize_translation(raw)
+        return TranslationResult(
+            translated_text=text_out,
+            detected_source_lang=None,
+            prompt_tokens=completions[0].prompt_tokens,
+            completion_tokens=used,
+            prompt_eval_ms=_total("prompt_eval_ms"),
+            generation_ms=_total("generation_ms"),
+            queue_ms=_total("queue_ms"),
+            sanitize_ms=(time.perf_counter() - sanitize_start) * 1000,
+            stop_reason=reason,
+        )
+
+    async def close(self) -> None:
+        if self._scheduler is not None:
+            await asyncio.to_thread(self._scheduler.close)
+            self._scheduler = None
+
+    def stats(self) -> dict:
+        stats = {}
+        if self._scheduler is not None:
+            stats["scheduler"] = self._scheduler.stats()
+        if self._prefix_cache is not None:
+            stats["prefix_cache"] = self._prefix_cache.stats()
+        if self._load_ms is not None:
+            stats["load_ms"] = self._load_ms
+        stats["cancelled_generations"] = self._cancelled + (
+            self._scheduler.stats()["cancelled"] if self._scheduler is not None else 0
+        )
+        if self._draft is not None:
+            stats["speculative"] = {
+                "mode": self._config.speculative,
+                "draft_tokens": self._drafted,
+                "accepted_tokens": self._accepted,
+                "acceptance_rate": (self._accepted / self._drafted) if self._drafted else None,
+            }
+        if self._predictor is not None:
+            stats["early_stop"] = {
+                **self._predictor.stats(),
+                "stop_reasons": dict(self._stop_reasons),
+            }
+        return stats
+
+    def queue_depth(self) -> int:
+        queued = self._waiting
+        if self._scheduler is not None:
+            queued += self._scheduler.stats()["queued"]
+        return queued
+
+    async def translate_stream(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> AsyncIterator[TranslationChunk]:
+        parts = self._prompt_parts(
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        )
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        sanitizer = StreamingSanitizer()
+        pieces: list[str] = []
+        timings: list[tuple[float | None, float | None]] = []
+        drafted: list[tuple[int | None, int | None]] = []
+        stop_reasons: list[str] = []
+        sanitize_ms = 0.0
+        cancelled = threading.Event()
+        finished = False
+
+        async with self._slot() as queue_ms:
+            llm = self._load()
+
+            def _run():
+                try:
+                    prepared = self._prepare_context(llm, parts)
+                    speculative = self._begin_speculation(llm)
+                    sampling = self._sampling(options)
+                    plan = self._stop_plan(
+                        llm,
+                        parts,
+                        text=text,
+                        source_lang=source_lang,
+                        target_lang=target_lang,
+                        max_tokens=sampling["max_tokens"],
+                    )
+                    generated = self._generate(
+                        llm,
+                        parts,
+                        sampling,
+                        plan,
+                        cancelled,
+                        on_text=lambda piece: loop.call_soon_threadsafe(queue.put_nowait, piece),
+                    )
+                    stop_reasons.append(generated[3])
+                    drafted.append(self._end_speculation(speculative))
+                    timings.append(self._read_timings(llm, prepared))
+                except BaseException as exc:  # surfaced to the awaiting coroutine below
+                    loop.call_soon_threadsafe(queue.put_nowait, exc)
+                finally:
+                    loop.call_soon_threadsafe(queue.put_nowait, done)
 
-            result = await asyncio.to_thread(_run)
-            _elapsed_ms = int((time.perf_counter() - start) * 1000)
+            worker = asyncio.ensure_future(asyncio.to_thread(_run))
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is done:
+                        finished = True
+                        break
+                    if isinstance(item, BaseException):
+                        finished = True
+                        raise item
+                    pieces.append(item)
+                    sanitize_start = time.perf_counter()
+                    delta = sanitizer.feed(item)
+                    sanitize_ms += (time.perf_counter() - sanitize_start) * 1000
+                    if delta:
+                        yield TranslationChunk(delta=delta)
+            finally:
+                if not finished:
+                    # The consumer went away (client disconnect) or generation failed: stop
+                    # sampling at the next token instead of running to max_tokens.
+                    cancelled.set()
+                    self._cancelled += 1
+                # Keep the slot until the generation thread is done with the shared context.
+                await worker
+            prompt_tokens = len(llm.tokenize(parts.text.encode("utf-8")))
 
-        text_out = ""
+        prompt_eval_ms, generation_ms = timings[0] if timings else (None, None)
+        draft_tokens, accepted_tokens = drafted[0] if drafted else (None, None)
+        sanitize_start = time.perf_counter()
+        tail = sanitizer.flush()
+        text_out = sanitize_translation("".join(pieces))
+        sanitize_ms += (time.perf_counter() - sanitize_start) * 1000
+        if tail:
+            yield TranslationChunk(delta=tail)
+        yield TranslationChunk(
+            delta="",
+            result=TranslationResult(
+                translated_text=text_out,
+                detected_source_lang=None,
+                prompt_tokens=prompt_tokens,
+                # llama.cpp streams one chunk per sampled token.
+                completion_tokens=len(pieces),
+                prompt_eval_ms=prompt_eval_ms,
+                generation_ms=generation_ms,
+                queue_ms=queue_ms,
+                sanitize_ms=sanitize_ms,
+                draft_tokens=draft_tokens,
+                accepted_tokens=accepted_tokens,
+                stop_reason=stop_reasons[0] if stop_reasons else "cancelled",
+            ),
+        )
+
+
+def preimport_llama_cpp() -> None:
+    """
+    Import llama-cpp-python (and its shared library) ahead of the first lazy load, which
+    otherwise pays for it on top of reading the model.
+    """
+    with contextlib.suppress(ImportError):
+        import llama_cpp  # type: ignore  # noqa: F401
+
+
+def _stop_when(event: threading.Event, guard: GenerationGuard | None = None):
+    """
+    llama.cpp stopping criteria that ends generation once `event` is set or `guard` says so
+    (checked per token).
+    """
+    from llama_cpp import StoppingCriteriaList  # type: ignore
+
+    criteria = [lambda _input_ids, _logits: event.is_set()]
+    if guard is not None:
+        criteria.append(guard.criterion())
+    return StoppingCriteriaList(criteria)
+
+
+def _stop_reason(
+    guard: GenerationGuard | None,
+    finish_reason: str | None,
+    cancelled: threading.Event | None = None,
+) -> str:
+    if cancelled is not None and cancelled.is_set():
+        return "cancelled"
+    if guard is not None and guard.reason:
+        return guard.reason
+    return "length" if finish_reason == "length" else "stop"
+
+
+async def _run_cancellable(fn, cancelled: threading.Event):
+    """
+    Run `fn` in a thread. If the awaiting task is cancelled, set `cancelled` so generation stops
+    at the next token, and wait for the thread to let go of the llama context before re-raising.
+    """
+    task = asyncio.ensure_future(asyncio.to_thread(fn))
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        cancelled.set()
+        with contextlib.suppress(BaseException):
+            await task
+        raise
+
+
+def _reset_perf(llm) -> None:
+    import llama_cpp  # type: ignore
+
+    # Renamed in llama-cpp-python 0.3 (llama_reset_timings -> llama_perf_context_reset).
+    reset = getattr(llama_cpp, "llama_perf_context_reset", None) or getattr(
+        llama_cpp, "llama_reset_timings", None
+    )
+    if reset is not None:
         try:
-            choices = result.get("choices", [])
-            if choices:
-                text_out = sanitize_translation(choices[0].get("text") or "")
+            reset(llm.ctx)
         except Exception:
-            text_out = ""
+            pass
 
-        # detected_source_lang is handled outside (langdetect) for MVP
-        return TranslationResult(translated_text=text_out, detected_source_lang=None)
+
+def _read_perf(llm) -> tuple[float | None, float | None]:
+    """Return (prompt eval ms, generation ms) accumulated since the last _reset_perf."""
+    import llama_cpp  # type: ignore
+
+    read = getattr(llama_cpp, "llama_perf_context", None) or getattr(
+        llama_cpp, "llama_get_timings", None
+    )
+    if read is None:
+        return None, None
+    try:
+        data = read(llm.ctx)
+        return float(data.t_p_eval_ms), float(data.t_eval_ms)
+    except Exception:
+        return None, None
 
 
 _FENCE_RE = re.compile(r"^\s*```[a-zA-Z0-9_-]*\s*\n(?P<body>[\s\S]*?)\n```\s*$")
@@ -113,3 +805,71 @@ def sanitize_translation(text: str) -> str:
         return ""
 
     return t
+
+
+_OPEN_FENCE_LINE_RE = re.compile(r"```[a-zA-Z0-9_-]*[ \t\r\f\v]*")
+# Suffixes that may still turn out to be trailing whitespace or the closing fence.
+_HOLD_PLAIN_RE = re.compile(r"\s*\Z")
+_HOLD_FENCED_RE = re.compile(r"\s*(?:\n`{1,3}\s*)?\Z")
+_CLOSING_FENCE_RE = re.compile(r"\n```\s*\Z")
+
+
+class StreamingSanitizer:
+    """
+    Incremental counterpart of sanitize_translation for streamed completions.
+    Text is held back only while it could still be an opening fence line, trailing
+    whitespace, or the closing fence, so the concatenated output matches the batch result.
+    """
+
+    def __init__(self) -> None:
+        self._pending = ""
+        self._decided = False
+        self._fenced = False
+        self._emitted = False
+
+    def feed(self, piece: str) -> str:
+        self._pending += piece
+        if not self._decided and not self._decide():
+            return ""
+        return self._drain(final=False)
+
+    def flush(self) -> str:
+        if not self._decided:
+            # Never saw a complete opening fence line (or only whitespace); mirror the batch
+            # behaviour for an unterminated fence.
+            if self._pending.strip().startswith("```"):
+                self._pending = ""
+                return ""
+            self._decided = True
+        return self._drain(final=True)
+
+    def _decide(self) -> bool:
+        head = self._pending.lstrip()
+        if not head:
+            return False
+        if head.startswith("```") or "```".startswith(head):
+            newline = head.find("\n")
+            if newline < 0:
+                return False
+            self._fenced = _OPEN_FENCE_LINE_RE.fullmatch(head[:newline]) is not None
+            head = head[newline + 1 :]
+        self._pending = head
+        self._decided = True
+        return True
+
+    def _drain(self, *, final: bool) -> str:
+        if not self._emitted:
+            self._pending = self._pending.lstrip()
+        if final:
+            out = self._pending
+            if self._fenced:
+                out = _CLOSING_FENCE_RE.sub("", out)
+            out = out.rstrip()
+            self._pending = ""
+        else:
+            hold = _HOLD_FENCED_RE if self._fenced else _HOLD_PLAIN_RE
+            cut = hold.search(self._pending).start()
+            out, self._pending = self._pending[:cut], self._pending[cut:]
+        if out:
+            self._emitted = True
+        return out
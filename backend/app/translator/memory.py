@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from collections import Counter
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+
+from .base import TranslationChunk, TranslationResult, Translator, WrappingTranslator
+
+# Spans that carry no language: URLs, e-mail addresses, @handles, format placeholders and
+# numbers. They are masked before matching, so templated messages that only differ there share
+# one entry. Capitalized words are not: a name may itself be translated ("London" ->
+# "Londres"), so a new one can't be pasted into another name's translation.
+_PLACEHOLDER_RE = re.compile(
+    r"https?://\S+"
+    r"|[\w.+-]+@[\w-]+\.[\w.-]+"
+    r"|@\w+"
+    r"|\{[^{}\s]*\}|%[sd]"
+    r"|\d+(?:[.,:/-]\d+)*"
+)
+_SLOT = "\ue000"
+_SHINGLE = 3
+
+# MinHash signature of NUM_PERM values split into BANDS bands for LSH. With 12 bands of 3 rows
+# a pair at Jaccard 0.6 becomes a candidate ~95% of the time, one at 0.3 only ~28%.
+_BANDS = 12
+_ROWS = 3
+_NUM_PERM = _BANDS * _ROWS
+_rng = np.random.default_rng(20240601)
+# Multiply-shift hashing: (a * x + b) mod 2**64, keep the high 32 bits. a must be odd.
+_A = (_rng.integers(1, 2**63, _NUM_PERM, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+_B = _rng.integers(0, 2**63, _NUM_PERM, dtype=np.uint64)
+# Candidates read per band, so hot templates can't turn one lookup into a table scan.
+_BAND_LIMIT = 32
+# Candidates verified with the exact similarity, picked by the number of bands they share.
+_VERIFY_LIMIT = 4
+
+
+def normalize_segment(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def mask_placeholders(text: str) -> tuple[str, list[str]]:
+    """Replace non-linguistic spans with a slot marker; returns (template, spans in order)."""
+    values: list[str] = []
+
+    def _slot(match: re.Match[str]) -> str:
+        values.append(match.group())
+        return _SLOT
+
+    return _PLACEHOLDER_RE.sub(_slot, text), values
+
+
+def _shingles(text: str) -> set[str]:
+    padded = f" {text} "
+    if len(padded) <= _SHINGLE:
+        return {padded}
+    return {padded[i : i + _SHINGLE] for i in range(len(padded) - _SHINGLE + 1)}
+
+
+def jaccard(a: set[str], b: set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(shingles: set[str]) -> np.ndarray:
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    mixed = (hashes[:, None] * _A[None, :] + _B[None, :]) >> np.uint64(32)
+    return mixed.min(axis=0)
+
+
+def _int64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big", signed=True)
+
+
+def _band_keys(scope: str, signature: np.ndarray) -> list[int]:
+    return [
+        _int64(f"{scope}|{band}|".encode() + signature[band * _ROWS : (band + 1) * _ROWS].tobytes())
+        for band in range(_BANDS)
+    ]
+
+
+def substitute_placeholders(
+    target: str,
+    stored_values: list[str],
+    new_values: list[str],
+) -> str | None:
+    """
+    Rewrite a stored translation for new placeholder values, or None when that isn't safe:
+    every changed value must appear in the translation verbatim, as often as in the source.
+    """
+    if len(stored_values) != len(new_values):
+        return None
+    mapping: dict[str, str] = {}
+    for old, new in zip(stored_values, new_values, strict=True):
+        if mapping.setdefault(old, new) != new:
+            return None
+    mapping = {old: new for old, new in mapping.items() if old != new}
+    if not mapping:
+        return target
+    patterns = {}
+    for old in mapping:
+        pattern = re.compile(rf"(?<!\w){re.escape(old)}(?!\w)")
+        if len(pattern.findall(target)) != stored_values.count(old):
+            return None
+        patterns[old] = pattern
+    combined = re.compile(
+        "|".join(p.pattern for p in sorted(patterns.values(), key=lambda p: -len(p.pattern)))
+    )
+    return combined.sub(lambda m: mapping[m.group()], target)
+
+
+@dataclass(frozen=True)
+class MemoryMatch:
+    kind: Literal["template", "hint"]
+    source: str
+    target: str
+    similarity: float
+
+
+class TranslationMemory:
+    """
+    Segment-level translation memory in SQLite.
+
+    Exact template matches (identical once placeholders are masked) are found through an
+    indexed hash; fuzzy matches through MinHash LSH band keys over character 3-grams, verified
+    with the exact Jaccard similarity. Every lookup reads a bounded number of rows, so it
+    stays sub-millisecond as the table grows to millions of segments.
+    """
+
+    def __init__(self, path: str, *, hint_similarity: float = 0.5) -> None:
+        self._path = path if path == ":memory:" else str(Path(path).expanduser())
+        if self._path != ":memory:":
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        self._hint_similarity = hint_similarity
+        # One connection per process, serialized; WAL lets other processes read meanwhile.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " id INTEGER PRIMARY KEY,"
+            " scope TEXT NOT NULL,"
+            " source_hash INTEGER NOT NULL,"
+            " template_hash INTEGER NOT NULL,"
+            " source TEXT NOT NULL,"
+            " target TEXT NOT NULL,"
+            " created_at REAL NOT NULL"
+            ");"
+            "CREATE UNIQUE INDEX IF NOT EXISTS segments_source ON segments (source_hash);"
+            "CREATE INDEX IF NOT EXISTS segments_template ON segments (template_hash);"
+            "CREATE TABLE IF NOT EXISTS segment_bands ("
+            " band_key INTEGER NOT NULL,"
+            " segment_id INTEGER NOT NULL,"
+            " PRIMARY KEY (band_key, segment_id)"
+            ") WITHOUT ROWID;"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _scope(source_lang: str, target_lang: str, mode: str) -> str:
+        return f"{source_lang}>{target_lang}:{mode}"
+
+    def lookup(
+        self,
+        text: str,
+        *,
+        source_lang: str,
+        target_lang: str,
+        mode: str,
+    ) -> MemoryMatch | None:
+        source = normalize_segment(text)
+        if not source:
+            return None
+        scope = self._scope(source_lang, target_lang, mode)
+        template, values = mask_placeholders(source)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, target FROM segments WHERE template_hash = ?"
+                " ORDER BY id DESC LIMIT 8",
+                (_int64(f"{scope}|{template}".encode()),),
+            ).fetchall()
+        for stored_source, stored_target in rows:
+            stored_template, stored_values = mask_placeholders(stored_source)
+            if stored_template != template:
+                continue
+            rewritten = substitute_placeholders(stored_target, stored_values, values)
+            if rewritten is not None:
+                return MemoryMatch("template", stored_source, rewritten, 1.0)
+
+        if self._hint_similarity <= 0:
+            return None
+        shingles = _shingles(template)
+        keys = _band_keys(scope, minhash(shingles))
+        with self._lock:
+            shared = Counter(
+                row[0]
+                for key in keys
+                for row in self._conn.execute(
+                    "SELECT segment_id FROM segment_bands WHERE band_key = ? LIMIT ?",
+                    (key, _BAND_LIMIT),
+                )
+            )
+            if not shared:
+                return None
+            candidates = [segment_id for segment_id, _ in shared.most_common(_VERIFY_LIMIT)]
+            placeholders = ",".join("?" * len(candidates))
+            rows = self._conn.execute(
+                f"SELECT source, target FROM segments WHERE id IN ({placeholders})",
+                tuple(candidates),
+            ).fetchall()
+        best: MemoryMatch | None = None
+        for stored_source, stored_target in rows:
+            similarity = jaccard(shingles, _shingles(mask_placeholders(stored_source)[0]))
+            if similarity >= self._hint_similarity and (
+                best is None or similarity > best.similarity
+            ):
+                best = MemoryMatch("hint", stored_source, stored_target, similarity)
+        return best
+
+    def store(
+        self,
+        text: str,
+        translation: str,
+        *,
+        source_lang: str,
+        target_lang: str,
+        mode: str,
+    ) -> None:
+        source = normalize_segment(text)
+        target = translation.strip()
+        if not source or not target:
+            return
+        scope = self._scope(source_lang, target_lang, mode)
+        template, _ = mask_placeholders(source)
+        keys = _band_keys(scope, minhash(_shingles(template)))
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO segments"
+                " (scope, source_hash, template_hash, source, target, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    scope,
+                    _int64(f"{scope}|{source}".encode()),
+                    _int64(f"{scope}|{template}".encode()),
+                    source,
+                    target,
+                    time.time(),
+                ),
+            )
+            if cursor.rowcount:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO segment_bands (band_key, segment_id) VALUES (?, ?)",
+                    [(key, cursor.lastrowid) for key in keys],
+                )
+            self._conn.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(id) FROM segments").fetchone()
+        return int(row[0] or 0)
+
+
+class MemoryTranslator(WrappingTranslator):
+    """
+    Serve near-duplicate segments from a TranslationMemory.
+
+    Template matches (only numbers, URLs and the like differ) are answered without the
+    model; similar segments pass the closest stored pair to the model as a reference
+    translation (options["memory_hint"]). New model translations are added to the memory.
+    """
+
+    def __init__(self, inner: Translator, memory: TranslationMemory) -> None:
+        super().__init__(inner)
+        self._memory = memory
+        self._template_hits = 0
+        self._hints = 0
+        self._misses = 0
+        self._stored = 0
+        self._lookup_ms_total = 0.0
+
+    async def _lookup(self, text, source_lang, target_lang, options) -> MemoryMatch | None:
+        start = time.perf_counter()
+        try:
+            match = await asyncio.to_thread(
+                self._memory.lookup,
+                text,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                mode=options.get("mode") or "literal",
+            )
+        except sqlite3.Error:
+            match = None
+        self._lookup_ms_total += (time.perf_counter() - start) * 1000
+        if match is None:
+            self._misses += 1
+        elif match.kind == "template":
+            self._template_hits += 1
+        else:
+            self._hints += 1
+        return match
+
+    async def _store(self, text, result: TranslationResult, source_lang, target_lang, options):
+        # An echo of the input is what smart mode retries on; never teach it to the memory.
+        if normalize_segment(result.translated_text) == normalize_segment(text):
+            return
+        try:
+            await asyncio.to_thread(
+                self._memory.store,
+                text,
+                result.translated_text,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                mode=options.get("mode") or "literal",
+            )
+        except sqlite3.Error:
+            # Like the disk cache tier, the memory is best-effort.
+            return
+        self._stored += 1
+
+    @staticmethod
+    def _with_hint(options: dict, match: MemoryMatch | None) -> dict:
+        if match is None:
+            return options
+        return {**options, "memory_hint": {"source": match.source, "target": match.target}}
+
+    async def translate(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> TranslationResult:
+        match = await self._lookup(text, source_lang, target_lang, options)
+        if match is not None and match.kind == "template":
+            return TranslationResult(
+                translated_text=match.target,
+                detected_source_lang=None,
+                cached=True,
+            )
+        result = await self.inner.translate(
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=self._with_hint(options, match),
+        )
+        await self._store(text, result, source_lang, target_lang, options)
+        return result
+
+    async def translate_stream(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> AsyncIterator[TranslationChunk]:
+        match = await self._lookup(text, source_lang, target_lang, options)
+        if match is not None and match.kind == "template":
+            yield TranslationChunk(delta=match.target)
+            yield TranslationChunk(
+                delta="",
+                result=TranslationResult(
+                    translated_text=match.target,
+                    detected_source_lang=None,
+                    cached=True,
+                ),
+            )
+            return
+        async for chunk in self.inner.translate_stream(
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=self._with_hint(options, match),
+        ):
+            if chunk.result is not None:
+                await self._store(text, chunk.result, source_lang, target_lang, options)
+            yield chunk
+
+    def stats(self) -> dict:
+        lookups = self._template_hits + self._hints + self._misses
+        return {
+            **self.inner.stats(),
+            "memory": {
+                "segments": self._memory.size(),
+                "template_hits": self._template_hits,
+                "hints": self._hints,
+                "misses": self._misses,
+                "stored": self._stored,
+                "mean_lookup_ms": (self._lookup_ms_total / lookups) if lookups else 0.0,
+            },
+        }
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+
+
+class PrefixStateCache:
+    """
+    LRU of llama.cpp KV states keyed by prompt prefix text.
+
+    Restoring a saved state before create_completion lets llama-cpp-python's own prefix
+    matching skip re-evaluating the shared instruction block; only the per-request suffix is
+    decoded.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._states: OrderedDict[str, object] = OrderedDict()
+        self._lock = threading.Lock()
+        self._resident_hits = 0
+        self._restored_hits = 0
+        self._misses = 0
+        # Prompt-eval time of full requests, split by whether the prefix was reused.
+        self._prompt_eval_ms = {"hit": 0.0, "miss": 0.0}
+        self._prompt_eval_count = {"hit": 0, "miss": 0}
+
+    def prime(self, llm, prefix: str) -> str:
+        """
+        Make sure the KV cache of `llm` starts with `prefix`.
+        Returns "resident", "restored" or "miss" (the prefix had to be evaluated).
+        """
+        tokens = llm.tokenize(prefix.encode("utf-8"), special=True)
+        n = len(tokens)
+        if llm.n_tokens >= n and list(llm._input_ids[:n]) == tokens:
+            self._resident_hits += 1
+            return "resident"
+
+        with self._lock:
+            state = self._states.get(prefix)
+            if state is not None:
+                self._states.move_to_end(prefix)
+        if state is not None:
+            llm.load_state(state)
+            self._restored_hits += 1
+            return "restored"
+
+        llm.reset()
+        llm.eval(tokens)
+        self._misses += 1
+        self._put(prefix, llm.save_state())
+        return "miss"
+
+    def record_prompt_eval(self, outcome: str, prompt_eval_ms: float) -> None:
+        key = "miss" if outcome == "miss" else "hit"
+        self._prompt_eval_ms[key] += prompt_eval_ms
+        self._prompt_eval_count[key] += 1
+
+    def export(self) -> dict[str, object]:
+        with self._lock:
+            return dict(self._states)
+
+    def restore(self, states: dict[str, object]) -> None:
+        for prefix, state in states.items():
+            self._put(prefix, state)
+
+    def _put(self, prefix: str, state: object) -> None:
+        with self._lock:
+            self._states[prefix] = state
+            self._states.move_to_end(prefix)
+            while len(self._states) > self._max_entries:
+                self._states.popitem(last=False)
+
+    def stats(self) -> dict:
+        def _avg(key: str) -> float | None:
+            count = self._prompt_eval_count[key]
+            return (self._prompt_eval_ms[key] / count) if count else None
+
+        return {
+            "entries": len(self._states),
+            "max_entries": self._max_entries,
+            "resident_hits": self._resident_hits,
+            "restored_hits": self._restored_hits,
+            "misses": self._misses,
+            "mean_prompt_eval_ms_hit": _avg("hit"),
+            "mean_prompt_eval_ms_miss": _avg("miss"),
+        }
@@ -1,10 +1,32 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import Literal
 
 from ..languages import language_name
 
 
+@dataclass(frozen=True)
+class PromptParts:
+    """
+    A translation prompt split at its cacheable boundaries:
+    instructions (shared per mode) + language block (shared per pair) + per-request text.
+    With `target_last` the language block only names the source language and the target
+    follows the text in the body.
+    """
+
+    instructions: str
+    languages: str
+    body: str
+
+    @property
+    def text(self) -> str:
+        return self.instructions + self.languages + self.body
+
+    def prefix(self, scope: Literal["mode", "pair"] = "pair") -> str:
+        return self.instructions if scope == "mode" else self.instructions + self.languages
+
+
 def build_translation_prompt(
     *,
     text: str,
@@ -12,6 +34,29 @@ def build_translation_prompt(
     target_lang: str,
     mode: Literal["literal", "natural"] = "literal",
 ) -> str:
+    return build_translation_prompt_parts(
+        text=text,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        mode=mode,
+    ).text
+
+
+def build_translation_prompt_parts(
+    *,
+    text: str,
+    source_lang: str,
+    target_lang: str,
+    mode: Literal["literal", "natural"] = "literal",
+    reference: tuple[str, str] | None = None,
+    target_last: bool = False,
+) -> PromptParts:
+    """
+    `reference` is a (source, translation) pair of a similar text from translation memory.
+    `target_last` names the target language after the text, so prompts translating one text
+    into several languages share everything up to that line and llama.cpp evaluates the text
+    only once.
+    """
     source = "Unknown (auto-detect)" if source_lang == "auto" else language_name(source_lang)
     target = language_name(target_lang)
 
@@ -36,16 +81,30 @@ def build_translation_prompt(
             "- Output ONLY the translated text (no quotes, no code fences, no markdown).\n"
         )
 
-    return (
-        "You are a translation engine.\n"
-        "Translate the text from the source language to the target language.\n"
-        "Rules:\n"
-        f"{rules}\n"
-        f"Source language: {source}\n"
-        f"Target language: {target}\n\n"
-        "TEXT:\n"
-        "```text\n"
-        f"{text}\n"
-        "```\n\n"
-        "TRANSLATION:\n"
+    source_block = f"TEXT:\n```text\n{text}\n```\n\n"
+    hint = ""
+    if reference is not None:
+        # Kept in the body so the cached instruction/language prefix is unchanged.
+        hint = (
+            "A similar text was translated before; reuse its wording where it fits.\n"
+            f"SIMILAR TEXT:\n```text\n{reference[0]}\n```\n"
+            f"ITS TRANSLATION:\n```text\n{reference[1]}\n```\n\n"
+        )
+    languages = f"Source language: {source}\nTarget language: {target}\n\n"
+    if target_last:
+        # The hint depends on the target too, so it goes after the shared text.
+        languages = f"Source language: {source}\n\n"
+        body = source_block + hint + f"Target language: {target}\n\nTRANSLATION:\n"
+    else:
+        body = hint + source_block + "TRANSLATION:\n"
+
+    return PromptParts(
+        instructions=(
+            "You are a translation engine.\n"
+            "Translate the text from the source language to the target language.\n"
+            "Rules:\n"
+            f"{rules}\n"
+        ),
+        languages=languages,
+        body=body,
     )
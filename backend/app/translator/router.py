@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import fnmatch
+import json
+import logging
+import os
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, fields, replace
+
+from .base import TranslationChunk, TranslationResult, Translator
+
+logger = logging.getLogger(__name__)
+
+# Loaded weights take about the file size; the KV cache and scratch buffers come on top.
+_MEMORY_OVERHEAD = 1.15
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """One registered GGUF and the requests it is preferred for."""
+
+    name: str
+    path: str
+    # Language pairs as "source-target" glob patterns ("en-*", "*-ja"); empty = any pair.
+    pairs: tuple[str, ...] = ()
+    # Modes ("literal", "natural"); empty = any mode.
+    modes: tuple[str, ...] = ()
+    # Input length range in characters (max_chars 0 = unbounded).
+    min_chars: int = 0
+    max_chars: int = 0
+    # Requests in flight at which new ones overflow to the next matching model (0 = never).
+    max_in_flight: int = 0
+    # RAM the loaded model needs in MB (0 = estimate from the file size).
+    memory_mb: int = 0
+
+    def matches(self, *, chars: int, source_lang: str, target_lang: str, mode: str) -> bool:
+        if chars < self.min_chars or (self.max_chars and chars > self.max_chars):
+            return False
+        if self.modes and mode not in self.modes:
+            return False
+        pair = f"{source_lang}-{target_lang}"
+        return not self.pairs or any(fnmatch.fnmatchcase(pair, p) for p in self.pairs)
+
+    def memory_bytes(self) -> int:
+        if self.memory_mb:
+            return self.memory_mb * 1024 * 1024
+        try:
+            return int(os.path.getsize(os.path.expanduser(self.path)) * _MEMORY_OVERHEAD)
+        except OSError:
+            return 0
+
+
+def load_model_specs(path: str) -> tuple[ModelSpec, ...]:
+    """
+    Read a model registry file: {"models": [{"name": ..., "path": ..., <routing fields>}]}.
+    Order matters: the first matching model wins, and the first model is the default.
+    """
+    try:
+        with open(os.path.expanduser(path), encoding="utf-8") as fh:
+            entries = json.load(fh)["models"]
+        known = {f.name for f in fields(ModelSpec)}
+        specs = []
+        for entry in entries:
+            values = {k: v for k, v in entry.items() if k in known}
+            for key in ("pairs", "modes"):
+                values[key] = tuple(values.get(key) or ())
+            specs.append(ModelSpec(**values))
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        logger.warning("Ignoring model registry %s: %s", path, exc)
+        return ()
+    names = [spec.name for spec in specs]
+    if len(set(names)) != len(names):
+        logger.warning("Ignoring model registry %s: duplicate model names", path)
+        return ()
+    return tuple(specs)
+
+
+class _Entry:
+    def __init__(self, spec: ModelSpec) -> None:
+        self.spec = spec
+        self.translator: Translator | None = None
+        self.in_flight = 0
+        self.last_used = 0.0
+        self.served = 0
+        self.loads = 0
+
+
+class RoutingTranslator(Translator):
+    """
+    Route each request to one of several models.
+
+    The first registered model whose rules match (input length, language pair, mode) serves
+    the request unless it already has max_in_flight requests running, in which case the request
+    overflows to the next match, so listing a larger model before a faster one shifts traffic to
+    the faster one as load grows. Models are built on first use; when loading one would exceed
+    the RAM budget, idle models are closed least recently used first.
+    """
+
+    def __init__(
+        self,
+        specs: tuple[ModelSpec, ...] | list[ModelSpec],
+        factory: Callable[[ModelSpec], Translator],
+        *,
+        memory_budget_bytes: int = 0,
+        fingerprints: dict[str, str] | None = None,
+    ) -> None:
+        if not specs:
+            raise ValueError("at least one model is required")
+        self._entries = [_Entry(spec) for spec in specs]
+        self._factory = factory
+        self._budget = memory_budget_bytes
+        self._fingerprints = fingerprints or {}
+        self._lock = asyncio.Lock()
+        self._evictions = 0
+        self._overflows = 0
+        self._over_budget = 0
+
+    def route(self, *, text: str, source_lang: str, target_lang: str, mode: str) -> ModelSpec:
+        return self._route(
+            text=text, source_lang=source_lang, target_lang=target_lang, mode=mode
+        ).spec
+
+    def _route(self, *, text: str, source_lang: str, target_lang: str, mode: str) -> _Entry:
+        candidates = [
+            entry
+            for entry in self._entries
+            if entry.spec.matches(
+                chars=len(text), source_lang=source_lang, target_lang=target_lang, mode=mode
+            )
+        ] or self._entries[:1]
+        for entry in candidates:
+            if not entry.spec.max_in_flight or entry.in_flight < entry.spec.max_in_flight:
+                if entry is not candidates[0]:
+                    self._overflows += 1
+                return entry
+        # Every match is saturated: the relatively least loaded one.
+        return min(candidates, key=lambda e: e.in_flight / (e.spec.max_in_flight or 1))
+
+    def _resident_bytes(self) -> int:
+        return sum(e.spec.memory_bytes() for e in self._entries if e.translator is not None)
+
+    async def _checkout(self, entry: _Entry) -> Translator:
+        """Build the entry's translator if needed (evicting to fit) and count it as in use."""
+        async with self._lock:
+            if entry.translator is None:
+                if self._budget:
+                    await self._make_room(entry.spec.memory_bytes(), keep=entry)
+                entry.translator = self._factory(entry.spec)
+                entry.loads += 1
+            entry.in_flight += 1
+            return entry.translator
+
+    def _checkin(self, entry: _Entry) -> None:
+        entry.in_flight -= 1
+        entry.last_used = time.monotonic()
+
+    async def _make_room(self, needed: int, *, keep: _Entry) -> None:
+        idle = sorted(
+            (e for e in self._entries if e.translator is not None and e is not keep),
+            key=lambda e: e.last_used,
+        )
+        for entry in idle:
+            if self._resident_bytes() + needed <= self._budget:
+                return
+            if entry.in_flight:
+                continue
+            translator, entry.translator = entry.translator, None
+            self._evictions += 1
+            with contextlib.suppress(Exception):
+                await translator.close()
+        if self._resident_bytes() + needed > self._budget:
+            # Everything left is busy; load anyway rather than fail the request.
+            self._over_budget += 1
+            logger.warning("Loading model %s exceeds the memory budget", keep.spec.name)
+
+    async def translate(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> TranslationResult:
+        entry = self._route(
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            mode=options.get("mode") or "literal",
+        )
+        translator = await self._checkout(entry)
+        try:
+            result = await translator.translate(
+                text=text,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                options=options,
+            )
+        finally:
+            self._checkin(entry)
+        entry.served += 1
+        return replace(result, model=entry.spec.name)
+
+    async def translate_stream(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> AsyncIterator[TranslationChunk]:
+        entry = self._route(
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            mode=options.get("mode") or "literal",
+        )
+        translator = await self._checkout(entry)
+        try:
+            async for chunk in translator.translate_stream(
+                text=text,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                options=options,
+            ):
+                if chunk.result is not None:
+                    entry.served += 1
+                    chunk = replace(chunk, result=replace(chunk.result, model=entry.spec.name))
+                yield chunk
+        finally:
+            self._checkin(entry)
+
+    @property
+    def is_loaded(self) -> bool:
+        return any(e.translator is not None and e.translator.is_loaded for e in self._entries)
+
+    async def _default(self) -> tuple[_Entry, Translator]:
+        entry = self._entries[0]
+        return entry, await self._checkout(entry)
+
+    async def load(self) -> None:
+        entry, translator = await self._default()
+        try:
+            await translator.load()
+        finally:
+            self._checkin(entry)
+
+    async def warmup(self, requests: list[dict]) -> None:
+        entry, translator = await self._default()
+        try:
+            await translator.warmup(requests)
+        finally:
+            self._checkin(entry)
+
+    def models(self) -> list[dict]:
+        """Per-model status for the health endpoint."""
+        return [
+            {
+                "name": e.spec.name,
+                "loaded": e.translator is not None and e.translator.is_loaded,
+                "in_flight": e.in_flight,
+                "served": e.served,
+            }
+            for e in self._entries
+        ]
+
+    def model_info(self) -> dict:
+        return {
+            "memory_budget_mb": self._budget // (1024 * 1024) if self._budget else None,
+            "models": [
+                {
+                    "name": e.spec.name,
+                    "path": e.spec.path,
+                    "memory_mb": e.spec.memory_bytes() // (1024 * 1024),
+                    **(e.translator.model_info() if e.translator is not None else {}),
+                }
+                for e in self._entries
+            ],
+        }
+
+    def stats(self) -> dict:
+        return {
+            "router": {
+                "resident_mb": self._resident_bytes() // (1024 * 1024),
+                "evictions": self._evictions,
+                "overflows": self._overflows,
+                "over_budget_loads": self._over_budget,
+                "models": {
+                    e.spec.name: {
+                        "resident": e.translator is not None,
+                        "in_flight": e.in_flight,
+                        "served": e.served,
+                        "loads": e.loads,
+                        **(e.translator.stats() if e.translator is not None else {}),
+                    }
+                    for e in self._entries
+                },
+            }
+        }
+
+    def queue_depth(self) -> int:
+        return sum(e.translator.queue_depth() for e in self._entries if e.translator is not None)
+
+    async def close(self) -> None:
+        for entry in self._entries:
+            if entry.translator is not None:
+                await entry.translator.close()
+
+    def fingerprint(self) -> str:
+        # Cached results may come from any registered model, so the key covers all of them.
+        return "router:" + "|".join(
+            f"{e.spec.name}={self._fingerprints.get(e.spec.name, e.spec.path)}"
+            for e in self._entries
+        )
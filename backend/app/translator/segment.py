@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import re
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from .base import TranslationChunk, TranslationResult, Translator, WrappingTranslator
+
+_PARAGRAPH_BREAK_RE = re.compile(r"\n[ \t]*\n\s*")
+# Latin-style terminators need following whitespace; CJK full-width ones do not. Line breaks
+# inside a paragraph (lists, verse) are boundaries too.
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])\s*|\n\s*")
+_SURROUNDING_WS_RE = re.compile(r"(\s*)(.*?)(\s*)", re.S)
+
+
+@dataclass(frozen=True)
+class Segment:
+    text: str
+    # False for whitespace and letter-free runs (numbers, punctuation, emoji) that are copied
+    # through verbatim.
+    translatable: bool
+
+
+def has_any_letter(text: str) -> bool:
+    return any(ch.isalpha() for ch in (text or ""))
+
+
+def split_segments(text: str, *, max_chars: int, per_sentence: bool = False) -> list[Segment]:
+    """
+    Split text on paragraph breaks, then sentence boundaries for paragraphs longer than
+    max_chars (for every paragraph with `per_sentence`, one sentence per segment). Whitespace
+    between and around segments is kept as separate segments so that
+    "".join(s.text for s in segments) == text.
+    """
+    segments: list[Segment] = []
+    for chunk, is_break in _split_keep(text, _PARAGRAPH_BREAK_RE):
+        if is_break:
+            segments.append(Segment(chunk, False))
+            continue
+        if per_sentence:
+            units = [p for s in _sentences(chunk) for p in _hard_split(s, max_chars)]
+        elif len(chunk) <= max_chars:
+            units = [chunk]
+        else:
+            units = _group_sentences(chunk, max_chars)
+        for unit in units:
+            lead, core, trail = _SURROUNDING_WS_RE.fullmatch(unit).groups()
+            if lead:
+                segments.append(Segment(lead, False))
+            if core:
+                segments.append(Segment(core, has_any_letter(core)))
+            if trail:
+                segments.append(Segment(trail, False))
+    return segments
+
+
+def _split_keep(text: str, pattern: re.Pattern[str]) -> list[tuple[str, bool]]:
+    parts: list[tuple[str, bool]] = []
+    pos = 0
+    for m in pattern.finditer(text):
+        if m.start() > pos:
+            parts.append((text[pos : m.start()], False))
+        if m.group():
+            parts.append((m.group(), True))
+        pos = m.end()
+    if pos < len(text):
+        parts.append((text[pos:], False))
+    return parts
+
+
+def _sentences(paragraph: str) -> list[str]:
+    # Each sentence keeps its trailing whitespace so they concatenate back exactly.
+    sentences: list[str] = []
+    pos = 0
+    for m in _SENTENCE_END_RE.finditer(paragraph):
+        if m.end() > pos:
+            sentences.append(paragraph[pos : m.end()])
+            pos = m.end()
+    if pos < len(paragraph):
+        sentences.append(paragraph[pos:])
+    return sentences
+
+
+def _group_sentences(paragraph: str, max_chars: int) -> list[str]:
+    groups: list[str] = []
+    current = ""
+    for sentence in _sentences(paragraph):
+        for piece in _hard_split(sentence, max_chars):
+            if current and len(current) + len(piece) > max_chars:
+                groups.append(current)
+                current = ""
+            current += piece
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _hard_split(sentence: str, max_chars: int) -> list[str]:
+    """Break a single over-long sentence at the last whitespace before the limit."""
+    pieces: list[str] = []
+    while len(sentence) > max_chars:
+        cut = max(sentence.rfind(" ", 0, max_chars), sentence.rfind("\n", 0, max_chars))
+        cut = cut + 1 if cut > 0 else max_chars
+        pieces.append(sentence[:cut])
+        sentence = sentence[cut:]
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+class SegmentingTranslator(WrappingTranslator):
+    """
+    Translate long inputs segment by segment. Segments are submitted concurrently so a
+    batching backend can merge them; non-translatable segments never reach the model.
+    """
+
+    def __init__(self, inner: Translator, *, max_chars: int) -> None:
+        super().__init__(inner)
+        self._max_chars = max_chars
+
+    async def translate(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> TranslationResult:
+        if len(text) <= self._max_chars:
+            return await self.inner.translate(
+                text=text,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                options=options,
+            )
+        segments = split_segments(text, max_chars=self._max_chars)
+        results = await asyncio.gather(
+            *(self._translate_segment(s, source_lang, target_lang, options) for s in segments)
+        )
+        return _merge(results)
+
+    async def translate_stream(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> AsyncIterator[TranslationChunk]:
+        if len(text) <= self._max_chars:
+            async for chunk in self.inner.translate_stream(
+                text=text,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                options=options,
+            ):
+                yield chunk
+            return
+
+        # Start every segment now, but emit them strictly in document order.
+        tasks = [
+            asyncio.ensure_future(self._translate_segment(s, source_lang, target_lang, options))
+            for s in split_segments(text, max_chars=self._max_chars)
+        ]
+        results: list[TranslationResult] = []
+        try:
+            for task in tasks:
+                result = await task
+                results.append(result)
+                if result.translated_text:
+                    yield TranslationChunk(delta=result.translated_text)
+        finally:
+            for task in tasks:
+                task.cancel()
+        yield TranslationChunk(delta="", result=_merge(results))
+
+    async def _translate_segment(
+        self,
+        segment: Segment,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> TranslationResult:
+        if not segment.translatable:
+            return TranslationResult(translated_text=segment.text, detected_source_lang=None)
+        return await self.inner.translate(
+            text=segment.text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        )
+
+
+def _merge(results: list[TranslationResult]) -> TranslationResult:
+    def _total(name: str) -> float | None:
+        values = [getattr(r, name) for r in results if getattr(r, name) is not None]
+        return sum(values) if values else None
+
+    # Segments run concurrently: model time adds up, while queue wait overlaps.
+    queue_values = [r.queue_ms for r in results if r.queue_ms is not None]
+    reasons = [r.stop_reason for r in results if r.stop_reason is not None]
+    return TranslationResult(
+        translated_text="".join(r.translated_text for r in results),
+        detected_source_lang=None,
+        prompt_tokens=_total("prompt_tokens"),
+        completion_tokens=_total("completion_tokens"),
+        prompt_eval_ms=_total("prompt_eval_ms"),
+        generation_ms=_total("generation_ms"),
+        queue_ms=max(queue_values) if queue_values else None,
+        sanitize_ms=_total("sanitize_ms"),
+        draft_tokens=_total("draft_tokens"),
+        accepted_tokens=_total("accepted_tokens"),
+        # A truncated segment truncates the document, so "length" wins over the others.
+        stop_reason="length" if "length" in reasons else (reasons[-1] if reasons else None),
+    )
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+# Longest trailing n-gram (in tokens) looked up in the prompt by prompt-lookup decoding.
+LOOKUP_MAX_NGRAM = 2
+
+
+class GgufDraftModel:
+    """
+    llama-cpp-python draft model backed by a small GGUF sharing the main model's vocabulary.
+    Proposes the draft model's greedy continuation; its KV cache is reused for the common
+    prefix with the previous call, so each call only evaluates the newly accepted tokens.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        *,
+        n_ctx: int,
+        n_threads: int,
+        n_gpu_layers: int = -1,
+        num_pred_tokens: int,
+    ) -> None:
+        from llama_cpp import Llama  # type: ignore
+
+        self.num_pred_tokens = num_pred_tokens
+        self.llm = Llama(
+            model_path=model_path,
+            n_ctx=n_ctx,
+            n_threads=n_threads,
+            n_gpu_layers=n_gpu_layers,
+            verbose=False,
+        )
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs: Any) -> np.ndarray:
+        drafted: list[int] = []
+        for token in self.llm.generate(input_ids.tolist(), top_k=1, temp=0.0, reset=True):
+            drafted.append(token)
+            if len(drafted) >= self.num_pred_tokens:
+                break
+        return np.array(drafted, dtype=np.intc)
+
+
+class DraftCounter:
+    """
+    Wraps a draft model and measures how many drafted tokens the main model accepted.
+
+    llama.cpp calls the draft model with the tokens so far after every verification step, so
+    the tokens appended since the previous call show how much of the previous draft survived.
+    """
+
+    def __init__(self, draft) -> None:
+        self._draft = draft
+        self.drafted = 0
+        self.accepted = 0
+        self._last_len = 0
+        self._last_draft: np.ndarray | None = None
+
+    def begin(self) -> None:
+        self.drafted = 0
+        self.accepted = 0
+        self._last_draft = None
+
+    def finish(self) -> tuple[int, int]:
+        """(drafted, accepted) tokens of the generation started by begin()."""
+        self._last_draft = None
+        return self.drafted, self.accepted
+
+    def __call__(self, input_ids: np.ndarray, /, **kwargs: Any) -> np.ndarray:
+        self._score(input_ids)
+        draft = self._draft(input_ids, **kwargs)
+        self._last_len = len(input_ids)
+        self._last_draft = draft
+        return draft
+
+    def _score(self, input_ids: np.ndarray) -> None:
+        draft = self._last_draft
+        if draft is None or not len(draft) or len(input_ids) <= self._last_len:
+            return
+        new = np.asarray(input_ids[self._last_len :])
+        n = min(len(new), len(draft))
+        matches = new[:n] == draft[:n]
+        self.drafted += len(draft)
+        self.accepted += n if matches.all() else int(np.argmin(matches))
+
+
+def build_draft_model(
+    mode: str,
+    *,
+    num_pred_tokens: int,
+    draft_model_path: str | None = None,
+    n_ctx: int = 4096,
+    n_threads: int = 1,
+    n_gpu_layers: int = -1,
+) -> DraftCounter | None:
+    """Draft model for `mode` ("lookup" or "draft"), wrapped for counting; None when off."""
+    if mode == "lookup":
+        from llama_cpp.llama_speculative import LlamaPromptLookupDecoding  # type: ignore
+
+        return DraftCounter(
+            LlamaPromptLookupDecoding(
+                max_ngram_size=LOOKUP_MAX_NGRAM,
+                num_pred_tokens=num_pred_tokens,
+            )
+        )
+    if mode == "draft" and draft_model_path:
+        return DraftCounter(
+            GgufDraftModel(
+                draft_model_path,
+                n_ctx=n_ctx,
+                n_threads=n_threads,
+                n_gpu_layers=n_gpu_layers,
+                num_pred_tokens=num_pred_tokens,
+            )
+        )
+    return None
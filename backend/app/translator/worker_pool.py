@@ -0,0 +1,437 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import asdict, dataclass, field
+
+from .base import TranslationChunk, TranslationResult, Translator
+
+logger = logging.getLogger(__name__)
+
+# Exceptions that keep their type across the process boundary so callers can map them.
+_PASSTHROUGH_ERRORS: dict[str, type[Exception]] = {
+    "FileNotFoundError": FileNotFoundError,
+    "RuntimeError": RuntimeError,
+    "ValueError": ValueError,
+}
+
+
+@dataclass(frozen=True)
+class WorkerPoolConfig:
+    workers: int
+    threads_per_worker: int
+    pin_threads: bool = True
+    # Upper bound for the exponential back-off between restarts of a crash-looping worker.
+    max_restart_delay_s: float = 30.0
+
+
+def partition_cpus(
+    cpus: list[int],
+    workers: int,
+    threads_per_worker: int,
+) -> list[list[int] | None]:
+    """Give each worker a disjoint CPU set, or no pinning when the host is oversubscribed."""
+    if workers * threads_per_worker > len(cpus):
+        return [None] * workers
+    return [
+        cpus[i * threads_per_worker : (i + 1) * threads_per_worker] for i in range(workers)
+    ]
+
+
+def _worker_main(conn, factory: Callable[[], Translator], cpus: list[int] | None) -> None:
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    translator = factory()
+    asyncio.run(_serve(conn, translator))
+
+
+def _read_messages(conn, loop: asyncio.AbstractEventLoop, inbox: asyncio.Queue) -> None:
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            message = None
+        loop.call_soon_threadsafe(inbox.put_nowait, message)
+        if message is None:
+            return
+
+
+async def _serve(conn, translator: Translator) -> None:
+    # Requests run as tasks so a "cancel" message can interrupt one mid-generation; the
+    # translator's own semaphore still runs them one at a time on the worker's llama context.
+    loop = asyncio.get_running_loop()
+    inbox: asyncio.Queue = asyncio.Queue()
+    threading.Thread(target=_read_messages, args=(conn, loop, inbox), daemon=True).start()
+    tasks: dict[int, asyncio.Task] = {}
+    while True:
+        message = await inbox.get()
+        if message is None:
+            for task in tasks.values():
+                task.cancel()
+            return
+        request_id, method, kwargs, sent_at = message
+        if method == "cancel":
+            task = tasks.get(request_id)
+            if task is not None:
+                task.cancel()
+            continue
+        task = asyncio.create_task(_handle(conn, translator, request_id, method, kwargs, sent_at))
+        tasks[request_id] = task
+        task.add_done_callback(lambda _t, rid=request_id: tasks.pop(rid, None))
+
+
+async def _handle(conn, translator: Translator, request_id: int, method: str, kwargs, sent_at):
+    # Time the request sat in the pipe before this worker picked it up.
+    pipe_wait_ms = max(0.0, (time.time() - sent_at) * 1000)
+    try:
+        if method == "translate":
+            payload = asdict(await translator.translate(**kwargs))
+            payload["queue_ms"] = (payload["queue_ms"] or 0.0) + pipe_wait_ms
+        elif method == "translate_stream":
+            # Deltas go out as "chunk" replies; the final result is the usual "ok" reply.
+            result = None
+            async for chunk in translator.translate_stream(**kwargs):
+                if chunk.delta:
+                    conn.send((request_id, "chunk", chunk.delta))
+                if chunk.result is not None:
+                    result = chunk.result
+            if result is None:
+                raise RuntimeError("STREAM_WITHOUT_RESULT")
+            payload = asdict(result)
+            payload["queue_ms"] = (payload["queue_ms"] or 0.0) + pipe_wait_ms
+        elif method == "load":
+            await translator.load()
+            payload = None
+        elif method == "warmup":
+            await translator.warmup(**kwargs)
+            payload = None
+        else:
+            raise ValueError(f"Unknown worker method: {method}")
+    except asyncio.CancelledError:
+        conn.send((request_id, "cancelled", None))
+    except Exception as exc:
+        conn.send((request_id, "error", (type(exc).__name__, str(exc))))
+    else:
+        conn.send((request_id, "ok", payload))
+
+
+@dataclass
+class _Worker:
+    index: int
+    cpus: list[int] | None
+    process: multiprocessing.process.BaseProcess
+    conn: object
+    pending: dict[int, asyncio.Future] = field(default_factory=dict)
+    # Deltas of streaming requests, by request id, until their final reply resolves `pending`.
+    streams: dict[int, asyncio.Queue] = field(default_factory=dict)
+    loaded: bool = False
+    send_lock: threading.Lock = field(default_factory=threading.Lock)
+    started_at: float = field(default_factory=time.monotonic)
+
+
+class WorkerPoolTranslator(Translator):
+    """
+    Dispatch translations to N worker processes, each holding its own llama context.
+
+    Requests travel over a multiprocessing Pipe; a reader thread per worker resolves the
+    awaiting futures. When a worker dies its in-flight requests fail with WORKER_CRASHED and
+    the worker is restarted with exponential back-off.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Translator],
+        config: WorkerPoolConfig,
+        *,
+        fingerprint: str | None = None,
+        model_info: dict | None = None,
+    ) -> None:
+        self._factory = factory
+        self._config = config
+        self._fingerprint = fingerprint
+        self._model_info = model_info or {}
+        self._mp = multiprocessing.get_context("spawn")
+        self._workers: list[_Worker | None] = [None] * config.workers
+        self._ids = itertools.count()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._restarts = 0
+        self._cancelled = 0
+        self._restart_delay = [0.0] * config.workers
+        self._closed = False
+        # Set once load() ran: restarted workers then load (and warm up) before serving.
+        self._preloaded = False
+        self._warmup_requests: list[dict] = []
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+        if config.pin_threads and cpus:
+            self._cpu_sets = partition_cpus(cpus, config.workers, config.threads_per_worker)
+        else:
+            self._cpu_sets = [None] * config.workers
+
+    async def start(self) -> None:
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        for index in range(self._config.workers):
+            self._spawn(index)
+
+    def _spawn(self, index: int) -> None:
+        parent_conn, child_conn = self._mp.Pipe()
+        process = self._mp.Process(
+            target=_worker_main,
+            args=(child_conn, self._factory, self._cpu_sets[index]),
+            name=f"locallingua-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(
+            index=index,
+            cpus=self._cpu_sets[index],
+            process=process,
+            conn=parent_conn,
+        )
+        self._workers[index] = worker
+        threading.Thread(
+            target=self._read_replies,
+            args=(worker,),
+            name=f"locallingua-worker-{index}-reader",
+            daemon=True,
+        ).start()
+
+    def _read_replies(self, worker: _Worker) -> None:
+        while True:
+            try:
+                request_id, status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            self._call_on_loop(self._resolve, worker, request_id, status, payload)
+        # Reap the process here, off the event loop, so its exit code is known below.
+        worker.process.join(timeout=1)
+        self._call_on_loop(self._on_worker_exit, worker)
+
+    def _call_on_loop(self, callback, *args) -> None:
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # The loop closed while this reader was reaping a worker at shutdown.
+            pass
+
+    def _resolve(self, worker: _Worker, request_id: int, status: str, payload) -> None:
+        if status == "chunk":
+            stream = worker.streams.get(request_id)
+            if stream is not None:
+                stream.put_nowait(payload)
+            return
+        future = worker.pending.pop(request_id, None)
+        if future is None or future.done():
+            return
+        if status == "ok":
+            future.set_result(TranslationResult(**payload) if payload is not None else None)
+            return
+        name, message = payload
+        exc_type = _PASSTHROUGH_ERRORS.get(name)
+        future.set_exception(
+            exc_type(message) if exc_type else RuntimeError(f"WORKER_ERROR:{name}:{message}")
+        )
+
+    def _on_worker_exit(self, worker: _Worker) -> None:
+        if self._workers[worker.index] is not worker:
+            return
+        self._workers[worker.index] = None
+        for future in worker.pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("WORKER_CRASHED"))
+        worker.pending.clear()
+        if self._closed:
+            return
+
+        uptime = time.monotonic() - worker.started_at
+        # A worker that ran for a while gets restarted immediately; crash loops back off.
+        delay = 0.0 if uptime > 60 else max(0.5, self._restart_delay[worker.index] * 2)
+        self._restart_delay[worker.index] = min(delay, self._config.max_restart_delay_s)
+        logger.warning(
+            "Inference worker %s exited (code %s); restarting in %.1fs",
+            worker.index,
+            worker.process.exitcode,
+            self._restart_delay[worker.index],
+        )
+        self._restarts += 1
+        self._loop.call_later(self._restart_delay[worker.index], self._restart, worker.index)
+
+    def _restart(self, index: int) -> None:
+        if not self._closed and self._workers[index] is None:
+            self._spawn(index)
+            if self._preloaded:
+                # is_loaded stays False (readiness not ready) until the new worker is back.
+                self._loop.create_task(self._reload(self._workers[index]))
+
+    async def _reload(self, worker: _Worker) -> None:
+        try:
+            await self._call(worker, "load", None)
+            if self._warmup_requests:
+                await self._call(worker, "warmup", {"requests": self._warmup_requests})
+        except Exception:
+            # Its exit is handled by the reader thread; a failed load leaves it unloaded.
+            logger.exception("Reloading inference worker %s failed", worker.index)
+            return
+        worker.loaded = True
+
+    async def _call(self, worker: _Worker, method: str, kwargs: dict | None):
+        request_id, future = self._send(worker, method, kwargs)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self._cancel(worker, request_id)
+            raise
+
+    def _send(self, worker: _Worker, method: str, kwargs: dict | None):
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        worker.pending[request_id] = future
+        try:
+            with worker.send_lock:
+                worker.conn.send((request_id, method, kwargs, time.time()))
+        except (BrokenPipeError, OSError) as exc:
+            worker.pending.pop(request_id, None)
+            raise RuntimeError("WORKER_CRASHED") from exc
+        return request_id, future
+
+    def _cancel(self, worker: _Worker, request_id: int) -> None:
+        # Caller went away: have the worker stop generating instead of finishing unread.
+        if worker.pending.pop(request_id, None) is not None:
+            self._cancelled += 1
+            with contextlib.suppress(OSError), worker.send_lock:
+                worker.conn.send((request_id, "cancel", None, time.time()))
+
+    @property
+    def is_loaded(self) -> bool:
+        return all(w is not None and w.loaded for w in self._workers)
+
+    async def load(self) -> None:
+        await self.start()
+        workers = [w for w in self._workers if w is not None]
+        await asyncio.gather(*(self._call(w, "load", None) for w in workers))
+        for worker in workers:
+            worker.loaded = True
+        self._preloaded = True
+
+    async def warmup(self, requests: list[dict]) -> None:
+        # Every worker owns its own KV cache, so each one needs its own warmup pass.
+        await self.start()
+        self._warmup_requests = requests
+        workers = [w for w in self._workers if w is not None]
+        await asyncio.gather(
+            *(self._call(w, "warmup", {"requests": requests}) for w in workers)
+        )
+
+    def model_info(self) -> dict:
+        return {
+            **self._model_info,
+            "workers": self._config.workers,
+            "threads_per_worker": self._config.threads_per_worker,
+        }
+
+    async def translate(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> TranslationResult:
+        kwargs = {
+            "text": text,
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "options": options,
+        }
+        return await self._call(await self._least_busy(), "translate", kwargs)
+
+    async def translate_stream(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> AsyncIterator[TranslationChunk]:
+        worker = await self._least_busy()
+        kwargs = {
+            "text": text,
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "options": options,
+        }
+        request_id, future = self._send(worker, "translate_stream", kwargs)
+        deltas: asyncio.Queue = asyncio.Queue()
+        worker.streams[request_id] = deltas
+        try:
+            while True:
+                getter = asyncio.ensure_future(deltas.get())
+                try:
+                    await asyncio.wait({getter, future}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    getter.cancel()
+                if getter.done() and not getter.cancelled():
+                    yield TranslationChunk(delta=getter.result())
+                    continue
+                # Replies arrive in order, so every delta is queued before the final one.
+                while not deltas.empty():
+                    yield TranslationChunk(delta=deltas.get_nowait())
+                yield TranslationChunk(delta="", result=future.result())
+                return
+        finally:
+            worker.streams.pop(request_id, None)
+            if not future.done():
+                # The consumer stopped reading (client disconnected) before the end.
+                self._cancel(worker, request_id)
+
+    async def _least_busy(self) -> _Worker:
+        await self.start()
+        alive = [w for w in self._workers if w is not None]
+        if not alive:
+            raise RuntimeError("WORKER_CRASHED")
+        return min(alive, key=lambda w: len(w.pending))
+
+    async def close(self) -> None:
+        self._closed = True
+        for worker in self._workers:
+            if worker is None:
+                continue
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in self._workers:
+            if worker is not None:
+                await asyncio.to_thread(worker.process.join, 5)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+
+    def stats(self) -> dict:
+        return {
+            "worker_pool": {
+                "workers": self._config.workers,
+                "alive": sum(
+                    1 for w in self._workers if w is not None and w.process.is_alive()
+                ),
+                "in_flight": [len(w.pending) if w else 0 for w in self._workers],
+                "restarts": self._restarts,
+                "cancelled": self._cancelled,
+            }
+        }
+
+    def queue_depth(self) -> int:
+        # Each worker serves one request at a time; the rest wait in its pipe.
+        return sum(max(0, len(w.pending) - 1) for w in self._workers if w is not None)
+
+    def fingerprint(self) -> str:
+        return self._fingerprint or super().fingerprint()
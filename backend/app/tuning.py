@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import platform
+from dataclasses import dataclass, fields, replace
+
+from .translator.llama_cpp import KV_CACHE_TYPES, LlamaCppConfig
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TuningProfile:
+    """llama.cpp runtime parameters measured by `python -m app.autotune`; None = keep default."""
+
+    n_threads: int | None = None
+    n_threads_batch: int | None = None
+    n_batch: int | None = None
+    n_ctx: int | None = None
+    use_mmap: bool | None = None
+    use_mlock: bool | None = None
+    kv_cache_type: str | None = None
+    n_gpu_layers: int | None = None
+
+
+def host_info() -> dict:
+    return {
+        "cpus": os.cpu_count(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "processor": platform.processor(),
+    }
+
+
+def profile_to_dict(profile: TuningProfile) -> dict:
+    return {f.name: getattr(profile, f.name) for f in fields(profile)}
+
+
+def load_profile(path: str) -> TuningProfile | None:
+    """Read the "profile" section of an autotune report; None (with a warning) if unusable."""
+    try:
+        with open(os.path.expanduser(path), encoding="utf-8") as fh:
+            payload = json.load(fh)
+        raw = payload["profile"]
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        logger.warning("Ignoring tuning profile %s: %s", path, exc)
+        return None
+
+    known = {f.name for f in fields(TuningProfile)}
+    profile = TuningProfile(**{k: v for k, v in raw.items() if k in known})
+    if profile.kv_cache_type is not None and profile.kv_cache_type not in KV_CACHE_TYPES:
+        logger.warning("Ignoring unknown KV cache type %r in %s", profile.kv_cache_type, path)
+        profile = replace(profile, kv_cache_type=None)
+    # A profile measured elsewhere still beats the defaults, but say so.
+    if payload.get("host", {}).get("cpus") not in (None, os.cpu_count()):
+        logger.warning("Tuning profile %s was measured on a different host", path)
+    return profile
+
+
+def apply_profile(config: LlamaCppConfig, profile: TuningProfile | None) -> LlamaCppConfig:
+    """
+    Overlay the profile's parameters on a config. n_ctx and n_gpu_layers are resolved by
+    Settings instead, so the environment can override them.
+    """
+    if profile is None:
+        return config
+    values = {
+        name: value
+        for name, value in profile_to_dict(profile).items()
+        if value is not None and name not in ("n_ctx", "n_gpu_layers")
+    }
+    return replace(config, **values)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+# Small labelled corpus shared by the benchmarks: one UI-style string and one sentence per
+# supported language, plus a few very short inputs where detectors usually struggle.
+LABELLED_TEXTS: list[tuple[str, str]] = [
+    ("en", "Please save your changes before closing the window."),
+    ("en", "Thanks for your order! It will ship within two business days."),
+    ("es", "Guarda los cambios antes de cerrar la ventana, por favor."),
+    ("es", "¡Gracias por tu pedido! Se enviará en dos días hábiles."),
+    ("fr", "Veuillez enregistrer vos modifications avant de fermer la fenêtre."),
+    ("fr", "Merci pour votre commande ! Elle sera expédiée sous deux jours ouvrés."),
+    ("de", "Bitte speichern Sie Ihre Änderungen, bevor Sie das Fenster schließen."),
+    ("de", "Vielen Dank für Ihre Bestellung! Sie wird innerhalb von zwei Werktagen versandt."),
+    ("it", "Salva le modifiche prima di chiudere la finestra."),
+    ("it", "Grazie per il tuo ordine! Verrà spedito entro due giorni lavorativi."),
+    ("pt", "Por favor, salve suas alterações antes de fechar a janela."),
+    ("pt", "Obrigado pelo seu pedido! Ele será enviado em dois dias úteis."),
+    ("nl", "Sla je wijzigingen op voordat je het venster sluit."),
+    ("nl", "Bedankt voor je bestelling! Die wordt binnen twee werkdagen verzonden."),
+    ("sv", "Spara dina ändringar innan du stänger fönstret."),
+    ("sv", "Tack för din beställning! Den skickas inom två arbetsdagar."),
+    ("no", "Lagre endringene dine før du lukker vinduet."),
+    ("no", "Takk for bestillingen din! Den blir sendt innen to virkedager."),
+    ("da", "Gem dine ændringer, før du lukker vinduet."),
+    ("da", "Tak for din bestilling! Den bliver sendt inden for to hverdage."),
+    ("fi", "Tallenna muutokset ennen kuin suljet ikkunan."),
+    ("fi", "Kiitos tilauksestasi! Se lähetetään kahden arkipäivän kuluessa."),
+    ("pl", "Zapisz zmiany przed zamknięciem okna."),
+    ("pl", "Dziękujemy za zamówienie! Zostanie wysłane w ciągu dwóch dni roboczych."),
+    ("cs", "Před zavřením okna prosím uložte své změny."),
+    ("cs", "Děkujeme za vaši objednávku! Bude odeslána do dvou pracovních dnů."),
+    ("tr", "Lütfen pencereyi kapatmadan önce değişikliklerinizi kaydedin."),
+    ("tr", "Siparişiniz için teşekkürler! İki iş günü içinde kargoya verilecek."),
+    ("ru", "Пожалуйста, сохраните изменения перед закрытием окна."),
+    ("ru", "Спасибо за заказ! Он будет отправлен в течение двух рабочих дней."),
+    ("uk", "Будь ласка, збережіть зміни перед закриттям вікна."),
+    ("uk", "Дякуємо за замовлення! Його буде відправлено протягом двох робочих днів."),
+    ("ar", "يرجى حفظ التغييرات قبل إغلاق النافذة."),
+    ("ar", "شكرا لطلبك! سيتم شحنه خلال يومي عمل."),
+    ("he", "אנא שמרו את השינויים לפני סגירת החלון."),
+    ("he", "תודה על ההזמנה! היא תישלח בתוך שני ימי עסקים."),
+    ("hi", "कृपया विंडो बंद करने से पहले अपने बदलाव सहेजें।"),
+    ("hi", "आपके ऑर्डर के लिए धन्यवाद! इसे दो कार्यदिवसों में भेज दिया जाएगा।"),
+    ("bn", "অনুগ্রহ করে উইন্ডো বন্ধ করার আগে আপনার পরিবর্তনগুলি সংরক্ষণ করুন।"),
+    ("bn", "আপনার অর্ডারের জন্য ধন্যবাদ! এটি দুই কার্যদিবসের মধ্যে পাঠানো হবে।"),
+    ("ur", "براہ کرم ونڈو بند کرنے سے پہلے اپنی تبدیلیاں محفوظ کریں۔"),
+    ("ur", "آپ کے آرڈر کا شکریہ! یہ دو کاروباری دنوں میں بھیج دیا جائے گا۔"),
+    ("ja", "ウィンドウを閉じる前に変更を保存してください。"),
+    ("ja", "ご注文ありがとうございます！二営業日以内に発送いたします。"),
+    ("ko", "창을 닫기 전에 변경 사항을 저장하세요."),
+    ("ko", "주문해 주셔서 감사합니다! 영업일 기준 이틀 이내에 발송됩니다."),
+    ("zh", "关闭窗口前请保存您的更改。"),
+    ("zh", "感谢您的订购！我们将在两个工作日内发货。"),
+    # Short inputs.
+    ("en", "Good morning"),
+    ("es", "Buenos días"),
+    ("de", "Guten Morgen"),
+    ("fr", "Bonjour à tous"),
+    ("ru", "Доброе утро"),
+    ("ja", "おはようございます"),
+]
@@ -0,0 +1,94 @@
+"""
+Compare the NumPy n-gram detector with langdetect on accuracy and per-call latency.
+
+    uv run python -m benchmarks.lang_detect [--repeat 5] [--out results.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+
+from langdetect import DetectorFactory, detect_langs
+
+from app.languages import LANGUAGES
+from app.translator.lang_detect import LanguageDetector
+
+from .corpus import LABELLED_TEXTS
+
+
+def _langdetect(text: str) -> str | None:
+    try:
+        candidates = detect_langs(text)
+    except Exception:
+        return None
+    code = candidates[0].lang if candidates else None
+    return "zh" if code in ("zh-cn", "zh-tw") else code
+
+
+def _summarize(name: str, predict, repeat: int) -> dict:
+    latencies_ms: list[float] = []
+    correct = 0
+    for _ in range(repeat):
+        for expected, text in LABELLED_TEXTS:
+            start = time.perf_counter()
+            predicted = predict(text)
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+            correct += predicted == expected
+    latencies_ms.sort()
+    total = len(LABELLED_TEXTS) * repeat
+    return {
+        "detector": name,
+        "samples": len(LABELLED_TEXTS),
+        "accuracy": correct / total,
+        "mean_ms": statistics.fmean(latencies_ms),
+        "p50_ms": latencies_ms[len(latencies_ms) // 2],
+        "p95_ms": latencies_ms[int(len(latencies_ms) * 0.95) - 1],
+    }
+
+
+def run(repeat: int) -> dict:
+    DetectorFactory.seed = 42
+    codes = [lang.code for lang in LANGUAGES]
+
+    start = time.perf_counter()
+    _langdetect("warm up profiles")
+    langdetect_load_ms = (time.perf_counter() - start) * 1000
+
+    # memo_size=0 so every repetition measures a real scoring pass.
+    detector = LanguageDetector(codes, memo_size=0)
+    start = time.perf_counter()
+    detector.load()
+    ngram_load_ms = (time.perf_counter() - start) * 1000
+
+    baseline = _summarize("langdetect", _langdetect, repeat)
+    baseline["load_ms"] = langdetect_load_ms
+    ngram = _summarize("numpy-ngram", lambda t: detector.detect(t).code, repeat)
+    ngram["load_ms"] = ngram_load_ms
+
+    start = time.perf_counter()
+    detector.detect_many([text for _, text in LABELLED_TEXTS])
+    batch_ms = (time.perf_counter() - start) * 1000
+    ngram["batch_per_text_ms"] = batch_ms / len(LABELLED_TEXTS)
+
+    return {"langdetect": baseline, "numpy_ngram": ngram}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    payload = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""
+Load test the translation API and report latency percentiles and throughput as JSON.
+
+    uv run python -m benchmarks.load --concurrency 1,4,16 --lengths 40,400,2000
+    uv run python -m benchmarks.load --server uvicorn --endpoint stream
+    uv run python -m benchmarks.load --model /path/to/model.gguf --concurrency 1,2
+
+By default requests go through the ASGI app in-process against a SimulatedTranslator (no
+model needed); --server uvicorn runs the same app behind a real uvicorn server on a local
+port, and --model switches to a real GGUF model configured like the server would be.
+The result cache is disabled unless --cache is given, so every request does real work.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import sys
+import threading
+import time
+from dataclasses import asdict
+
+import httpx
+
+from .corpus import LABELLED_TEXTS
+from .simulated import SimulatedCost, SimulatedTranslator
+
+_ENGLISH = [text for lang, text in LABELLED_TEXTS if lang == "en"]
+
+
+def make_text(length: int, index: int) -> str:
+    """English text of about `length` characters, unique per index so nothing is cached."""
+    sentences = [f"Request {index}."]
+    total = len(sentences[0])
+    i = 0
+    while total < length:
+        sentence = _ENGLISH[i % len(_ENGLISH)]
+        sentences.append(sentence)
+        total += len(sentence) + 1
+        i += 1
+    return " ".join(sentences)[: max(length, len(sentences[0]))]
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(
+    latencies_ms: list[float],
+    first_delta_ms: list[float],
+    statuses: dict[str, int],
+    completion_tokens: int,
+    wall_s: float,
+) -> dict:
+    latencies_ms = sorted(latencies_ms)
+    first_delta_ms = sorted(first_delta_ms)
+    ok = statuses.get("200", 0)
+    return {
+        "requests": sum(statuses.values()),
+        "statuses": statuses,
+        "wall_s": round(wall_s, 3),
+        "requests_per_s": round(ok / wall_s, 3) if wall_s else None,
+        "tokens_per_s": round(completion_tokens / wall_s, 1) if wall_s else None,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies_ms), 2) if latencies_ms else None,
+            "p50": percentile(latencies_ms, 50),
+            "p95": percentile(latencies_ms, 95),
+            "p99": percentile(latencies_ms, 99),
+            "max": latencies_ms[-1] if latencies_ms else None,
+        },
+        "first_delta_ms": {
+            "p50": percentile(first_delta_ms, 50),
+            "p95": percentile(first_delta_ms, 95),
+        }
+        if first_delta_ms
+        else None,
+    }
+
+
+async def _one_request(client: httpx.AsyncClient, endpoint: str, body: dict):
+    """Return (status, latency ms, first delta ms or None, completion tokens)."""
+    start = time.perf_counter()
+    if endpoint == "stream":
+        first_delta = None
+        tokens = 0
+        status = 0
+        async with client.stream("POST", "/api/translate/stream", json=body) as resp:
+            status = resp.status_code
+            event = None
+            async for line in resp.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: ") and event == "delta" and first_delta is None:
+                    first_delta = (time.perf_counter() - start) * 1000
+                elif line.startswith("data: ") and event == "done":
+                    tokens = json.loads(line[6:]).get("completion_tokens") or 0
+                elif line.startswith("data: ") and event == "error":
+                    status = 500
+        return status, (time.perf_counter() - start) * 1000, first_delta, tokens
+
+    if endpoint == "batch":
+        resp = await client.post("/api/translate/batch", json=body)
+        tokens = 0
+        if resp.status_code == 200:
+            tokens = sum(r.get("completion_tokens") or 0 for r in resp.json()["results"])
+        return resp.status_code, (time.perf_counter() - start) * 1000, None, tokens
+
+    resp = await client.post("/api/translate", json=body)
+    tokens = (resp.json().get("completion_tokens") or 0) if resp.status_code == 200 else 0
+    return resp.status_code, (time.perf_counter() - start) * 1000, None, tokens
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    *,
+    endpoint: str,
+    concurrency: int,
+    length: int,
+    requests: int,
+    source_lang: str,
+    target_lang: str,
+    mode: str,
+    batch_texts: int,
+) -> dict:
+    counter = iter(range(requests))
+    latencies: list[float] = []
+    first_deltas: list[float] = []
+    statuses: dict[str, int] = {}
+    tokens = 0
+
+    def _body(index: int) -> dict:
+        body = {
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "options": {"mode": mode},
+        }
+        if endpoint == "batch":
+            body["texts"] = [make_text(length, index * batch_texts + j) for j in range(batch_texts)]
+        else:
+            body["text"] = make_text(length, index)
+        return body
+
+    async def _client_loop() -> None:
+        nonlocal tokens
+        for index in counter:
+            status, latency, first_delta, completion = await _one_request(
+                client, endpoint, _body(index)
+            )
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            latencies.append(latency)
+            if first_delta is not None:
+                first_deltas.append(first_delta)
+            tokens += completion
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_client_loop() for _ in range(concurrency)))
+    wall_s = time.perf_counter() - start
+    return {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "input_chars": length,
+        **summarize(latencies, first_deltas, statuses, tokens, wall_s),
+    }
+
+
+def _configure_env(args: argparse.Namespace) -> None:
+    if not args.cache:
+        os.environ["LOCALLINGUA_CACHE_SIZE"] = "0"
+        os.environ.pop("LOCALLINGUA_CACHE_PATH", None)
+    if args.model:
+        os.environ["LOCALLINGUA_MODEL_PATH"] = args.model
+        os.environ["LOCALLINGUA_ALLOW_FAKE_TRANSLATOR"] = "0"
+    else:
+        os.environ.pop("LOCALLINGUA_MODEL_PATH", None)
+        # Admission control sizes itself from this; keep it in step with the simulated model.
+        os.environ["LOCALLINGUA_MAX_CONCURRENCY"] = str(args.slots)
+
+
+def _simulated_translator(args: argparse.Namespace, settings):
+    from app.translator.segment import SegmentingTranslator
+
+    translator = SimulatedTranslator(
+        SimulatedCost(
+            slots=args.slots,
+            prompt_ms_per_token=args.prompt_ms_per_token,
+            ms_per_token=args.ms_per_token,
+        )
+    )
+    if settings.segment_max_chars > 0:
+        return SegmentingTranslator(translator, max_chars=settings.segment_max_chars)
+    return translator
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _UvicornThread:
+    """Serve the app with a real uvicorn server on a background thread."""
+
+    def __init__(self, app, port: int) -> None:
+        import uvicorn
+
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+
+async def _sweep(client: httpx.AsyncClient, args: argparse.Namespace) -> list[dict]:
+    runs = []
+    for length in args.lengths:
+        for concurrency in args.concurrency:
+            # A short warmup per level so model load / first-request costs stay out of it.
+            await run_level(
+                client,
+                endpoint=args.endpoint,
+                concurrency=1,
+                length=length,
+                requests=args.warmup,
+                source_lang=args.source,
+                target_lang=args.target,
+                mode=args.mode,
+                batch_texts=args.batch_texts,
+            )
+            result = await run_level(
+                client,
+                endpoint=args.endpoint,
+                concurrency=concurrency,
+                length=length,
+                requests=args.requests or max(20, concurrency * 5),
+                source_lang=args.source,
+                target_lang=args.target,
+                mode=args.mode,
+                batch_texts=args.batch_texts,
+            )
+            print(
+                f"c={concurrency:<4} chars={length:<6} "
+                f"rps={result['requests_per_s']} tok/s={result['tokens_per_s']} "
+                f"p50={result['latency_ms']['p50']:.0f}ms p99={result['latency_ms']['p99']:.0f}ms",
+                file=sys.stderr,
+            )
+            runs.append(result)
+    return runs
+
+
+async def run(args: argparse.Namespace) -> dict:
+    _configure_env(args)
+    from app.config import load_settings
+    from app.main import _build_translator, create_app
+
+    app = create_app()
+    settings = load_settings()
+    timeout = httpx.Timeout(args.timeout)
+
+    if args.server == "uvicorn":
+        port = _free_port()
+        with _UvicornThread(app, port):
+            # Startup built the translator from the environment; swap in the simulated one.
+            if not args.model:
+                app.state.translator = _simulated_translator(args, app.state.settings)
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}",
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=max(args.concurrency) + 4),
+            ) as client:
+                runs = await _sweep(client, args)
+    else:
+        app.state.settings = settings
+        app.state.translator = (
+            _build_translator(settings) if args.model else _simulated_translator(args, settings)
+        )
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport,
+                base_url="http://bench",
+                timeout=timeout,
+            ) as client:
+                runs = await _sweep(client, args)
+        finally:
+            await app.state.translator.close()
+
+    return {
+        "config": {
+            "server": args.server,
+            "translator": "gguf" if args.model else "simulated",
+            "model": args.model,
+            "simulated_cost": None
+            if args.model
+            else asdict(
+                SimulatedCost(
+                    slots=args.slots,
+                    prompt_ms_per_token=args.prompt_ms_per_token,
+                    ms_per_token=args.ms_per_token,
+                )
+            ),
+            "endpoint": args.endpoint,
+            "mode": args.mode,
+            "source_lang": args.source,
+            "target_lang": args.target,
+            "cache": args.cache,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "runs": runs,
+    }
+
+
+def _int_list(raw: str) -> list[int]:
+    return [int(part) for part in raw.split(",") if part.strip()]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--server", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--endpoint", choices=["translate", "batch", "stream"], default="translate")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16])
+    parser.add_argument("--lengths", type=_int_list, default=[40, 400, 2000])
+    parser.add_argument(
+        "--requests", type=int, default=0, help="per level (default: 5x the concurrency)"
+    )
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--batch-texts", type=int, default=8)
+    parser.add_argument("--mode", choices=["literal", "natural", "smart"], default="literal")
+    parser.add_argument("--source", default="en")
+    parser.add_argument("--target", default="es")
+    parser.add_argument("--model", help="path to a GGUF model (default: simulated translator)")
+    parser.add_argument("--slots", type=int, default=1, help="simulated parallel sequences")
+    parser.add_argument("--prompt-ms-per-token", type=float, default=0.5)
+    parser.add_argument("--ms-per-token", type=float, default=25.0)
+    parser.add_argument("--cache", action="store_true", help="keep the result cache enabled")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--out", help="write JSON results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    payload = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
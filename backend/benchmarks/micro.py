@@ -0,0 +1,103 @@
+"""
+Microbenchmarks for the per-request CPU work around the model.
+
+    uv run python -m benchmarks.micro [--seconds 0.5] [--out micro.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+from collections.abc import Callable
+
+from app.languages import LANGUAGES
+from app.translator.lang_detect import LanguageDetector, detect_language
+from app.translator.llama_cpp import StreamingSanitizer, sanitize_translation
+from app.translator.prompt import build_translation_prompt
+
+from .corpus import LABELLED_TEXTS
+from .load import make_text
+
+_FENCED = "```text\n" + make_text(400, 0) + "\n```"
+
+
+def bench(fn: Callable[[], object], *, seconds: float, rounds: int = 5) -> dict:
+    """Time `fn` in `rounds` rounds of about `seconds / rounds` each; report ns per call."""
+    # Calibrate the inner loop so each round is long enough for the clock.
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= seconds / rounds / 10:
+            break
+        number *= 2
+    per_call_ns = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number * 10):
+            fn()
+        per_call_ns.append((time.perf_counter() - start) / (number * 10) * 1e9)
+    return {
+        "calls_per_round": number * 10,
+        "median_ns": round(statistics.median(per_call_ns)),
+        "min_ns": round(min(per_call_ns)),
+    }
+
+
+def _cycle(values: list):
+    state = {"i": 0}
+
+    def _next():
+        state["i"] = (state["i"] + 1) % len(values)
+        return values[state["i"]]
+
+    return _next
+
+
+def run(seconds: float) -> dict:
+    texts = [text for _, text in LABELLED_TEXTS]
+    next_text = _cycle(texts)
+    unmemoized = LanguageDetector([lang.code for lang in LANGUAGES], memo_size=0)
+    unmemoized.load()
+    detect_language(texts[0])  # load the shared detector before timing
+
+    def _stream_sanitize():
+        sanitizer = StreamingSanitizer()
+        for piece in _FENCED.split(" "):
+            sanitizer.feed(piece + " ")
+        sanitizer.flush()
+
+    cases: dict[str, Callable[[], object]] = {
+        "detect_language[memoized]": lambda: detect_language(next_text()),
+        "detect_language[uncached]": lambda: unmemoized.detect(next_text()),
+        "detect_language[uncached,2000 chars]": lambda: unmemoized.detect(make_text(2000, 1)),
+        "build_translation_prompt[short]": lambda: build_translation_prompt(
+            text=next_text(), source_lang="auto", target_lang="es", mode="literal"
+        ),
+        "build_translation_prompt[2000 chars]": lambda: build_translation_prompt(
+            text=make_text(2000, 1), source_lang="en", target_lang="ja", mode="natural"
+        ),
+        "sanitize_translation[plain]": lambda: sanitize_translation(next_text()),
+        "sanitize_translation[fenced]": lambda: sanitize_translation(_FENCED),
+        "StreamingSanitizer[fenced, word deltas]": _stream_sanitize,
+    }
+    return {name: bench(fn, seconds=seconds) for name, fn in cases.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--seconds", type=float, default=0.5, help="time budget per case")
+    parser.add_argument("--out", help="write JSON results to this file")
+    args = parser.parse_args()
+    payload = json.dumps(run(args.seconds), indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(payload + "\n")
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
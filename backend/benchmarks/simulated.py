@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+
+from app.translator.base import TranslationChunk, TranslationResult
+from app.translator.fake import FakeTranslator
+
+# Rough characters per token, used to turn benchmark texts into simulated token counts.
+CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True)
+class SimulatedCost:
+    """Latency/throughput model of a local GGUF model."""
+
+    # Parallel sequences the simulated model serves (like LOCALLINGUA_MAX_CONCURRENCY).
+    slots: int = 1
+    prompt_ms_per_token: float = 0.5
+    ms_per_token: float = 25.0
+    # Output tokens per input token.
+    output_ratio: float = 1.1
+    # Fixed per-request overhead (sampling setup, context reset).
+    overhead_ms: float = 2.0
+
+
+class SimulatedTranslator(FakeTranslator):
+    """
+    FakeTranslator that takes as long as a real model would: prompt evaluation scales with the
+    input length, generation with the output length, and only `slots` requests run at once.
+    Sleeping instead of computing keeps the benchmark about the server, not the host CPU.
+    """
+
+    def __init__(self, cost: SimulatedCost | None = None) -> None:
+        self.cost = cost or SimulatedCost()
+        self._semaphore = asyncio.Semaphore(self.cost.slots)
+        self._waiting = 0
+
+    def _tokens(self, text: str) -> tuple[int, int]:
+        prompt_tokens = max(1, len(text) // CHARS_PER_TOKEN) + 40  # + instruction block
+        completion_tokens = max(1, int(len(text) / CHARS_PER_TOKEN * self.cost.output_ratio))
+        return prompt_tokens, completion_tokens
+
+    async def _acquire(self) -> float:
+        start = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        return (time.perf_counter() - start) * 1000
+
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    async def translate(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> TranslationResult:
+        chunks = []
+        async for chunk in self.translate_stream(
+            text=text,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            options=options,
+        ):
+            chunks.append(chunk)
+        return chunks[-1].result
+
+    async def translate_stream(
+        self,
+        *,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        options: dict,
+    ) -> AsyncIterator[TranslationChunk]:
+        prompt_tokens, completion_tokens = self._tokens(text)
+        completion_tokens = min(completion_tokens, int(options.get("max_tokens", 512)))
+        cleaned = re.sub(r"\s+", " ", text).strip()
+        words = re.findall(r"\S+\s*", f"[fake {source_lang}->{target_lang}] {cleaned}")
+        queue_ms = await self._acquire()
+        try:
+            prompt_eval_ms = self.cost.overhead_ms + prompt_tokens * self.cost.prompt_ms_per_token
+            await asyncio.sleep(prompt_eval_ms / 1000)
+            start = time.perf_counter()
+            # Spread the words over the simulated tokens so streams pace like a real model.
+            per_word = max(1, completion_tokens // max(1, len(words)))
+            for word in words:
+                await asyncio.sleep(per_word * self.cost.ms_per_token / 1000)
+                yield TranslationChunk(delta=word)
+            generation_ms = (time.perf_counter() - start) * 1000
+        finally:
+            self._semaphore.release()
+        yield TranslationChunk(
+            delta="",
+            result=TranslationResult(
+                translated_text="".join(words),
+                detected_source_lang=None,
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                prompt_eval_ms=prompt_eval_ms,
+                generation_ms=generation_ms,
+                queue_ms=queue_ms,
+                sanitize_ms=0.0,
+            ),
+        )
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from app.admission import AdmissionConfig, AdmissionController, estimate_cost
+from app.config import load_settings
+from app.errors import ApiError
+from app.main import create_app
+from app.translator.base import TranslationResult, Translator
+
+
+@pytest.fixture(autouse=True)
+def _env():
+    os.environ["LOCALLINGUA_ALLOW_FAKE_TRANSLATOR"] = "1"
+    os.environ.pop("LOCALLINGUA_MODEL_PATH", None)
+    yield
+    os.environ.pop("LOCALLINGUA_QUEUE_SIZE", None)
+
+
+async def _hold(controller, ctx, cost, order, name, release: asyncio.Event):
+    async with controller.slot(ctx, cost):
+        order.append(name)
+        await release.wait()
+
+
+def test_estimate_cost_grows_with_input_and_is_capped_by_max_tokens():
+    assert estimate_cost("x" * 4000, 512) > estimate_cost("x" * 40, 512)
+    assert estimate_cost("x" * 4000, 16) == pytest.approx(1000 + 16)
+
+
+@pytest.mark.asyncio
+async def test_small_requests_from_another_client_overtake_a_heavy_client():
+    controller = AdmissionController(AdmissionConfig(capacity=1, max_queue=10))
+    heavy = controller.context(client_id="heavy", deadline_ms=0)
+    light = controller.context(client_id="light", deadline_ms=0)
+    order: list[str] = []
+    release = asyncio.Event()
+
+    tasks = [asyncio.create_task(_hold(controller, heavy, 2500.0, order, "heavy-1", release))]
+    await asyncio.sleep(0)
+    for name, ctx, cost in (
+        ("heavy-2", heavy, 2500.0),
+        ("heavy-3", heavy, 2500.0),
+        ("light-1", light, 10.0),
+    ):
+        tasks.append(asyncio.create_task(_hold(controller, ctx, cost, order, name, release)))
+        await asyncio.sleep(0)
+    assert controller.stats()["queued"] == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ["heavy-1", "light-1", "heavy-2", "heavy-3"]
+    assert controller.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_retry_after():
+    controller = AdmissionController(AdmissionConfig(capacity=1, max_queue=1))
+    ctx = controller.context(client_id="a", deadline_ms=0)
+    release = asyncio.Event()
+    order: list[str] = []
+    tasks = [
+        asyncio.create_task(_hold(controller, ctx, 10.0, order, str(i), release)) for i in range(2)
+    ]
+    await asyncio.sleep(0)
+
+    with pytest.raises(ApiError) as info:
+        async with controller.slot(ctx, 10.0):
+            pass
+    assert info.value.status_code == 429
+    assert info.value.code == "QUEUE_FULL"
+    assert int(info.value.headers["Retry-After"]) >= 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert controller.stats()["rejected"]["queue_full"] == 1
+
+
+@pytest.mark.asyncio
+async def test_deadline_exceeded_while_queued_and_unreachable_deadline():
+    controller = AdmissionController(AdmissionConfig(capacity=1, max_queue=10))
+    release = asyncio.Event()
+    holder = asyncio.create_task(
+        _hold(controller, controller.context(client_id="a", deadline_ms=0), 10.0, [], "a", release)
+    )
+    await asyncio.sleep(0)
+
+    with pytest.raises(ApiError) as info:
+        async with controller.slot(controller.context(client_id="b", deadline_ms=20), 10.0):
+            pass
+    assert info.value.code == "DEADLINE_EXCEEDED"
+    assert info.value.status_code == 503
+    assert controller.stats()["queued"] == 0
+
+    release.set()
+    await holder
+    # The finished request taught the controller its throughput (~10 tokens / 20+ ms), so a
+    # huge request with a 1 ms budget is refused before queueing.
+    with pytest.raises(ApiError) as info:
+        controller.check(controller.context(client_id="b", deadline_ms=1), 100000.0)
+    assert info.value.code == "DEADLINE_UNREACHABLE"
+
+
+class _SlowTranslator(Translator):
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        await self.release.wait()
+        return TranslationResult(translated_text=f"ES:{text}", detected_source_lang=None)
+
+
+@pytest.mark.asyncio
+async def test_api_rejects_when_queue_is_full():
+    os.environ["LOCALLINGUA_QUEUE_SIZE"] = "1"
+    app = create_app()
+    app.state.settings = load_settings()
+    translator = _SlowTranslator()
+    app.state.translator = translator
+
+    # Distinct texts: identical requests in flight would share one generation.
+    def body(text: str) -> dict:
+        return {"text": text, "source_lang": "en", "target_lang": "es"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = asyncio.create_task(client.post("/api/translate", json=body("Hello there")))
+        second = asyncio.create_task(client.post("/api/translate", json=body("Good morning")))
+        while getattr(app.state, "admission", None) is None or app.state.admission.queued < 1:
+            await asyncio.sleep(0.01)
+
+        rejected = await client.post("/api/translate", json=body("Good night"))
+        assert rejected.status_code == 429
+        assert rejected.json()["error"]["code"] == "QUEUE_FULL"
+        assert "retry-after" in rejected.headers
+
+        bad_deadline = await client.post(
+            "/api/translate", json=body("Good night"), headers={"X-Deadline-Ms": "soon"}
+        )
+        assert bad_deadline.status_code == 400
+
+        translator.release.set()
+        assert (await first).status_code == 200
+        assert (await second).status_code == 200
+
+        stats = (await client.get("/api/stats")).json()["admission"]
+    assert stats["rejected"]["queue_full"] == 1
+    assert stats["admitted"] == 2
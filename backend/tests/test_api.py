@@ -129,3 +129,37 @@ async def test_translate_literal_does_not_retry(app):
     body = res.json()
     assert body["translated_text"] == "cheeseburger"
     assert body["used_mode"] == "literal"
+
+
+@pytest.mark.asyncio
+async def test_translate_batch_preserves_order(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        res = await ac.post(
+            "/api/translate/batch",
+            json={
+                "texts": ["first", "second", "third"],
+                "source_lang": "en",
+                "target_lang": "es",
+                "options": {"mode": "natural"},
+            },
+        )
+    assert res.status_code == 200
+    body = res.json()
+    translated = [r["translated_text"] for r in body["results"]]
+    assert translated == ["NAT:first", "NAT:second", "NAT:third"]
+    assert body["latency_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_translate_batch_validates(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        empty = await ac.post("/api/translate/batch", json={"texts": [], "target_lang": "es"})
+        bad_lang = await ac.post(
+            "/api/translate/batch",
+            json={"texts": ["hello"], "target_lang": "xx"},
+        )
+    assert empty.status_code == 422
+    assert bad_lang.status_code == 400
+    assert bad_lang.json()["error"]["code"] == "UNSUPPORTED_TARGET_LANG"
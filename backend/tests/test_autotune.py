@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import os
+
+from app.autotune import (
+    Measurement,
+    profile_from_config,
+    search_space,
+    service_min_ctx,
+    tune,
+)
+from app.config import load_settings
+from app.translator.llama_cpp import LlamaCppConfig, llama_params
+from app.tuning import apply_profile, load_profile, profile_to_dict
+
+
+def _fake_measure(config: LlamaCppConfig) -> Measurement:
+    if config.use_mlock:
+        return Measurement(error="RuntimeError: mlock failed")
+    # Fastest at 8 threads and n_batch 256; everything else is noise-level.
+    ms = abs((config.n_threads or 4) - 8) * 10 + abs(config.n_batch - 256) / 10 + 100
+    return Measurement(requests=1, prompt_eval_ms=ms / 2, generation_ms=ms / 2, prompt_tokens=50)
+
+
+def test_tune_finds_best_parameters_and_records_failures():
+    base = LlamaCppConfig(model_path="m.gguf", max_concurrency=1, n_threads=4, kv_cache_type="f16")
+    space = search_space(
+        ["n_threads", "n_batch", "use_mlock"],
+        cpus=16,
+        min_ctx=1000,
+        n_batch=[128, 256, 512],
+    )
+    assert list(space) == ["n_threads", "n_batch", "use_mlock"]
+    best, results = tune(base, space, _fake_measure)
+    assert (best.n_threads, best.n_batch, best.use_mlock) == (8, 256, False)
+    assert any(r["error"] for r in results)
+    assert results[0]["config"]["n_threads"] == 4
+    assert results[0]["prompt_tokens_per_s"] is not None
+
+
+def test_profile_round_trip_into_settings_and_config(tmp_path):
+    best = LlamaCppConfig(
+        model_path="m.gguf",
+        max_concurrency=1,
+        n_threads=12,
+        n_threads_batch=16,
+        n_batch=256,
+        n_ctx=2048,
+        n_gpu_layers=20,
+        kv_cache_type="q8_0",
+    )
+    path = tmp_path / "tuning.json"
+    path.write_text(
+        json.dumps(
+            {
+                "host": {"cpus": os.cpu_count()},
+                "profile": profile_to_dict(profile_from_config(best)),
+            }
+        )
+    )
+    os.environ["LOCALLINGUA_TUNING_PROFILE"] = str(path)
+    try:
+        settings = load_settings()
+    finally:
+        os.environ.pop("LOCALLINGUA_TUNING_PROFILE")
+    assert settings.n_ctx == 2048 and settings.n_gpu_layers == 20
+    config = apply_profile(
+        LlamaCppConfig(model_path="other.gguf", max_concurrency=2),
+        settings.tuning_profile,
+    )
+    assert (config.n_threads, config.n_threads_batch, config.n_batch) == (12, 16, 256)
+    assert config.model_path == "other.gguf" and config.max_concurrency == 2
+
+    params = llama_params(config)
+    assert params["type_k"] == params["type_v"] == 8 and params["flash_attn"]
+
+
+def test_unreadable_profile_is_ignored(tmp_path):
+    path = tmp_path / "tuning.json"
+    path.write_text("{not json")
+    assert load_profile(str(path)) is None
+    path.write_text(json.dumps({"profile": {"kv_cache_type": "q3_weird", "n_batch": 128}}))
+    profile = load_profile(str(path))
+    assert profile.kv_cache_type is None and profile.n_batch == 128
+
+
+def test_context_sizes_below_the_service_worst_case_are_skipped():
+    one = service_min_ctx(segment_max_chars=1000, max_tokens=512)
+    assert one > 1000 // 3 + 512
+    assert service_min_ctx(segment_max_chars=1000, max_tokens=512, parallel=4) == one * 4
+    space = search_space(["n_ctx"], cpus=4, min_ctx=one)
+    assert space["n_ctx"] == [2048, 4096, 8192]
+
+
+def test_gpu_layers_setting(monkeypatch):
+    assert load_settings().n_gpu_layers == -1
+    monkeypatch.setenv("LOCALLINGUA_N_GPU_LAYERS", "0")
+    assert load_settings().n_gpu_layers == 0
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import sys
+import threading
+from types import SimpleNamespace
+
+from app.translator.batching import BatchScheduler, BatchSchedulerConfig
+
+N_VOCAB = 4
+
+
+def _fake_llama_cpp(decoding: threading.Event, release: threading.Event) -> SimpleNamespace:
+    """Just enough of llama_cpp's low-level API: every decode waits for `release`."""
+    logits = (ctypes.c_float * N_VOCAB)(0.0, 1.0, 0.0, 0.0)
+
+    def _decode(_ctx, _batch) -> int:
+        decoding.set()
+        release.wait(5)
+        return 0
+
+    def _batch_init(n_tokens, _embd, _n_seq_max):
+        return SimpleNamespace(
+            n_tokens=0,
+            token=[0] * n_tokens,
+            pos=[0] * n_tokens,
+            n_seq_id=[0] * n_tokens,
+            seq_id=[[0] for _ in range(n_tokens)],
+            logits=[False] * n_tokens,
+        )
+
+    return SimpleNamespace(
+        llama_context_default_params=SimpleNamespace,
+        llama_new_context_with_model=lambda _model, _params: object(),
+        llama_batch_init=_batch_init,
+        llama_decode=_decode,
+        llama_get_logits_ith=lambda _ctx, _i: ctypes.cast(logits, ctypes.POINTER(ctypes.c_float)),
+        llama_kv_cache_seq_rm=lambda *_: None,
+        llama_kv_cache_seq_cp=lambda *_: None,
+        # Every sampled token ends its sequence after one step.
+        llama_token_is_eog=lambda _model, _token: True,
+        llama_batch_free=lambda _batch: None,
+        llama_free=lambda _ctx: None,
+    )
+
+
+class _Llm:
+    model = object()
+
+    def n_vocab(self) -> int:
+        return N_VOCAB
+
+    def tokenize(self, data: bytes) -> list[int]:
+        return list(data)
+
+    def detokenize(self, tokens: list[int]) -> bytes:
+        return b""
+
+
+async def test_queued_counts_requests_waiting_for_a_sequence_slot(monkeypatch):
+    decoding, release = threading.Event(), threading.Event()
+    monkeypatch.setitem(sys.modules, "llama_cpp", _fake_llama_cpp(decoding, release))
+    scheduler = BatchScheduler(_Llm(), BatchSchedulerConfig(max_sequences=2, n_ctx_per_sequence=64))
+
+    async def _submit(i: int):
+        return await scheduler.submit(
+            f"prompt {i}", temperature=0.0, top_p=1.0, max_tokens=4, seed=None
+        )
+
+    tasks = [asyncio.create_task(_submit(i)) for i in range(5)]
+    await asyncio.sleep(0)
+    try:
+        assert await asyncio.to_thread(decoding.wait, 5)
+        stats = scheduler.stats()
+        # Drained into the loop or not, everything without a slot counts as queued.
+        assert 1 <= stats["active_sequences"] <= 2
+        assert stats["queued"] == 5 - stats["active_sequences"]
+    finally:
+        release.set()
+        completions = await asyncio.gather(*tasks)
+        scheduler.close()
+    assert len(completions) == 5 and scheduler.stats()["queued"] == 0
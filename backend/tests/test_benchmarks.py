@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.load import make_text, parse_args, percentile, run
+from benchmarks.simulated import SimulatedCost, SimulatedTranslator
+
+
+def test_percentile_and_make_text():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) is None
+    assert make_text(200, 1) != make_text(200, 2)
+    assert len(make_text(200, 1)) == 200
+
+
+@pytest.mark.asyncio
+async def test_simulated_translator_reports_costs():
+    translator = SimulatedTranslator(SimulatedCost(ms_per_token=0.1, prompt_ms_per_token=0.01))
+    result = await translator.translate(
+        text="Hello there, friend.", source_lang="en", target_lang="es", options={}
+    )
+    assert result.translated_text.startswith("[fake en->es]")
+    assert result.completion_tokens and result.prompt_tokens
+    assert result.generation_ms is not None and result.queue_ms is not None
+
+
+@pytest.mark.asyncio
+async def test_inprocess_sweep_reports_percentiles(monkeypatch):
+    # run() configures the server through the environment; restore it afterwards.
+    for name in ("LOCALLINGUA_CACHE_SIZE", "LOCALLINGUA_MAX_CONCURRENCY"):
+        monkeypatch.setenv(name, "")
+    monkeypatch.delenv("LOCALLINGUA_MODEL_PATH", raising=False)
+    args = parse_args(
+        [
+            "--concurrency", "1,2",
+            "--lengths", "40",
+            "--requests", "4",
+            "--warmup", "1",
+            "--ms-per-token", "0.1",
+            "--prompt-ms-per-token", "0.01",
+        ]
+    )
+    results = await run(args)
+    assert [r["concurrency"] for r in results["runs"]] == [1, 2]
+    for level in results["runs"]:
+        assert level["statuses"] == {"200": 4}
+        assert level["latency_ms"]["p99"] >= level["latency_ms"]["p50"] > 0
+        assert level["tokens_per_s"] > 0
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from app.cache import TranslationCache, translation_cache_key
+from app.config import load_settings
+from app.main import create_app
+from app.translator.base import TranslationResult, Translator
+
+_OPTIONS = {"mode": "literal", "temperature": 0.0, "top_p": 1.0, "max_tokens": 512, "seed": 42}
+
+
+def _key(**overrides):
+    params = {
+        "fingerprint": "model-a",
+        "text": "Hello world",
+        "source_lang": "en",
+        "target_lang": "es",
+        "options": _OPTIONS,
+    }
+    params.update(overrides)
+    return translation_cache_key(**params)
+
+
+def test_key_normalizes_surrounding_whitespace():
+    assert _key(text="  Hello world\r\n") == _key()
+
+
+def test_key_depends_on_model_mode_and_options():
+    assert _key(fingerprint="model-b") != _key()
+    assert _key(options={**_OPTIONS, "mode": "natural"}) != _key()
+    assert _key(options={**_OPTIONS, "max_tokens": 64}) != _key()
+    assert _key(text="Hello  world") != _key()
+
+
+def test_key_skips_unseeded_sampling():
+    assert _key(options={**_OPTIONS, "temperature": 0.7, "seed": None}) is None
+
+
+@pytest.mark.asyncio
+async def test_memory_lru_evicts_oldest():
+    cache = TranslationCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        await cache.put(key, TranslationResult(translated_text=key, detected_source_lang=None))
+    assert await cache.get("a") is None
+    hit = await cache.get("c")
+    assert hit is not None and hit.cached is True
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_tier_is_shared_between_instances(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    writer = TranslationCache(max_entries=8, path=str(path))
+    await writer.put("k", TranslationResult(translated_text="Hola", detected_source_lang="en"))
+
+    reader = TranslationCache(max_entries=8, path=str(path))
+    hit = await reader.get("k")
+    assert hit == TranslationResult(translated_text="Hola", detected_source_lang="en", cached=True)
+    assert reader.stats()["disk_hits"] == 1
+
+
+class _CountingTranslator(Translator):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        self.calls += 1
+        return TranslationResult(translated_text=f"T:{text}", detected_source_lang=None)
+
+
+@pytest.mark.asyncio
+async def test_translate_endpoint_serves_repeats_from_cache():
+    app = create_app()
+    app.state.settings = load_settings()
+    translator = _CountingTranslator()
+    app.state.translator = translator
+    app.state.cache = TranslationCache(max_entries=16)
+    payload = {
+        "text": "Save changes",
+        "source_lang": "en",
+        "target_lang": "es",
+        "options": {"mode": "literal"},
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        first = await ac.post("/api/translate", json=payload)
+        second = await ac.post("/api/translate", json=payload)
+        stats = await ac.get("/api/stats")
+
+    assert first.json()["cached"] is False
+    assert second.json()["cached"] is True
+    assert second.json()["translated_text"] == "T:Save changes"
+    assert translator.calls == 1
+    assert stats.json()["cache"]["hits"] == 1
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.config import load_settings
+from app.main import create_app
+from app.translator.base import TranslationResult, Translator
+from app.translator.llama_cpp import _run_cancellable
+
+
+@pytest.fixture(autouse=True)
+def _env():
+    os.environ["LOCALLINGUA_ALLOW_FAKE_TRANSLATOR"] = "1"
+    os.environ.pop("LOCALLINGUA_MODEL_PATH", None)
+    yield
+
+
+class _HangingTranslator(Translator):
+    def __init__(self) -> None:
+        self.cancelled = asyncio.Event()
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+        return TranslationResult(translated_text=text, detected_source_lang=None)
+
+
+def _app(translator: Translator):
+    app = create_app()
+    app.state.settings = load_settings()
+    app.state.translator = translator
+    return app
+
+
+@pytest.mark.asyncio
+async def test_run_cancellable_stops_thread_before_reraising():
+    stop = threading.Event()
+    exited = threading.Event()
+
+    def _generate():
+        # Stand-in for llama.cpp checking its stopping criteria once per token.
+        while not stop.is_set():
+            time.sleep(0.005)
+        exited.set()
+
+    task = asyncio.create_task(_run_cancellable(_generate, stop))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert exited.is_set()
+
+
+@pytest.mark.asyncio
+async def test_deadline_cancels_generation_and_frees_slot():
+    translator = _HangingTranslator()
+    app = _app(translator)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.post(
+            "/api/translate",
+            json={"text": "Hello there", "source_lang": "en", "target_lang": "es"},
+            headers={"X-Deadline-Ms": "100"},
+        )
+        metrics = (await client.get("/api/metrics")).text
+
+    assert resp.status_code == 503
+    assert resp.json()["error"]["code"] == "DEADLINE_EXCEEDED"
+    assert translator.cancelled.is_set()
+    assert app.state.admission.stats()["in_flight"] == 0
+    assert 'locallingua_cancelled_total{reason="deadline"} 1' in metrics
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_generation():
+    translator = _HangingTranslator()
+    app = _app(translator)
+    body = json.dumps(
+        {"text": "Hello there", "source_lang": "en", "target_lang": "es"}
+    ).encode()
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    disconnect = asyncio.Event()
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    sent: list[dict] = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/translate",
+        "raw_path": b"/api/translate",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"test")],
+        "client": ("127.0.0.1", 5000),
+        "server": ("test", 80),
+    }
+    call = asyncio.create_task(app(scope, receive, send))
+    await asyncio.sleep(0.1)
+    assert not translator.cancelled.is_set()
+
+    disconnect.set()
+    await asyncio.wait_for(call, timeout=5)
+    assert translator.cancelled.is_set()
+    assert app.state.admission.stats()["in_flight"] == 0
+    assert app.state.metrics.cancelled.value(reason="disconnect") == 1
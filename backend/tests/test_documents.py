@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+
+import httpx
+import pytest
+
+from app.config import load_settings
+from app.documents import DocumentError, render, source_text, split_document
+from app.main import create_app
+from app.translator.base import TranslationResult, Translator
+
+MARKDOWN = """---
+title: Notes
+---
+# Release notes
+
+The new version is
+faster than before.
+
+- Fixed the `login` bug
+| Name | Value |
+|------|-------|
+| Speed | 12 |
+
+```python
+print("keep me")
+```
+"""
+
+SRT = (
+    "1\n00:00:01,000 --> 00:00:02,500\nHello there\nGeneral\n\n"
+    "2\n00:00:03,000 --> 00:00:04,000\n42\n"
+)
+
+JSON = '{"title": "Welcome back", "count": 3, "items": ["Open", "v2"], "nested": {"ok": "Yes"}}\n'
+
+PO = """msgid ""
+msgstr "Content-Type: text/plain; charset=UTF-8\\n"
+
+msgid "Save"
+msgstr ""
+
+msgid "One file"
+msgid_plural "%d files"
+msgstr[0] ""
+msgstr[1] ""
+
+msgid "Done"
+msgstr "Hecho"
+"""
+
+
+def _split(text: str, fmt: str):
+    return list(split_document(io.StringIO(text, newline=""), fmt))
+
+
+def _upper(text: str, fmt: str) -> str:
+    return "".join(render(p, source_text(p).upper()) for p in _split(text, fmt))
+
+
+@pytest.mark.parametrize(
+    ("text", "fmt"),
+    [(MARKDOWN, "md"), (SRT, "srt"), (JSON, "json"), ("One.\n\n\nTwo\r\nlines\r\n", "txt")],
+)
+def test_identity_translation_round_trips(text, fmt):
+    assert "".join(render(p, source_text(p)) for p in _split(text, fmt)) == text
+
+
+def test_markup_keys_and_timings_stay_untouched():
+    md = _upper(MARKDOWN, "md")
+    assert "title: Notes" in md and "# RELEASE NOTES" in md
+    assert "THE NEW VERSION IS\nFASTER THAN BEFORE." in md
+    assert "| SPEED | 12 |" in md and "|------|-------|" in md
+    assert 'print("keep me")' in md
+
+    srt = _upper(SRT, "srt")
+    assert srt.startswith("1\n00:00:01,000 --> 00:00:02,500\nHELLO THERE\nGENERAL\n")
+    assert srt.endswith("\n42\n")
+
+    assert _upper(JSON, "json") == (
+        '{"title": "WELCOME BACK", "count": 3, "items": ["OPEN", "V2"], "nested": {"ok": "YES"}}\n'
+    )
+
+
+@pytest.mark.parametrize(
+    ("text", "message"),
+    [('{"a": "hi"', "missing '}'"), ('[{"a": [1]}', "missing ']'"), ('{"a": 1}}', "'}'")],
+)
+def test_unbalanced_json_is_rejected(text, message):
+    with pytest.raises(DocumentError, match=message):
+        list(split_document(io.StringIO(text, newline=""), "json"))
+    assert list(split_document(io.StringIO('{"a": "}]"}', newline=""), "json"))
+
+
+def test_po_fills_only_empty_msgstr():
+    po = _upper(PO, "po")
+    assert 'msgid "Save"\nmsgstr "SAVE"\n' in po
+    assert 'msgstr[0] "ONE FILE"\nmsgstr[1] "%D FILES"\n' in po
+    assert 'msgstr "Hecho"' in po
+    assert po.startswith('msgid ""\nmsgstr "Content-Type')
+
+
+def test_long_paragraphs_are_cut_into_bounded_pieces():
+    text = "word " * 20 + "\n"
+    pieces = _split(text * 2000, "txt")
+    assert max(len(p.text) for p in pieces) < 4200
+    assert "".join(p.text for p in pieces) == text * 2000
+
+
+class _TagTranslator(Translator):
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        # Later segments often finish first; the output must stay in document order.
+        await asyncio.sleep((hash(text) % 5) / 1000)
+        return TranslationResult(translated_text=f"<{text}>", detected_source_lang=None)
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALLINGUA_ALLOW_FAKE_TRANSLATOR", "1")
+    monkeypatch.delenv("LOCALLINGUA_MODEL_PATH", raising=False)
+    monkeypatch.setenv("LOCALLINGUA_JOBS_DIR", os.fspath(tmp_path))
+    monkeypatch.setenv("LOCALLINGUA_DOCUMENT_MAX_MB", "1")
+    monkeypatch.setenv("LOCALLINGUA_CACHE_SIZE", "0")
+    a = create_app()
+    a.state.settings = load_settings()
+    a.state.translator = _TagTranslator()
+    return a
+
+
+async def _wait_done(client, job_id: str) -> dict:
+    for _ in range(200):
+        job = (await client.get(f"/api/documents/{job_id}")).json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+async def test_document_job_round_trip(app):
+    async def _body():
+        # A streamed upload, split mid-line.
+        yield SRT[:20].encode()
+        yield SRT[20:].encode()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        created = await client.post(
+            "/api/documents",
+            params={"source_lang": "en", "target_lang": "es", "filename": "movie.srt"},
+            content=_body(),
+        )
+        assert created.status_code == 202
+        body = created.json()
+        assert body["format"] == "srt" and body["segments_total"] == 1
+
+        job = await _wait_done(client, body["id"])
+        assert job["status"] == "completed" and job["progress"] == 1.0
+        output = await client.get(f"/api/documents/{body['id']}/output")
+        stats = (await client.get("/api/stats")).json()
+        await app.state.documents.close()
+
+    assert output.status_code == 200
+    assert output.text == SRT.replace("Hello there\nGeneral", "<Hello there\nGeneral>")
+    assert 'filename="movie.es.srt"' in output.headers["content-disposition"]
+    assert stats["documents"]["jobs"] == {"completed": 1}
+
+
+async def test_output_keeps_document_order(app):
+    text = "".join(f"Paragraph number {i}.\n\n" for i in range(60))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        created = await client.post(
+            "/api/documents", params={"target_lang": "de", "format": "txt"}, content=text.encode()
+        )
+        job = await _wait_done(client, created.json()["id"])
+        output = await client.get(f"/api/documents/{job['id']}/output")
+        await app.state.documents.close()
+    assert job["segments_done"] == 60
+    assert output.text == "".join(f"<Paragraph number {i}.>\n\n" for i in range(60))
+
+
+async def test_document_upload_errors(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        unknown = await client.post(
+            "/api/documents", params={"target_lang": "es", "filename": "a.docx"}, content=b"x"
+        )
+        too_large = await client.post(
+            "/api/documents",
+            params={"target_lang": "es", "format": "txt"},
+            content=b"x" * (2 * 1024 * 1024),
+        )
+        invalid = await client.post(
+            "/api/documents", params={"target_lang": "es", "format": "json"}, content=b'{"a": "b'
+        )
+        missing = await client.get("/api/documents/nope/output")
+    assert unknown.json()["error"]["code"] == "UNSUPPORTED_DOCUMENT_FORMAT"
+    assert too_large.status_code == 413
+    assert invalid.json()["error"]["code"] == "INVALID_DOCUMENT"
+    assert missing.status_code == 404
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from app.metrics import ServiceMetrics
+from app.translator.base import TranslationResult
+from app.translator.early_stop import (
+    GenerationGuard,
+    OutputLengthPredictor,
+    is_runaway,
+    stop_sequences,
+    trim_at_stops,
+)
+from app.translator.prompt import build_translation_prompt_parts
+
+# One character per token keeps the detokenizer trivial.
+_VOCAB = {i: chr(i).encode("utf-8") for i in range(1, 128)}
+
+
+def _detokenize(tokens: list[int]) -> bytes:
+    return b"".join(_VOCAB[t] for t in tokens)
+
+
+def _tokens(text: str) -> list[int]:
+    return [ord(c) for c in text]
+
+
+def test_stop_sequences_skip_labels_found_in_source():
+    parts = build_translation_prompt_parts(
+        text="Hello TEXT: world", source_lang="en", target_lang="es", mode="literal"
+    )
+    stops = stop_sequences(parts, "Hello TEXT: world")
+    assert "\nTRANSLATION:" in stops and "\nSource language:" in stops
+    assert "\nTEXT:" not in stops
+    assert trim_at_stops("Hola mundo\nTRANSLATION: again", stops) == "Hola mundo"
+
+
+def test_guard_stops_on_closed_fence_and_labels():
+    guard = GenerationGuard(_detokenize, source_text="Hello")
+    fed = [guard.feed(t) for t in _tokens("```text\nHola\n```")]
+    assert fed[-1] and not any(fed[:-1]) and guard.reason == "fence"
+
+    # Fences in the source are content, not a frame around the answer.
+    guard = GenerationGuard(_detokenize, source_text="```py\nx = 1\n```")
+    assert not any(guard.feed(t) for t in _tokens("```py\nx = 1\n```"))
+
+    guard = GenerationGuard(_detokenize, source_text="Hello", stops=["\nTEXT:"])
+    assert any(guard.feed(t) for t in _tokens("Hola\nTEXT:")) and guard.reason == "stop"
+
+
+def test_guard_detects_runaway_repetition():
+    assert not is_runaway(_tokens("Hola, ¿cómo estás? Muy bien, gracias."))
+    guard = GenerationGuard(_detokenize, source_text="Hello")
+    assert any(guard.feed(t) for t in _tokens("Hola" + " ja" * 40))
+    assert guard.reason == "repetition"
+
+
+def test_criterion_follows_llama_cpp_input_ids():
+    # llama.cpp passes the evaluated tokens, one behind the newest sample, and the first call
+    # holds only the prompt; the guard must see each generated token exactly once.
+    prompt = _tokens("PROMPT")
+    output = _tokens("```\nHola\n```")
+    guard = GenerationGuard(_detokenize, source_text="Hello")
+    check = guard.criterion()
+    stopped_at = None
+    for i in range(len(output) + 1):
+        if check(prompt + output[:i], None):
+            stopped_at = i
+            break
+    assert stopped_at == len(output) and guard.reason == "fence"
+    # llama.cpp's final check after the loop sees the same ids again.
+    assert check(prompt + output, None)
+
+
+def test_predictor_learns_pair_ratio():
+    predictor = OutputLengthPredictor(min_samples=4, margin=1.25, slack_tokens=0)
+    first = predictor.budget(source_lang="en", target_lang="es", input_tokens=100, max_tokens=512)
+    assert first == 400  # prior ratio 4.0 until enough samples
+    for _ in range(4):
+        predictor.record(source_lang="en", target_lang="es", input_tokens=100, output_tokens=120)
+    budget = predictor.budget(source_lang="en", target_lang="es", input_tokens=100, max_tokens=512)
+    assert budget == 150
+    # Never above the caller's limit, and other pairs keep the prior.
+    assert predictor.budget(source_lang="en", target_lang="es", input_tokens=1000, max_tokens=64)
+    assert (
+        predictor.budget(source_lang="en", target_lang="ja", input_tokens=10, max_tokens=512) == 40
+    )
+    assert predictor.stats()["pairs"] == 1
+
+
+def test_metrics_count_stop_reasons():
+    metrics = ServiceMetrics()
+    for reason in ("stop", "fence", "stop"):
+        metrics.observe_translation(
+            TranslationResult(translated_text="x", detected_source_lang=None, stop_reason=reason),
+            cached=False,
+        )
+    text = metrics.render()
+    assert 'locallingua_generation_stops_total{reason="stop"} 2' in text
+    assert 'locallingua_generation_stops_total{reason="fence"} 1' in text
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from app.config import load_settings
+from app.jobs import DocumentJobs
+from app.main import create_app
+from app.translator.base import TranslationResult, Translator
+
+TEXT = "".join(f"Paragraph number {i}.\n\n" for i in range(10))
+
+
+async def _body(data: bytes):
+    yield data
+
+
+async def _wait_status(jobs: DocumentJobs, job_id: str, *statuses: str):
+    for _ in range(300):
+        job = await jobs.get(job_id)
+        if job.status in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job stayed {job.status}")
+
+
+async def test_jobs_resume_after_restart_without_redoing_segments(tmp_path):
+    first_calls: list[str] = []
+    done = 0
+
+    async def _stalls_after_three(text, **_):
+        nonlocal done
+        first_calls.append(text)
+        if done >= 3:
+            await asyncio.Event().wait()
+        done += 1
+        return f"<{text}>"
+
+    jobs = DocumentJobs(tmp_path, translate=_stalls_after_three, concurrency=2, batch_size=4)
+    job = await jobs.create(
+        _body(TEXT.encode()),
+        filename=None,
+        fmt="txt",
+        source_lang="en",
+        target_lang="de",
+        options={},
+    )
+    for _ in range(300):
+        if (await jobs.get(job.id)).segments_done == 3:
+            break
+        await asyncio.sleep(0.01)
+    # The process goes away with segments in flight.
+    await jobs.close()
+
+    second_calls: list[str] = []
+
+    async def _tag(text, **_):
+        second_calls.append(text)
+        return f"<{text}>"
+
+    resumed = DocumentJobs(tmp_path, translate=_tag, batch_size=4)
+    assert (await resumed.get(job.id)).status == "running"
+    await resumed.start()
+    finished = await _wait_status(resumed, job.id, "completed", "failed")
+    output = "".join(resumed.output(job.id))
+    await resumed.close()
+
+    assert finished.status == "completed" and finished.segments_done == 10
+    assert output == "".join(f"<Paragraph number {i}.>\n\n" for i in range(10))
+    assert len(second_calls) == 7
+    assert not set(second_calls) & set(first_calls[:3])
+
+
+class _FlakyTranslator(Translator):
+    def __init__(self) -> None:
+        self.fail = True
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        if self.fail and text.endswith("5."):
+            raise RuntimeError("boom")
+        return TranslationResult(translated_text=f"<{text}>", detected_source_lang=None)
+
+
+@pytest.fixture()
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALLINGUA_ALLOW_FAKE_TRANSLATOR", "1")
+    monkeypatch.delenv("LOCALLINGUA_MODEL_PATH", raising=False)
+    monkeypatch.setenv("LOCALLINGUA_JOBS_DIR", os.fspath(tmp_path))
+    monkeypatch.setenv("LOCALLINGUA_CACHE_SIZE", "0")
+    a = create_app()
+    a.state.settings = load_settings()
+    a.state.translator = _FlakyTranslator()
+    return a
+
+
+async def test_job_endpoints_retry_cancel_and_delete(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        created = await client.post(
+            "/api/documents",
+            params={"source_lang": "en", "target_lang": "de", "format": "txt"},
+            content=TEXT.encode(),
+        )
+        job_id = created.json()["id"]
+        jobs = app.state.documents
+        failed = await _wait_status(jobs, job_id, "failed")
+        assert failed.error["code"] == "TRANSLATION_FAILED"
+
+        listed = (await client.get("/api/jobs", params={"status": "failed"})).json()
+        assert [j["id"] for j in listed["jobs"]] == [job_id]
+        not_active = await client.post(f"/api/jobs/{job_id}/cancel")
+        assert not_active.json()["error"]["code"] == "JOB_NOT_ACTIVE"
+
+        app.state.translator.fail = False
+        retried = await client.post(f"/api/jobs/{job_id}/retry")
+        assert retried.json()["status"] == "queued" and retried.json()["error"] is None
+        await _wait_status(jobs, job_id, "completed")
+        output = await client.get(f"/api/documents/{job_id}/output")
+        again = await client.post(f"/api/jobs/{job_id}/retry")
+
+        deleted = await client.delete(f"/api/jobs/{job_id}")
+        gone = await client.get(f"/api/jobs/{job_id}")
+        await jobs.close()
+
+    assert output.text == "".join(f"<Paragraph number {i}.>\n\n" for i in range(10))
+    assert again.status_code == 409
+    assert deleted.status_code == 204 and gone.status_code == 404
+
+
+def test_jobs_dir_defaults_to_the_user_data_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("LOCALLINGUA_JOBS_DIR", raising=False)
+    monkeypatch.setenv("XDG_DATA_HOME", os.fspath(tmp_path))
+    assert load_settings().jobs_dir == os.path.join(tmp_path, "locallingua", "jobs")
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import pytest
+
+from app.translator.lang_detect import (
+    LanguageDetector,
+    detect_language,
+    detect_language_async,
+    detect_languages,
+)
+
+_SAMPLES = {
+    "en": "The weather is lovely today, so we are going for a walk in the park.",
+    "es": "El tiempo está precioso hoy, así que vamos a dar un paseo por el parque.",
+    "de": "Das Wetter ist heute herrlich, deshalb gehen wir im Park spazieren.",
+    "fr": "Il fait très beau aujourd'hui, alors nous allons nous promener dans le parc.",
+    "ru": "Сегодня прекрасная погода, поэтому мы идём гулять в парк.",
+    "ja": "今日は天気がとても良いので、公園を散歩します。",
+    "zh": "今天天气很好，所以我们去公园散步。",
+    "ko": "오늘은 날씨가 정말 좋아서 공원에 산책하러 갑니다.",
+}
+
+
+def test_detects_common_languages():
+    for code, text in _SAMPLES.items():
+        detection = detect_language(text)
+        assert detection.code == code, (code, detection)
+        assert detection.confidence is not None and detection.confidence > 0.7
+
+
+def test_letterless_input_is_undetected():
+    assert detect_language("12345 !!!") == detect_language("12345 !!!")
+    assert detect_language("12345 !!!").code is None
+
+
+def test_batch_matches_single_calls():
+    texts = list(_SAMPLES.values()) + ["..."]
+    assert detect_languages(texts) == [detect_language(t) for t in texts]
+
+
+def test_only_requested_codes_are_candidates():
+    detector = LanguageDetector(["en", "de"])
+    assert detector.detect(_SAMPLES["es"]).code in {"en", "de"}
+
+
+def test_results_are_memoized():
+    detector = LanguageDetector(["en", "es"], memo_size=1)
+    first = detector.detect(_SAMPLES["en"])
+    assert detector.cached(_SAMPLES["en"]) is first
+    detector.detect(_SAMPLES["es"])
+    assert detector.cached(_SAMPLES["en"]) is None
+
+
+@pytest.mark.asyncio
+async def test_async_detection_matches_sync():
+    assert await detect_language_async(_SAMPLES["fr"]) == detect_language(_SAMPLES["fr"])
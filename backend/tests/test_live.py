@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from starlette.testclient import TestClient
+
+from app.config import load_settings
+from app.live import LiveSession, LiveTarget
+from app.main import create_app
+from app.translator.base import TranslationResult, Translator
+
+TARGET = LiveTarget("en", "de", {"mode": "literal"})
+
+
+class _Session:
+    def __init__(self, translate) -> None:
+        self.messages: list[dict] = []
+        self.outcomes: list[str] = []
+        self._updates = asyncio.Event()
+
+        async def _send(message: dict) -> None:
+            self.messages.append(message)
+            self._updates.set()
+
+        async def _resolve(_text: str, source_lang: str) -> str:
+            return source_lang
+
+        self.session = LiveSession(
+            translate=translate,
+            resolve_source=_resolve,
+            send=_send,
+            debounce_ms=20,
+            on_sentence=self.outcomes.append,
+        )
+
+    async def until(self, kind: str, rev: int) -> dict:
+        while True:
+            for message in self.messages:
+                if message["type"] == kind and message["rev"] == rev:
+                    return message
+            self._updates.clear()
+            await asyncio.wait_for(self._updates.wait(), 2)
+
+
+async def test_only_changed_sentences_are_translated():
+    calls: list[str] = []
+
+    async def _translate(text, **_):
+        calls.append(text)
+        return f"<{text}>"
+
+    live = _Session(_translate)
+    runner = asyncio.create_task(live.session.run())
+    try:
+        live.session.configure(TARGET)
+        live.session.set_text("One. Two.", rev=1)
+        # Typing goes on before the pause: only the last text is translated.
+        live.session.set_text("One. Two. Three.", rev=2)
+        first = await live.until("done", 2)
+        layout = await live.until("segments", 2)
+
+        live.session.edit(5, 9, "Zwei.", rev=3)
+        second = await live.until("done", 3)
+        edited = await live.until("segments", 3)
+    finally:
+        runner.cancel()
+        await live.session.close()
+
+    assert first["translated_text"] == "<One.> <Two.> <Three.>"
+    assert layout["pending"] == 3 and not any(m["rev"] == 1 for m in live.messages)
+    assert second["translated_text"] == "<One.> <Zwei.> <Three.>"
+    assert edited["pending"] == 1 and edited["segments"][0]["translated_text"] == "<One.>"
+    assert calls == ["One.", "Two.", "Three.", "Zwei."]
+    assert live.outcomes.count("reused") == 2
+
+
+async def test_revisions_without_new_sentences_are_done_at_once():
+    async def _translate(text, **_):
+        return f"<{text}>"
+
+    live = _Session(_translate)
+    runner = asyncio.create_task(live.session.run())
+    try:
+        live.session.configure(TARGET)
+        live.session.set_text("Hello there. Bye now.", rev=1)
+        await live.until("done", 1)
+        live.session.set_text("Hello there.", rev=2)
+        deleted = await live.until("done", 2)
+        live.session.set_text("", rev=3)
+        emptied = await live.until("done", 3)
+    finally:
+        runner.cancel()
+        await live.session.close()
+
+    assert deleted["translated_text"] == "<Hello there.>" and deleted["failed"] == 0
+    assert emptied["translated_text"] == ""
+    assert [m["type"] for m in live.messages if m["rev"] == 2] == ["segments", "done"]
+
+
+async def test_superseded_sentences_are_cancelled():
+    cancelled: list[str] = []
+
+    async def _translate(text, **_):
+        if text == "Slow one.":
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(text)
+                raise
+        return f"<{text}>"
+
+    live = _Session(_translate)
+    runner = asyncio.create_task(live.session.run())
+    try:
+        live.session.configure(TARGET)
+        live.session.set_text("Slow one.", rev=1)
+        await live.until("segments", 1)
+        live.session.set_text("Fast one.", rev=2)
+        done = await live.until("done", 2)
+    finally:
+        runner.cancel()
+        await live.session.close()
+
+    assert done["translated_text"] == "<Fast one.>" and done["failed"] == 0
+    assert cancelled == ["Slow one."] and "cancelled" in live.outcomes
+
+
+class _PrefixTranslator(Translator):
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        return TranslationResult(
+            translated_text=f"[{target_lang}] {text}", detected_source_lang=None
+        )
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    monkeypatch.setenv("LOCALLINGUA_ALLOW_FAKE_TRANSLATOR", "1")
+    monkeypatch.delenv("LOCALLINGUA_MODEL_PATH", raising=False)
+    monkeypatch.setenv("LOCALLINGUA_LIVE_DEBOUNCE_MS", "10")
+    app = create_app()
+    app.state.settings = load_settings()
+    app.state.translator = _PrefixTranslator()
+    return TestClient(app)
+
+
+def test_live_endpoint_pushes_translations(client):
+    with client.websocket_connect("/api/translate/live") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json()["error"]["code"] == "INVALID_MESSAGE"
+        ws.send_json({"type": "config", "source_lang": "en", "target_lang": "xx"})
+        assert ws.receive_json()["error"]["code"] == "UNSUPPORTED_TARGET_LANG"
+
+        ws.send_json({"type": "config", "source_lang": "en", "target_lang": "fr"})
+        ws.send_json({"type": "text", "text": "Good morning.\n\nSee you later.", "rev": 7})
+        messages = [ws.receive_json()]
+        while messages[-1]["type"] != "done":
+            messages.append(ws.receive_json())
+
+    layout = messages[0]
+    assert layout["type"] == "segments" and layout["rev"] == 7
+    assert [s["text"] for s in layout["segments"]] == ["Good morning.", "\n\n", "See you later."]
+    pushed = {m["index"]: m["translated_text"] for m in messages if m["type"] == "segment"}
+    assert pushed == {0: "[fr] Good morning.", 2: "[fr] See you later."}
+    assert messages[-1]["translated_text"] == "[fr] Good morning.\n\n[fr] See you later."
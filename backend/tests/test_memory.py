@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from app.translator.base import TranslationResult, Translator
+from app.translator.memory import (
+    MemoryTranslator,
+    TranslationMemory,
+    mask_placeholders,
+    substitute_placeholders,
+)
+from app.translator.prompt import build_translation_prompt_parts
+
+_PAIR = {"source_lang": "en", "target_lang": "es", "mode": "literal"}
+
+
+class _RecordingTranslator(Translator):
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, dict]] = []
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        self.calls.append((text, options))
+        return TranslationResult(translated_text=f"ES:{text}", detected_source_lang=None)
+
+
+def test_mask_placeholders_hides_numbers_and_urls():
+    template, values = mask_placeholders(
+        "Order 1234 for Maria Lopez ships on 12/05, see https://example.com/x"
+    )
+    assert values == ["1234", "12/05", "https://example.com/x"]
+    assert "1234" not in template and "Maria Lopez" in template
+    assert mask_placeholders("Hello there")[1] == []
+
+
+def test_substitute_placeholders_requires_verbatim_values():
+    assert (
+        substitute_placeholders("Tienes 3 mensajes de Ana", ["3", "Ana"], ["12", "Luis"])
+        == "Tienes 12 mensajes de Luis"
+    )
+    # The model spelled the number out: not safe to rewrite.
+    assert substitute_placeholders("Tienes tres mensajes", ["3"], ["12"]) is None
+    # Replacements don't chain into each other.
+    assert substitute_placeholders("de 1 a 2", ["1", "2"], ["2", "3"]) == "de 2 a 3"
+
+
+def test_memory_template_hit_and_hint(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "tm.sqlite3"), hint_similarity=0.5)
+    memory.store("You have 3 new messages", "Tienes 3 mensajes nuevos", **_PAIR)
+
+    hit = memory.lookup("You have 17 new messages", **_PAIR)
+    assert hit is not None and hit.kind == "template"
+    assert hit.target == "Tienes 17 mensajes nuevos"
+
+    hint = memory.lookup("You have 3 new messages waiting", **_PAIR)
+    assert hint is not None and hint.kind == "hint"
+    assert hint.target == "Tienes 3 mensajes nuevos"
+
+    assert memory.lookup("Completely unrelated sentence about the weather", **_PAIR) is None
+    # Other pairs and modes are separate memories.
+    assert memory.lookup("You have 17 new messages", **{**_PAIR, "target_lang": "fr"}) is None
+
+    # Persisted on disk.
+    reopened = TranslationMemory(str(tmp_path / "tm.sqlite3"))
+    assert reopened.size() == 1
+    assert reopened.lookup("You have 5 new messages", **_PAIR).target == "Tienes 5 mensajes nuevos"
+
+    # A different name is not a template hit: it may need translating itself.
+    memory.store("I love Paris", "J'aime Paris", **{**_PAIR, "target_lang": "fr"})
+    other_city = memory.lookup("I love London", **{**_PAIR, "target_lang": "fr"})
+    assert other_city is None or other_city.kind == "hint"
+
+
+async def test_memory_translator_skips_model_and_passes_hints(tmp_path):
+    inner = _RecordingTranslator()
+    translator = MemoryTranslator(inner, TranslationMemory(str(tmp_path / "tm.sqlite3")))
+    kwargs = {"source_lang": "en", "target_lang": "es", "options": {"mode": "literal"}}
+
+    first = await translator.translate(text="Welcome back, user 41", **kwargs)
+    assert first.translated_text == "ES:Welcome back, user 41" and not first.cached
+
+    second = await translator.translate(text="Welcome back, user 42", **kwargs)
+    assert second.translated_text == "ES:Welcome back, user 42" and second.cached
+    assert len(inner.calls) == 1
+
+    await translator.translate(text="Your order has shipped and should arrive soon", **kwargs)
+    await translator.translate(text="Your order has shipped and should arrive today", **kwargs)
+    assert inner.calls[-1][1]["memory_hint"] == {
+        "source": "Your order has shipped and should arrive soon",
+        "target": "ES:Your order has shipped and should arrive soon",
+    }
+
+    stats = translator.stats()["memory"]
+    assert stats["template_hits"] == 1 and stats["hints"] == 1 and stats["segments"] == 3
+
+
+def test_prompt_reference_stays_out_of_cached_prefix():
+    plain = build_translation_prompt_parts(text="Hi Bob", source_lang="en", target_lang="es")
+    hinted = build_translation_prompt_parts(
+        text="Hi Bob",
+        source_lang="en",
+        target_lang="es",
+        reference=("Hi Alice", "Hola Alice"),
+    )
+    assert hinted.prefix() == plain.prefix()
+    assert "Hola Alice" in hinted.body and hinted.body.endswith(plain.body)
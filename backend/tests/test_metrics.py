@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import os
+
+import httpx
+import pytest
+
+from app.config import load_settings
+from app.main import create_app
+from app.metrics import Counter, Histogram, MetricsRegistry
+from app.translator.base import TranslationResult, Translator
+
+
+@pytest.fixture(autouse=True)
+def _env():
+    os.environ["LOCALLINGUA_ALLOW_FAKE_TRANSLATOR"] = "1"
+    os.environ.pop("LOCALLINGUA_MODEL_PATH", None)
+    yield
+
+
+class _TimedTranslator(Translator):
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        return TranslationResult(
+            translated_text=f"ES:{text}",
+            detected_source_lang=None,
+            prompt_tokens=20,
+            completion_tokens=10,
+            prompt_eval_ms=40.0,
+            generation_ms=500.0,
+            queue_ms=3.0,
+            sanitize_ms=0.05,
+        )
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("x_seconds", "X.", ("stage",), buckets=(0.1, 1.0)))
+    counter = registry.register(Counter("y_total", "Y.", ("code",)))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5.0, stage="a")
+    counter.inc(code='say "hi"')
+
+    text = registry.render()
+    assert 'x_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'x_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'x_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'x_seconds_count{stage="a"} 3' in text
+    assert 'y_total{code="say \\"hi\\""} 1' in text
+    assert "# TYPE x_seconds histogram" in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_requests_and_stages():
+    app = create_app()
+    app.state.settings = load_settings()
+    app.state.translator = _TimedTranslator()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        ok = await client.post(
+            "/api/translate",
+            json={"text": "Hello world, how are you?", "source_lang": "auto", "target_lang": "es"},
+        )
+        assert ok.status_code == 200
+        bad = await client.post(
+            "/api/translate",
+            json={"text": "Hello", "source_lang": "xx", "target_lang": "es"},
+        )
+        assert bad.status_code == 400
+        streamed = await client.post(
+            "/api/translate/stream",
+            json={"text": "Good morning", "source_lang": "en", "target_lang": "es"},
+        )
+        assert "event: done" in streamed.text
+
+        resp = await client.get("/api/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+    assert (
+        'locallingua_requests_total{endpoint="translate",mode="smart",source_lang="auto",'
+        'target_lang="es",status="ok"} 1'
+    ) in text
+    assert (
+        'locallingua_requests_total{endpoint="translate",mode="smart",source_lang="unsupported",'
+        'target_lang="es",status="UNSUPPORTED_SOURCE_LANG"} 1'
+    ) in text
+    assert 'endpoint="stream",mode="smart",source_lang="en",target_lang="es",status="ok"} 1' in text
+    assert "locallingua_detect_seconds_count 1" in text
+    assert "locallingua_prompt_eval_seconds_count 2" in text
+    assert "locallingua_queue_wait_seconds_count 2" in text
+    assert "locallingua_completion_tokens_total 20" in text
+    assert 'locallingua_generation_tokens_per_second_bucket{decoding="plain",le="20"} 2' in text
+    assert "locallingua_requests_in_flight 0" in text
+    assert "locallingua_requests_queued 0" in text
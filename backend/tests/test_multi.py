@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import os
+
+import httpx
+import pytest
+
+from app import main
+from app.config import load_settings
+from app.main import create_app
+from app.translator.base import TranslationResult, Translator
+from app.translator.batching import _longest_shared_prefix, _Sequence
+from app.translator.lang_detect import detect_language_async
+from app.translator.prompt import build_translation_prompt_parts
+
+
+@pytest.fixture(autouse=True)
+def _env():
+    os.environ["LOCALLINGUA_ALLOW_FAKE_TRANSLATOR"] = "1"
+    os.environ.pop("LOCALLINGUA_MODEL_PATH", None)
+    os.environ["LOCALLINGUA_CACHE_SIZE"] = "0"
+    yield
+    os.environ.pop("LOCALLINGUA_CACHE_SIZE", None)
+
+
+class _RecordingTranslator(Translator):
+    def __init__(self) -> None:
+        self.calls: list[dict] = []
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        self.calls.append({"source_lang": source_lang, "target_lang": target_lang, **options})
+        if target_lang == "ja":
+            raise RuntimeError("LLAMA_DECODE_FAILED:1")
+        return TranslationResult(
+            translated_text=f"[{target_lang}] {text}", detected_source_lang=None
+        )
+
+
+def _make_app(translator: Translator):
+    app = create_app()
+    app.state.settings = load_settings()
+    app.state.translator = translator
+    return app
+
+
+def test_target_last_prompts_share_the_text():
+    de = build_translation_prompt_parts(
+        text="Hello", source_lang="en", target_lang="de", target_last=True
+    )
+    fr = build_translation_prompt_parts(
+        text="Hello", source_lang="en", target_lang="fr", target_last=True
+    )
+    shared = de.text[: de.text.index("Target language:")]
+    assert "Hello" in shared and fr.text.startswith(shared)
+    assert de.prefix("pair") == fr.prefix("pair")
+
+
+def test_scheduler_shares_only_long_prompt_prefixes():
+    def _seq(tokens):
+        return _Sequence("", 0.0, 1.0, 8, None, None, None, prompt_tokens=tokens)
+
+    base = list(range(40))
+    running = [_seq(base[:10] + [99] * 30), _seq(base + [7])]
+    source, shared = _longest_shared_prefix(base + [8, 9], running)
+    assert source is running[1] and shared == 40
+    assert _longest_shared_prefix(base[:12] + [5], running[:1]) == (None, 0)
+    # The last prompt token is always decoded by the new sequence.
+    assert _longest_shared_prefix(base, running)[1] == 39
+
+
+async def test_multi_detects_once_and_fans_out(monkeypatch):
+    detections = []
+
+    async def _detect(text):
+        detections.append(text)
+        return await detect_language_async(text)
+
+    monkeypatch.setattr(main, "detect_language_async", _detect)
+    translator = _RecordingTranslator()
+    app = _make_app(translator)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        res = await ac.post(
+            "/api/translate/multi",
+            json={
+                "text": "The weather is lovely today and we are going outside.",
+                "target_langs": ["de", "fr", "de", "es"],
+                "options": {"mode": "literal"},
+            },
+        )
+        bad = await ac.post(
+            "/api/translate/multi", json={"text": "Hi", "target_langs": ["de", "xx"]}
+        )
+
+    assert res.status_code == 200
+    body = res.json()
+    assert list(body["results"]) == ["de", "fr", "es"]
+    assert body["results"]["fr"]["translated_text"].startswith("[fr] ")
+    assert body["detected_source_lang"] == "en"
+    assert len(detections) == 1
+    assert {c["target_lang"] for c in translator.calls} == {"de", "fr", "es"}
+    assert all(c["target_last"] and c["source_lang"] == "en" for c in translator.calls)
+    assert bad.json()["error"]["code"] == "UNSUPPORTED_TARGET_LANG"
+
+
+async def test_multi_stream_reports_each_language():
+    app = _make_app(_RecordingTranslator())
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        res = await ac.post(
+            "/api/translate/multi/stream",
+            json={"text": "Good morning", "source_lang": "en", "target_langs": ["de", "ja", "it"]},
+        )
+
+    events = []
+    for block in res.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    results = {data["target_lang"]: data for name, data in events if name == "result"}
+    errors = {data["target_lang"]: data for name, data in events if name == "error"}
+    assert set(results) == {"de", "it"}
+    assert results["it"]["translated_text"] == "[it] Good morning"
+    assert errors["ja"]["error"]["code"] == "TRANSLATION_FAILED"
+    assert events[-1][0] == "done" and events[-1][1]["failed"] == 1
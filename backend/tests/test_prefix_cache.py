@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from app.translator.prefix_cache import PrefixStateCache
+
+
+class _FakeLlama:
+    """Just enough of llama_cpp.Llama's state API to exercise the cache."""
+
+    def __init__(self) -> None:
+        self._input_ids: list[int] = []
+        self.evaluated = 0
+
+    @property
+    def n_tokens(self) -> int:
+        return len(self._input_ids)
+
+    def tokenize(self, data: bytes, special: bool = False) -> list[int]:
+        return list(data)
+
+    def reset(self) -> None:
+        self._input_ids = []
+
+    def eval(self, tokens: list[int]) -> None:
+        self.evaluated += len(tokens)
+        self._input_ids = self._input_ids + list(tokens)
+
+    def save_state(self) -> list[int]:
+        return list(self._input_ids)
+
+    def load_state(self, state: list[int]) -> None:
+        self._input_ids = list(state)
+
+
+def test_prime_evaluates_once_then_reuses():
+    llm = _FakeLlama()
+    cache = PrefixStateCache(max_entries=2)
+
+    assert cache.prime(llm, "rules-a") == "miss"
+    assert cache.prime(llm, "rules-a") == "resident"
+    assert cache.prime(llm, "rules-b") == "miss"
+    assert cache.prime(llm, "rules-a") == "restored"
+    assert llm.evaluated == len("rules-a") + len("rules-b")
+
+
+def test_lru_bound_on_saved_states():
+    llm = _FakeLlama()
+    cache = PrefixStateCache(max_entries=1)
+    cache.prime(llm, "one")
+    cache.prime(llm, "two")
+    assert cache.prime(llm, "one") == "miss"
+    assert cache.stats()["entries"] == 1
+
+
+def test_stats_split_prompt_eval_by_outcome():
+    cache = PrefixStateCache(max_entries=1)
+    cache.record_prompt_eval("miss", 100.0)
+    cache.record_prompt_eval("restored", 10.0)
+    cache.record_prompt_eval("resident", 20.0)
+    stats = cache.stats()
+    assert stats["mean_prompt_eval_ms_miss"] == 100.0
+    assert stats["mean_prompt_eval_ms_hit"] == 15.0
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from app.translator.prompt import build_translation_prompt
+from app.translator.prompt import build_translation_prompt, build_translation_prompt_parts
 
 
 def test_prompt_contains_delimiters():
@@ -15,3 +15,15 @@ def test_prompt_contains_delimiters():
     assert "TRANSLATION:" in prompt
     assert "Translate LITERALLY" in prompt
     assert "Output ONLY the translated text" in prompt
+
+
+def test_prompt_parts_share_prefix_per_mode_and_pair():
+    a = build_translation_prompt_parts(text="Hello", source_lang="en", target_lang="es")
+    b = build_translation_prompt_parts(text="Bye", source_lang="en", target_lang="es")
+    c = build_translation_prompt_parts(text="Hello", source_lang="en", target_lang="fr")
+
+    assert a.text == build_translation_prompt(text="Hello", source_lang="en", target_lang="es")
+    assert a.prefix("pair") == b.prefix("pair")
+    assert a.prefix("pair") != c.prefix("pair")
+    assert a.prefix("mode") == c.prefix("mode")
+    assert "Hello" not in a.prefix("pair")
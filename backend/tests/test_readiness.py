@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import os
+
+import httpx
+import pytest
+
+from app.config import load_settings
+from app.main import create_app
+from app.readiness import Readiness, prepare_translator, warmup_requests
+from app.translator.base import TranslationResult, Translator
+
+
+@pytest.fixture(autouse=True)
+def _env():
+    os.environ["LOCALLINGUA_ALLOW_FAKE_TRANSLATOR"] = "1"
+    os.environ.pop("LOCALLINGUA_MODEL_PATH", None)
+    yield
+
+
+class _LazyTranslator(Translator):
+    def __init__(self, *, fail: bool = False) -> None:
+        self.loaded = False
+        self.fail = fail
+        self.modes: list[str] = []
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded
+
+    async def load(self) -> None:
+        if self.fail:
+            raise FileNotFoundError("model.gguf")
+        self.loaded = True
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        self.modes.append(options["mode"])
+        return TranslationResult(translated_text=text, detected_source_lang=None)
+
+    def model_info(self) -> dict:
+        return {"n_ctx": 4096}
+
+
+def test_warmup_requests_cover_each_mode():
+    requests = warmup_requests(2)
+    assert [r["options"]["mode"] for r in requests] == ["literal", "literal", "natural", "natural"]
+    assert warmup_requests(0) == []
+
+
+@pytest.mark.asyncio
+async def test_prepare_translator_loads_then_warms():
+    translator = _LazyTranslator()
+    readiness = Readiness(eager=True)
+    await prepare_translator(translator, readiness, warmup_prompts=1)
+
+    assert readiness.state == "ready"
+    assert translator.loaded
+    assert translator.modes == ["literal", "natural"]
+    assert readiness.load_ms is not None and readiness.warmup_ms is not None
+    assert readiness.warmup_prompts == 2
+
+
+@pytest.mark.asyncio
+async def test_prepare_translator_reports_failure():
+    readiness = Readiness(eager=True)
+    await prepare_translator(_LazyTranslator(fail=True), readiness, warmup_prompts=1)
+    assert readiness.state == "failed"
+    assert "FileNotFoundError" in readiness.error
+
+
+@pytest.mark.asyncio
+async def test_ready_endpoint_waits_for_eager_load():
+    app = create_app()
+    app.state.settings = load_settings()
+    translator = _LazyTranslator()
+    app.state.translator = translator
+    app.state.readiness = Readiness(eager=True, state="loading")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        live = await ac.get("/api/health/live")
+        not_ready = await ac.get("/api/health/ready")
+        await prepare_translator(translator, app.state.readiness, warmup_prompts=1)
+        ready = await ac.get("/api/health/ready")
+
+    assert live.status_code == 200
+    assert not_ready.status_code == 503
+    assert not_ready.json()["state"] == "loading"
+    assert ready.status_code == 200
+    body = ready.json()
+    assert body["ready"] is True
+    assert body["model_loaded"] is True
+    assert body["model"] == {"n_ctx": 4096}
+    assert body["load_ms"] is not None
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+from app.config import load_settings
+from app.main import create_app
+from app.translator.base import TranslationResult, Translator
+from app.translator.router import ModelSpec, RoutingTranslator, load_model_specs
+
+
+@pytest.fixture(autouse=True)
+def _env(monkeypatch):
+    monkeypatch.setenv("LOCALLINGUA_ALLOW_FAKE_TRANSLATOR", "1")
+    monkeypatch.delenv("LOCALLINGUA_MODEL_PATH", raising=False)
+
+
+class _NamedTranslator(Translator):
+    def __init__(self, name: str, gate: asyncio.Event | None = None) -> None:
+        self.name = name
+        self.gate = gate
+        self.closed = False
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        if self.gate is not None:
+            await self.gate.wait()
+        return TranslationResult(translated_text=f"{self.name}:{text}", detected_source_lang=None)
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def _router(specs, *, budget_mb=0, gate=None):
+    built: list[_NamedTranslator] = []
+
+    def _factory(spec: ModelSpec) -> Translator:
+        built.append(_NamedTranslator(spec.name, gate))
+        return built[-1]
+
+    return RoutingTranslator(specs, _factory, memory_budget_bytes=budget_mb << 20), built
+
+
+def test_route_by_length_pair_and_mode():
+    router, _ = _router(
+        [
+            ModelSpec("ja", "ja.gguf", pairs=("*-ja",)),
+            ModelSpec("short", "q4.gguf", max_chars=40, modes=("literal",)),
+            ModelSpec("large", "q8.gguf"),
+        ]
+    )
+    route = {"source_lang": "en", "target_lang": "es", "mode": "literal"}
+    assert router.route(text="Hi", **route).name == "short"
+    assert router.route(text="Hi", **{**route, "mode": "natural"}).name == "large"
+    assert router.route(text="x" * 100, **route).name == "large"
+    assert router.route(text="Hi", **{**route, "target_lang": "ja"}).name == "ja"
+
+
+async def test_overflow_to_next_model_under_load():
+    gate = asyncio.Event()
+    router, _ = _router(
+        [ModelSpec("large", "q8.gguf", max_in_flight=1), ModelSpec("fast", "q4.gguf")],
+        gate=gate,
+    )
+    kwargs = {"source_lang": "en", "target_lang": "es", "options": {"mode": "literal"}}
+    first = asyncio.create_task(router.translate(text="one", **kwargs))
+    second = asyncio.create_task(router.translate(text="two", **kwargs))
+    await asyncio.sleep(0)
+    gate.set()
+    assert [(await first).model, (await second).model] == ["large", "fast"]
+    assert router.stats()["router"]["overflows"] == 1
+
+
+async def test_lru_eviction_under_memory_budget():
+    router, built = _router(
+        [
+            ModelSpec("a", "a.gguf", pairs=("*-es",), memory_mb=600),
+            ModelSpec("b", "b.gguf", pairs=("*-fr",), memory_mb=600),
+        ],
+        budget_mb=1000,
+    )
+    options = {"mode": "literal"}
+    await router.translate(text="x", source_lang="en", target_lang="es", options=options)
+    await router.translate(text="x", source_lang="en", target_lang="fr", options=options)
+    assert [t.name for t in built] == ["a", "b"] and built[0].closed
+    result = await router.translate(text="x", source_lang="en", target_lang="es", options=options)
+    assert result.model == "a" and len(built) == 3 and built[1].closed
+    assert router.stats()["router"]["evictions"] == 2
+
+
+async def test_api_reports_serving_model(tmp_path, monkeypatch):
+    for name in ("small", "large"):
+        (tmp_path / f"{name}.gguf").write_bytes(b"GGUF")
+    registry = tmp_path / "models.json"
+    registry.write_text(
+        json.dumps(
+            {
+                "models": [
+                    {"name": "small", "path": str(tmp_path / "small.gguf"), "max_chars": 20},
+                    {"name": "large", "path": str(tmp_path / "large.gguf")},
+                ]
+            }
+        )
+    )
+    monkeypatch.setenv("LOCALLINGUA_MODELS_FILE", str(registry))
+    app = create_app()
+    app.state.settings = load_settings()
+    assert [s.name for s in app.state.settings.model_specs] == ["small", "large"]
+    app.state.translator, _ = _router(app.state.settings.model_specs)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        short = await client.post(
+            "/api/translate",
+            json={"text": "Hello", "source_lang": "en", "target_lang": "es"},
+        )
+        long = await client.post(
+            "/api/translate",
+            json={"text": "Hello " * 10, "source_lang": "en", "target_lang": "es"},
+        )
+        health = (await client.get("/api/health")).json()
+    assert short.json()["model"] == "small"
+    assert long.json()["model"] == "large"
+    assert health["model_loaded"] is True
+    assert [(m["name"], m["served"]) for m in health["models"]] == [("small", 1), ("large", 1)]
+
+
+def test_invalid_registry_is_ignored(tmp_path):
+    path = tmp_path / "models.json"
+    path.write_text(json.dumps({"models": [{"name": "a"}]}))
+    assert load_model_specs(str(path)) == ()
+    assert load_model_specs(os.fspath(tmp_path / "missing.json")) == ()
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from app.translator.llama_cpp import sanitize_translation
+from app.translator.llama_cpp import StreamingSanitizer, sanitize_translation
 
 
 def test_sanitize_strips_fenced_text_block():
@@ -18,3 +18,32 @@ def test_sanitize_strips_generic_fence():
 def test_sanitize_empty():
     assert sanitize_translation("   \n") == ""
 
+
+
+def _stream_sanitize(text: str, step: int) -> str:
+    sanitizer = StreamingSanitizer()
+    out = "".join(sanitizer.feed(text[i : i + step]) for i in range(0, len(text), step))
+    return out + sanitizer.flush()
+
+
+def test_streaming_sanitizer_matches_batch_sanitize():
+    samples = [
+        "```text\nHola mundo\n```\n",
+        "\n```\nLinea 1\n\nLinea 2\n```  \n",
+        "Hola mundo  \n",
+        "Hola\n```\nmas",
+        "```text\nsin cierre",
+        "```",
+    ]
+    for sample in samples:
+        for step in (1, 2, 5, len(sample)):
+            assert _stream_sanitize(sample, step) == sanitize_translation(sample)
+
+
+def test_streaming_sanitizer_emits_before_completion():
+    sanitizer = StreamingSanitizer()
+    assert sanitizer.feed("```text\n") == ""
+    assert sanitizer.feed("Hola ") == "Hola"
+    assert sanitizer.feed("mundo\n``") == " mundo"
+    assert sanitizer.feed("`\n") == ""
+    assert sanitizer.flush() == ""
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import pytest
+
+from app.translator.base import TranslationResult, Translator
+from app.translator.segment import SegmentingTranslator, split_segments
+
+_DOC = (
+    "  First sentence here. Second one follows!  Third?\n"
+    "\n"
+    "\t12,345 — 67%\n"
+    "\n\n"
+    "Last paragraph without a terminator\n"
+)
+
+
+def test_split_roundtrips_exactly():
+    for max_chars in (10, 25, 1000):
+        segments = split_segments(_DOC, max_chars=max_chars)
+        assert "".join(s.text for s in segments) == _DOC
+
+
+def test_split_marks_letterless_segments_untranslatable():
+    segments = split_segments(_DOC, max_chars=1000)
+    translatable = [s.text for s in segments if s.translatable]
+    assert "12,345 — 67%" not in translatable
+    assert all(s.text.strip() for s in segments if s.translatable)
+
+
+def test_split_long_paragraph_on_sentences():
+    paragraph = "One two three. Four five six. Seven eight nine."
+    segments = split_segments(paragraph, max_chars=20)
+    assert [s.text for s in segments if s.translatable] == [
+        "One two three.",
+        "Four five six.",
+        "Seven eight nine.",
+    ]
+
+
+def test_split_hard_wraps_oversized_sentence():
+    sentence = "word " * 50
+    segments = split_segments(sentence, max_chars=32)
+    assert "".join(s.text for s in segments) == sentence
+    assert all(len(s.text) <= 32 for s in segments)
+
+
+class _UpperTranslator(Translator):
+    def __init__(self) -> None:
+        self.seen: list[str] = []
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        self.seen.append(text)
+        return TranslationResult(
+            translated_text=text.upper(),
+            detected_source_lang=None,
+            completion_tokens=1,
+        )
+
+
+@pytest.mark.asyncio
+async def test_segmenting_translator_reassembles_and_skips_letterless():
+    inner = _UpperTranslator()
+    translator = SegmentingTranslator(inner, max_chars=20)
+    result = await translator.translate(
+        text=_DOC, source_lang="en", target_lang="es", options={}
+    )
+    assert result.translated_text == _DOC.upper()
+    assert not any("12,345" in text for text in inner.seen)
+    assert result.completion_tokens == len(inner.seen)
+
+
+@pytest.mark.asyncio
+async def test_segmenting_translator_passes_short_text_through():
+    inner = _UpperTranslator()
+    translator = SegmentingTranslator(inner, max_chars=1000)
+    await translator.translate(text=" hi. there ", source_lang="en", target_lang="es", options={})
+    assert inner.seen == [" hi. there "]
+
+
+@pytest.mark.asyncio
+async def test_segmenting_translator_streams_in_document_order():
+    translator = SegmentingTranslator(_UpperTranslator(), max_chars=20)
+    chunks = [
+        chunk
+        async for chunk in translator.translate_stream(
+            text=_DOC, source_lang="en", target_lang="es", options={}
+        )
+    ]
+    assert "".join(c.delta for c in chunks) == _DOC.upper()
+    assert chunks[-1].result is not None
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from app.config import load_settings
+from app.main import create_app
+from app.singleflight import SingleFlight
+from app.translator.base import TranslationResult, Translator
+
+
+async def test_followers_join_the_leader():
+    flight: SingleFlight[str] = SingleFlight()
+    release = asyncio.Event()
+    runs = 0
+
+    async def _work():
+        nonlocal runs
+        runs += 1
+        await release.wait()
+        return "done"
+
+    waiters = [asyncio.create_task(flight.do("k", _work)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters)
+
+    assert runs == 1
+    assert results == [("done", False), ("done", True), ("done", True)]
+    assert flight.stats() == {"in_flight": 0, "started": 1, "coalesced": 2, "abandoned": 0}
+
+
+async def test_leader_error_reaches_every_waiter():
+    flight: SingleFlight[str] = SingleFlight()
+    release = asyncio.Event()
+
+    async def _fail():
+        await release.wait()
+        raise RuntimeError("boom")
+
+    waiters = [asyncio.create_task(flight.do("k", _fail)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    outcomes = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(o, RuntimeError) and str(o) == "boom" for o in outcomes)
+
+
+async def test_work_is_cancelled_only_when_the_last_waiter_leaves():
+    flight: SingleFlight[str] = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def _work():
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    first = asyncio.create_task(flight.do("k", _work))
+    second = asyncio.create_task(flight.do("k", _work))
+    await started.wait()
+
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert not cancelled.is_set() and flight.stats()["in_flight"] == 1
+
+    second.cancel()
+    await asyncio.gather(second, return_exceptions=True)
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert flight.stats()["in_flight"] == 0 and flight.stats()["abandoned"] == 1
+
+
+class _GatedTranslator(Translator):
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.calls = 0
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        self.calls += 1
+        await self.release.wait()
+        return TranslationResult(translated_text=f"ES:{text}", detected_source_lang=None)
+
+
+@pytest.fixture()
+def app(monkeypatch):
+    monkeypatch.setenv("LOCALLINGUA_ALLOW_FAKE_TRANSLATOR", "1")
+    monkeypatch.delenv("LOCALLINGUA_MODEL_PATH", raising=False)
+    monkeypatch.setenv("LOCALLINGUA_CACHE_SIZE", "0")
+    a = create_app()
+    a.state.settings = load_settings()
+    a.state.translator = _GatedTranslator()
+    return a
+
+
+async def test_identical_requests_share_one_generation(app):
+    body = {"text": "Hello there", "source_lang": "en", "target_lang": "es"}
+    translator = app.state.translator
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # The leader gives up early; the follower keeps the shared generation alive.
+        leader = asyncio.create_task(
+            client.post("/api/translate", json=body, headers={"X-Deadline-Ms": "50"})
+        )
+        while translator.calls == 0:
+            await asyncio.sleep(0.01)
+        follower = asyncio.create_task(client.post("/api/translate", json=body))
+        timed_out = await leader
+        translator.release.set()
+        served = await follower
+        stats = (await client.get("/api/stats")).json()["coalescing"]
+
+    assert timed_out.json()["error"]["code"] == "DEADLINE_EXCEEDED"
+    assert served.status_code == 200 and served.json()["translated_text"] == "ES:Hello there"
+    assert translator.calls == 1
+    assert app.state.metrics.coalesced.value() == 1
+    assert stats == {"in_flight": 0, "started": 1, "coalesced": 1, "abandoned": 0}
+
+
+async def test_coalescing_can_be_disabled(app):
+    os.environ["LOCALLINGUA_COALESCE"] = "0"
+    try:
+        app.state.settings = load_settings()
+    finally:
+        del os.environ["LOCALLINGUA_COALESCE"]
+    translator = app.state.translator
+    translator.release.set()
+    body = {"text": "Hello there", "source_lang": "en", "target_lang": "es"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await asyncio.gather(*(client.post("/api/translate", json=body) for _ in range(2)))
+        stats = (await client.get("/api/stats")).json()
+    assert translator.calls == 2 and stats["coalescing"] is None
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+
+import httpx
+import pytest
+
+from app.config import load_settings
+from app.main import create_app
+from app.smart import SmartModePlanner, SmartPlannerConfig
+from app.translator.base import TranslationResult, Translator
+
+
+@pytest.fixture(autouse=True)
+def _env():
+    os.environ["LOCALLINGUA_ALLOW_FAKE_TRANSLATOR"] = "1"
+    os.environ.pop("LOCALLINGUA_MODEL_PATH", None)
+    os.environ["LOCALLINGUA_SMART_MIN_SAMPLES"] = "2"
+    yield
+    os.environ.pop("LOCALLINGUA_SMART_MIN_SAMPLES", None)
+
+
+class _EchoingTranslator(Translator):
+    """Literal mode echoes the input; natural mode translates."""
+
+    def __init__(self) -> None:
+        self.modes: list[str] = []
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        self.modes.append(options["mode"])
+        if options["mode"] == "natural":
+            return TranslationResult(translated_text=f"NAT:{text}", detected_source_lang=None)
+        return TranslationResult(translated_text=text, detected_source_lang=None)
+
+
+def _observe(planner: SmartModePlanner, text: str, *, passthrough: bool, times: int) -> None:
+    for _ in range(times):
+        planner.record_literal(
+            text=text,
+            source_lang="en",
+            target_lang="es",
+            passthrough=passthrough,
+            elapsed_ms=10.0,
+        )
+
+
+def test_planner_starts_literal_until_enough_samples():
+    planner = SmartModePlanner(SmartPlannerConfig(min_samples=3, explore_every=0))
+    kwargs = {"text": "Hello", "source_lang": "en", "target_lang": "es"}
+    assert planner.first_mode(**kwargs) == "literal"
+    _observe(planner, "Hello", passthrough=True, times=2)
+    assert planner.first_mode(**kwargs) == "literal"
+    _observe(planner, "Hello", passthrough=True, times=1)
+    assert planner.first_mode(**kwargs) == "natural"
+    # Long inputs are a separate bucket.
+    long_text = "Please save your changes before closing."
+    assert planner.first_mode(text=long_text, source_lang="en", target_lang="es") == "literal"
+
+
+def test_planner_falls_back_to_bucket_rate_and_explores():
+    planner = SmartModePlanner(SmartPlannerConfig(min_samples=2, explore_every=3))
+    _observe(planner, "Hi", passthrough=True, times=2)
+    # An unseen pair uses the rate across all pairs for short inputs.
+    modes = [planner.first_mode(text="Hola", source_lang="es", target_lang="fr") for _ in range(3)]
+    assert modes == ["natural", "natural", "literal"]
+
+
+def test_planner_disabled_always_starts_literal():
+    planner = SmartModePlanner(SmartPlannerConfig(enabled=False, min_samples=1))
+    _observe(planner, "Hi", passthrough=True, times=5)
+    assert planner.first_mode(text="Hi", source_lang="en", target_lang="es") == "literal"
+
+
+@pytest.mark.asyncio
+async def test_smart_mode_skips_literal_after_repeated_passthrough():
+    app = create_app()
+    app.state.settings = load_settings()
+    translator = _EchoingTranslator()
+    app.state.translator = translator
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for text in ("Hello", "Good morning", "Thanks"):
+            resp = await client.post(
+                "/api/translate",
+                json={
+                    "text": text,
+                    "source_lang": "en",
+                    "target_lang": "es",
+                    "options": {"mode": "smart"},
+                },
+            )
+            assert resp.status_code == 200
+            assert resp.json()["used_mode"] == "natural"
+
+        stats = (await client.get("/api/stats")).json()["smart"]
+
+    # Two literal+natural retries teach the planner; the third request goes straight to natural.
+    assert translator.modes == ["literal", "natural", "literal", "natural", "natural"]
+    assert stats["retries"] == 2
+    assert stats["natural_first"] == 1
+    assert stats["pairs"]["en->es:short"]["passthrough_rate"] == 1.0
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.metrics import ServiceMetrics
+from app.translator.base import TranslationResult
+from app.translator.speculative import DraftCounter
+
+
+def _generate(target: list[int], prompt: list[int], draft) -> None:
+    """Mimic llama.cpp's speculative loop: verify the draft, keep the matching prefix + 1."""
+    tokens = list(prompt)
+    while len(tokens) - len(prompt) < len(target):
+        produced = len(tokens) - len(prompt)
+        proposal = draft(np.array(tokens, dtype=np.intc)).tolist()
+        accepted = 0
+        for expected, drafted in zip(target[produced:], proposal, strict=False):
+            if expected != drafted:
+                break
+            accepted += 1
+        tokens.extend(target[produced : produced + accepted + 1])
+
+
+def test_draft_counter_measures_acceptance():
+    target = [5, 6, 7, 8, 9, 10, 11, 12]
+
+    # Drafts the right next three tokens except at positions 4..5.
+    def _draft(input_ids):
+        produced = len(input_ids) - 2
+        guess = target[produced : produced + 3]
+        return np.array([t if t not in (9, 10) else 0 for t in guess], dtype=np.intc)
+
+    counter = DraftCounter(_draft)
+    counter.begin()
+    _generate(target, [1, 2], counter)
+    drafted, accepted = counter.finish()
+    assert drafted > accepted > 0
+    # Every accepted token is one llama.cpp did not have to decode on its own.
+    assert accepted <= len(target)
+
+    empty = DraftCounter(lambda ids: np.array([], dtype=np.intc))
+    empty.begin()
+    _generate(target, [1, 2], empty)
+    assert empty.finish() == (0, 0)
+
+
+def test_metrics_report_acceptance_and_speedup():
+    metrics = ServiceMetrics()
+    base = {"translated_text": "x", "detected_source_lang": None, "completion_tokens": 100}
+    metrics.observe_translation(TranslationResult(**base, generation_ms=4000), cached=False)
+    metrics.observe_translation(
+        TranslationResult(**base, generation_ms=2000, draft_tokens=80, accepted_tokens=60),
+        cached=False,
+    )
+    text = metrics.render()
+    assert "locallingua_speculative_draft_tokens_total 80" in text
+    assert "locallingua_speculative_acceptance_ratio 0.75" in text
+    assert "locallingua_speculative_speedup_ratio 2" in text
+    assert 'locallingua_generation_tokens_per_second_count{decoding="speculative"} 1' in text
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import os
+
+import httpx
+import pytest
+
+from app.config import load_settings
+from app.main import create_app
+from app.translator.base import TranslationResult, Translator
+from app.translator.fake import FakeTranslator
+
+
+@pytest.fixture(autouse=True)
+def _env():
+    os.environ["LOCALLINGUA_ALLOW_FAKE_TRANSLATOR"] = "1"
+    os.environ.pop("LOCALLINGUA_MODEL_PATH", None)
+    yield
+
+
+def _make_app(translator: Translator):
+    app = create_app()
+    app.state.settings = load_settings()
+    app.state.translator = translator
+    return app
+
+
+def _parse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def _post_stream(app, payload: dict) -> list[tuple[str, dict]]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        res = await ac.post("/api/translate/stream", json=payload)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    return _parse_events(res.text)
+
+
+@pytest.mark.asyncio
+async def test_stream_emits_deltas_then_done():
+    app = _make_app(FakeTranslator())
+    events = await _post_stream(
+        app,
+        {"text": "Hello big world", "source_lang": "en", "target_lang": "es"},
+    )
+
+    deltas = [data["text"] for name, data in events if name == "delta"]
+    assert len(deltas) > 1
+    name, done = events[-1]
+    assert name == "done"
+    assert "".join(deltas) == done["translated_text"] == "[fake en->es] Hello big world"
+    assert done["used_mode"] == "literal"
+    assert done["completion_tokens"] is not None
+    assert done["latency_ms"] >= 0
+
+
+class _EchoTranslator(Translator):
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        if options.get("mode") == "natural":
+            return TranslationResult(translated_text=f"NAT:{text}", detected_source_lang=None)
+        return TranslationResult(translated_text=text, detected_source_lang=None)
+
+
+@pytest.mark.asyncio
+async def test_stream_smart_mode_resets_on_passthrough():
+    app = _make_app(_EchoTranslator())
+    events = await _post_stream(
+        app,
+        {"text": "cheeseburger", "source_lang": "auto", "target_lang": "es"},
+    )
+
+    names = [name for name, _ in events]
+    assert names == ["delta", "reset", "delta", "done"]
+    assert events[-1][1]["translated_text"] == "NAT:cheeseburger"
+    assert events[-1][1]["used_mode"] == "natural"
+
+
+@pytest.mark.asyncio
+async def test_stream_validates_before_streaming():
+    app = _make_app(FakeTranslator())
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        res = await ac.post(
+            "/api/translate/stream",
+            json={"text": "hello", "source_lang": "en", "target_lang": "xx"},
+        )
+    assert res.status_code == 400
+    assert res.json()["error"]["code"] == "UNSUPPORTED_TARGET_LANG"
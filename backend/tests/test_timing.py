@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import time
+
+import httpx
+import pytest
+
+from app.config import load_settings
+from app.main import create_app
+from app.timing import SlowRequest, SlowRequestLog
+from app.translator.base import TranslationResult, Translator
+
+
+class _EchoingLiteral(Translator):
+    """Literal mode echoes the input, so smart mode retries with natural."""
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        natural = options["mode"] == "natural"
+        return TranslationResult(
+            translated_text=f"ES:{text}" if natural else text,
+            detected_source_lang=None,
+            prompt_tokens=20,
+            completion_tokens=10,
+            prompt_eval_ms=40.0,
+            generation_ms=100.0 if natural else 150.0,
+            queue_ms=5.0,
+        )
+
+
+@pytest.fixture()
+def app(monkeypatch):
+    monkeypatch.setenv("LOCALLINGUA_ALLOW_FAKE_TRANSLATOR", "1")
+    monkeypatch.delenv("LOCALLINGUA_MODEL_PATH", raising=False)
+    monkeypatch.setenv("LOCALLINGUA_CACHE_SIZE", "0")
+    monkeypatch.setenv("LOCALLINGUA_SLOW_LOG_SIZE", "2")
+    a = create_app()
+    a.state.settings = load_settings()
+    a.state.translator = _EchoingLiteral()
+    return a
+
+
+async def test_timing_breakdown_header_and_slow_log(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        timed = await client.post(
+            "/api/translate",
+            params={"timing": "true"},
+            json={"text": "Good morning, everyone", "target_lang": "es"},
+        )
+        plain = await client.post(
+            "/api/translate",
+            json={"text": "See you", "source_lang": "en", "target_lang": "es"},
+        )
+        batch = await client.post(
+            "/api/translate/batch",
+            json={"texts": ["One", "Two"], "source_lang": "en", "target_lang": "es"},
+        )
+        slow = (await client.get("/api/admin/slow-requests")).json()
+
+    timing = timed.json()["timing"]
+    assert timed.json()["translated_text"] == "ES:Good morning, everyone"
+    assert timing["retried"] and timing["passes"] == 2 and not timing["cached"]
+    assert timing["prompt_tokens"] == 40 and timing["completion_tokens"] == 20
+    assert timing["generation_ms"] == 250.0 and timing["tokens_per_second"] == 80.0
+    assert timing["queue_ms"] >= 10.0 and timing["detect_ms"] > 0
+    header = timed.headers["server-timing"]
+    for name in ("queue", "detect", "prompt_eval", "generation", "total"):
+        assert f"{name};dur=" in header
+    assert 'retry;desc="natural"' in header
+
+    assert plain.json()["timing"] is None and "generation;dur=" in plain.headers["server-timing"]
+    assert "generation;dur=500.0" in batch.headers["server-timing"]
+
+    assert slow["capacity"] == 2 and len(slow["requests"]) == 2
+    totals = [r["timing"]["total_ms"] for r in slow["requests"]]
+    assert totals == sorted(totals, reverse=True)
+    assert {r["endpoint"] for r in slow["requests"]} <= {"translate", "batch"}
+
+
+def test_slow_log_keeps_the_slowest_recent_requests():
+    log = SlowRequestLog(2, window_s=60)
+
+    def _request(total_ms: float, at: float) -> SlowRequest:
+        return SlowRequest(at, "translate", 10, "en", "de", "literal", {"total_ms": total_ms})
+
+    now = time.time()
+    for total, at in ((30.0, now), (5.0, now), (900.0, now - 120), (50.0, now), (10.0, now)):
+        log.record(_request(total, at))
+    assert [r.timing["total_ms"] for r in log.slowest()] == [50.0, 30.0]
+    assert SlowRequestLog(0).slowest() == []
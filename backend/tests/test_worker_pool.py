@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.translator.base import TranslationChunk, TranslationResult, Translator
+from app.translator.fake import FakeTranslator
+from app.translator.worker_pool import WorkerPoolConfig, WorkerPoolTranslator, partition_cpus
+
+
+class _CrashingTranslator(Translator):
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        if text == "crash":
+            os._exit(3)
+        if text == "missing":
+            raise FileNotFoundError("model.gguf")
+        return TranslationResult(translated_text=f"pid:{os.getpid()}", detected_source_lang=None)
+
+
+def test_partition_cpus_disjoint_or_unpinned():
+    assert partition_cpus([0, 1, 2, 3], 2, 2) == [[0, 1], [2, 3]]
+    assert partition_cpus([0, 1], 2, 2) == [None, None]
+
+
+@pytest.mark.asyncio
+async def test_pool_translates_in_worker_processes():
+    pool = WorkerPoolTranslator(
+        FakeTranslator,
+        WorkerPoolConfig(workers=2, threads_per_worker=1, pin_threads=False),
+    )
+    try:
+        results = await asyncio.gather(
+            *(
+                pool.translate(text=f"hi {i}", source_lang="en", target_lang="es", options={})
+                for i in range(4)
+            )
+        )
+    finally:
+        await pool.close()
+    assert [r.translated_text for r in results] == [f"[fake en->es] hi {i}" for i in range(4)]
+
+
+@pytest.mark.asyncio
+async def test_pool_restarts_crashed_worker_and_maps_errors():
+    pool = WorkerPoolTranslator(
+        _CrashingTranslator,
+        WorkerPoolConfig(workers=1, threads_per_worker=1, pin_threads=False),
+    )
+    kwargs = {"source_lang": "en", "target_lang": "es", "options": {}}
+    try:
+        first = await pool.translate(text="ok", **kwargs)
+        with pytest.raises(FileNotFoundError):
+            await pool.translate(text="missing", **kwargs)
+        with pytest.raises(RuntimeError, match="WORKER_CRASHED"):
+            await pool.translate(text="crash", **kwargs)
+
+        for _ in range(100):
+            if pool.stats()["worker_pool"]["alive"] == 1:
+                break
+            await asyncio.sleep(0.1)
+        second = await pool.translate(text="ok", **kwargs)
+    finally:
+        await pool.close()
+
+    assert pool.stats()["worker_pool"]["restarts"] == 1
+    assert first.translated_text != second.translated_text
+
+
+@pytest.mark.asyncio
+async def test_restarted_worker_is_not_loaded_until_it_reloads():
+    pool = WorkerPoolTranslator(
+        _CrashingTranslator,
+        WorkerPoolConfig(workers=1, threads_per_worker=1, pin_threads=False),
+    )
+    kwargs = {"source_lang": "en", "target_lang": "es", "options": {}}
+    try:
+        await pool.load()
+        assert pool.is_loaded
+        with pytest.raises(RuntimeError, match="WORKER_CRASHED"):
+            await pool.translate(text="crash", **kwargs)
+        assert not pool.is_loaded
+
+        for _ in range(100):
+            if pool.is_loaded:
+                break
+            await asyncio.sleep(0.1)
+        assert pool.is_loaded
+        assert (await pool.translate(text="ok", **kwargs)).translated_text.startswith("pid:")
+    finally:
+        await pool.close()
+
+
+class _SerialSlowTranslator(Translator):
+    """One request at a time, like a single llama context; "slow" runs for 30 s."""
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+
+    async def translate(self, *, text, source_lang, target_lang, options) -> TranslationResult:
+        async with self._lock:
+            if text == "slow":
+                await asyncio.sleep(30)
+            return TranslationResult(translated_text=text, detected_source_lang=None)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_stops_in_worker():
+    pool = WorkerPoolTranslator(
+        _SerialSlowTranslator,
+        WorkerPoolConfig(workers=1, threads_per_worker=1, pin_threads=False),
+    )
+    kwargs = {"source_lang": "en", "target_lang": "es", "options": {}}
+    try:
+        await pool.translate(text="ready", **kwargs)
+        slow = asyncio.create_task(pool.translate(text="slow", **kwargs))
+        await asyncio.sleep(0.2)
+        slow.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await slow
+        # Only possible if the worker abandoned the slow request and released its context.
+        result = await asyncio.wait_for(pool.translate(text="next", **kwargs), timeout=10)
+    finally:
+        await pool.close()
+    assert result.translated_text == "next"
+    assert pool.stats()["worker_pool"]["cancelled"] == 1
+
+
+class _SlowStreamingTranslator(_SerialSlowTranslator):
+    """Streams one word every 0.2 s; "slow" stalls for 30 s after its first word."""
+
+    async def translate_stream(self, *, text, source_lang, target_lang, options):
+        async with self._lock:
+            for word in text.split():
+                yield TranslationChunk(delta=word.upper() + " ")
+                await asyncio.sleep(30 if text.startswith("slow") else 0.2)
+            result = TranslationResult(translated_text=text.upper(), detected_source_lang=None)
+            yield TranslationChunk(delta="", result=result)
+
+
+@pytest.mark.asyncio
+async def test_stream_is_relayed_from_the_worker_and_cancellable():
+    pool = WorkerPoolTranslator(
+        _SlowStreamingTranslator,
+        WorkerPoolConfig(workers=1, threads_per_worker=1, pin_threads=False),
+    )
+    kwargs = {"source_lang": "en", "target_lang": "es", "options": {}}
+    try:
+        await pool.translate(text="ready", **kwargs)
+        arrivals: list[tuple[float, TranslationChunk]] = []
+        async for chunk in pool.translate_stream(text="one two three", **kwargs):
+            arrivals.append((time.monotonic(), chunk))
+
+        stream = pool.translate_stream(text="slow words", **kwargs)
+        first = await anext(stream)
+        await stream.aclose()
+        # Only possible if the worker abandoned the stalled stream and released its context.
+        result = await asyncio.wait_for(pool.translate(text="next", **kwargs), timeout=10)
+    finally:
+        await pool.close()
+
+    assert [c.delta for _, c in arrivals] == ["ONE ", "TWO ", "THREE ", ""]
+    assert arrivals[-1][1].result.translated_text == "ONE TWO THREE"
+    # Deltas arrive as they are generated, not all at once with the result.
+    assert arrivals[-1][0] - arrivals[0][0] >= 0.4
+    assert first.delta == "SLOW " and result.translated_text == "next"
+    assert pool.stats()["worker_pool"]["cancelled"] == 1